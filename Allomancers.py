@@ -0,0 +1,154 @@
+import numpy as np
+import numpy.typing as npt
+import functions
+
+# Pairs whose force is computed at once, bounds the size of the temporary arrays however many pairs there are
+BLOCK_SIZE = 65536
+
+
+class AllomancerSolver:
+    """Steelpushes and ironpulls of any number of allomancers, such as NPC Coinshots and Lurchers, on every metal body
+    around them. Each allomancer is a body in the physics world plus a row of the arrays here.
+
+    The allomantic force falls off exponentially with distance, so past a cutoff worked out from the strongest charge
+    in the world it is negligible. Each allomancer only considers the metal within its cutoff, found through the
+    world's spatial index, and the forces of all allomancer-target pairs are computed together in blocks and applied
+    to both sides of every pair in one scatter-add.
+    """
+
+    def __init__(self, world, negligibleForce=1e-2, maxForce=1_000_000):
+        self.world = world
+        self.negligibleForce = negligibleForce  # Pairs that cannot reach this force are skipped
+        self.maxForce = maxForce
+
+        self.rows = np.zeros(0, dtype=np.intp)  # Row of each allomancer's body in the world
+        self.strength = np.zeros(0)
+        self.maxRange = np.zeros(0)
+        self.steel = np.zeros(0, dtype=bool)  # Burning steel, pushing
+        self.iron = np.zeros(0, dtype=bool)  # Burning iron, pulling
+
+    @property
+    def count(self):
+        return len(self.rows)
+
+    def add(self, index, steel=False, iron=False, strength=1.0, maxRange=np.inf) -> int:
+        """Makes a body in the world an allomancer and returns its slot, which indexes the steel and iron arrays
+
+        Args:
+            index (int): row of the allomancer's body in the world
+            steel (bool, optional): start burning steel. Defaults to False.
+            iron (bool, optional): start burning iron. Defaults to False.
+            strength (float, optional): allomantic strength. Defaults to 1.0.
+            maxRange (float, optional): furthest the allomancer can push or pull. Defaults to no limit but the cutoff.
+        """
+        slot = self.count
+        self.rows = np.append(self.rows, index)
+        self.strength = np.append(self.strength, strength)
+        self.maxRange = np.append(self.maxRange, maxRange)
+        self.steel = np.append(self.steel, steel)
+        self.iron = np.append(self.iron, iron)
+        return slot
+
+    def remap(self, remap: npt.NDArray):
+        """Follows the rows returned by PhysicsWorld.removeBodies, dropping allomancers whose bodies were removed
+        """
+        rows = remap[self.rows]
+        kept = rows >= 0
+        self.rows = rows[kept]
+        self.strength = self.strength[kept]
+        self.maxRange = self.maxRange[kept]
+        self.steel = self.steel[kept]
+        self.iron = self.iron[kept]
+
+    def coefficients(self) -> npt.NDArray:
+        """Returns A * S * C of every allomancer, negative when pushing and zero when burning both or neither metal
+        """
+        world = self.world
+        sign = self.iron.astype(float) - self.steel.astype(float)
+        return world.allomancy.allomanticConstant * self.strength * world.charge[self.rows] * sign
+
+    def cutoffs(self, coefficients: npt.NDArray) -> npt.NDArray:
+        """Returns the distance past which each allomancer's force on any body in the world is negligible, no further
+        than its range. The velocity restitution can at most double the force, which the bound allows for.
+        """
+        world = self.world
+        n = world.count
+        metallic = world.metallic[:n]
+        maxCharge = world.charge[:n][metallic].max() if metallic.any() else 0.0
+
+        strongest = 2 * np.abs(coefficients) * maxCharge
+        with np.errstate(divide="ignore"):
+            cutoffs = world.allomancy.distanceConstant * np.log(strongest / self.negligibleForce)
+        return np.clip(cutoffs, 0, self.maxRange)
+
+    def neighbours(self, cutoffs: npt.NDArray):
+        """Returns the pairs of allomancer slots and the metal body rows within their cutoff, excluding allomancers
+        whose cutoff is zero
+        """
+        world = self.world
+        centres = world.position[self.rows] + world.size[self.rows] / 2
+        slots = np.flatnonzero(cutoffs > 0)
+
+        # Unbounded cutoffs, when no force is negligible, reach every metal body
+        metal = metalCentres = None
+        lists = []
+        for slot in slots.tolist():
+            if world.spatialIndex is not None and np.isfinite(cutoffs[slot]):
+                lists.append(world.spatialIndex.queryRadius(centres[slot], cutoffs[slot], True))
+                continue
+            if metal is None:
+                metal = np.flatnonzero(world.metallic[:world.count])
+                metalCentres = world.position[metal] + world.size[metal] / 2
+            lists.append(metal[functions.rowMagnitudes(metalCentres - centres[slot]) <= cutoffs[slot]])
+
+        counts = np.fromiter((len(targets) for targets in lists), dtype=np.intp, count=len(lists))
+        owners = np.repeat(slots, counts)
+        targets = np.concatenate(lists) if lists else np.zeros(0, dtype=np.intp)
+        return owners, targets.astype(np.intp, copy=False)
+
+    def solve(self):
+        """Adds this tick's allomantic forces between every allomancer and its targets to the world's net forces
+        """
+        world = self.world
+        if self.count == 0:
+            return
+
+        coefficients = self.coefficients()
+        owners, targets = self.neighbours(self.cutoffs(coefficients))
+        sources = self.rows[owners]
+
+        # An allomancer is never its own target, nor is a body at the allomancer's centre
+        offsets = (world.position[targets] + world.size[targets] / 2 -
+                   world.position[sources] - world.size[sources] / 2)
+        directions, distances = functions.normaliseRows(offsets)
+        keep = distances > 0
+        owners, targets, sources = owners[keep], targets[keep], sources[keep]
+        directions, distances = directions[keep], distances[keep]
+
+        pairs = len(targets)
+        if pairs == 0:
+            return
+
+        world.lastWasPushed[targets] = coefficients[owners] < 0
+        world.wake(targets)
+        world.wake(sources)
+
+        # Each pair's coefficient is folded into the target's charge, which the kernel multiplies by its own
+        charges = coefficients[owners] * world.charge[targets]
+        if world.tileMap is not None:
+            charges *= world.tileMap.occlusion(world, sources, targets)
+        relativeVelocities = world.velocity[targets] - world.velocity[sources]
+        allomancy = world.allomancy
+        forces = np.empty((pairs, 2))
+        for start in range(0, pairs, BLOCK_SIZE):
+            block = slice(start, start + BLOCK_SIZE)
+            forces[block] = functions.allomanticForces(
+                directions[block], distances[block], relativeVelocities[block], charges[block], 1.0,
+                allomancy.distanceConstant, allomancy.velocityConstant, self.maxForce)
+
+        # Equal and opposite, the allomancer gets each pair's force and the target its negative
+        n = world.count
+        rows = np.concatenate((sources, targets))
+        for component in (0, 1):
+            world.netForce[:n, component] += np.bincount(
+                rows, np.concatenate((forces[:, component], -forces[:, component])), n)
@@ -0,0 +1,116 @@
+import math
+import numpy as np
+import numpy.typing as npt
+
+
+class ChunkStreamer:
+    """Splits a level into square chunks and keeps only the ones near the player in the physics world. Bodies in
+    distant chunks are frozen, removed from the world with their state kept as arrays per chunk, and added back in bulk
+    when the player comes near again. Stepping, collisions, targeting and drawing then only ever see the bodies near
+    the player however large the level is.
+
+    Chunks are thawed within radius chunks of the player's but only frozen again once they are further than radius + 1,
+    so walking back and forth over a chunk boundary does not freeze and thaw the same chunks over and over. The player
+    and other allomancers are never frozen.
+    """
+
+    def __init__(self, simulation, chunkSize=512, radius=1):
+        self.simulation = simulation
+        self.chunkSize = chunkSize
+        self.radius = radius  # Chunks either side of the player's chunk that are kept in the world
+        self.frozen = {}  # Columns of the frozen bodies in each chunk, by chunk
+        self.centre = None  # Chunk the player was in at the last update
+
+    def chunksOf(self, points: npt.NDArray) -> npt.NDArray:
+        """Returns the (N,2) chunk coordinates of some points
+        """
+        return np.floor(points / self.chunkSize).astype(np.int64)
+
+    def playerChunk(self) -> tuple:
+        x, y = self.simulation.playerSprite.getCentreOfMassArray().tolist()
+        return math.floor(x / self.chunkSize), math.floor(y / self.chunkSize)
+
+    def isActive(self, chunks: npt.NDArray, centre, margin=0) -> npt.NDArray:
+        """Returns which of an (N,2) array of chunks are within radius + margin chunks of the centre chunk
+        """
+        return (np.abs(chunks - np.asarray(centre)) <= self.radius + margin).all(axis=1)
+
+    def addObjects(self, position: npt.NDArray, size: npt.NDArray, mass=1.0, is_metallic=False,
+                   perfectlyAnchored=False) -> npt.NDArray:
+        """Takes the same arguments as Simulation.addObjects. Objects in chunks near the player are added to the world
+        and their indices returned, the rest are frozen in their chunks until the player comes near.
+        """
+        count = len(position)
+        columns = {"position": np.asarray(position, dtype=float), "size": np.asarray(size, dtype=float),
+                   "mass": np.broadcast_to(np.asarray(mass, dtype=float), count),
+                   "metallic": np.broadcast_to(np.asarray(is_metallic, dtype=bool), count),
+                   "anchored": np.broadcast_to(np.asarray(perfectlyAnchored, dtype=bool), count),
+                   "velocity": np.zeros((count, 2))}
+
+        chunks = self.chunksOf(columns["position"] + columns["size"] / 2)
+        active = self.isActive(chunks, self.playerChunk())
+        self.freeze(chunks[~active], {name: column[~active] for name, column in columns.items()})
+        return self.thaw({name: column[active] for name, column in columns.items()})
+
+    def freeze(self, chunks: npt.NDArray, columns: dict):
+        """Adds bodies to the frozen state of the chunks they are in, which is their level columns and velocity
+        """
+        if len(chunks) == 0:
+            return
+        keys, inverse = np.unique(chunks, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        for group, key in enumerate(map(tuple, keys.tolist())):
+            members = inverse == group
+            frozen = self.frozen.get(key)
+            if frozen is None:
+                self.frozen[key] = {name: column[members] for name, column in columns.items()}
+            else:
+                for name, column in columns.items():
+                    frozen[name] = np.concatenate((frozen[name], column[members]))
+
+    def thaw(self, columns: dict) -> npt.NDArray:
+        """Adds frozen bodies back to the world and returns their indices
+        """
+        simulation = self.simulation
+        indices = simulation.addObjects(columns["position"], columns["size"], columns["mass"], columns["metallic"],
+                                        columns["anchored"])
+        simulation.world.velocity[indices] = columns["velocity"]
+        return indices
+
+    def update(self):
+        """When the player has changed chunk, thaws the chunks that came near and freezes the bodies that are now in
+        distant chunks. Bodies that wander off between changes are left in the world until the next one, so ticks where
+        the player stays in the same chunk cost nothing.
+        """
+        simulation = self.simulation
+        world = simulation.world
+        centre = self.playerChunk()
+        if centre == self.centre:
+            return
+        self.centre = centre
+
+        cx, cy = centre
+        for key in [(x, y) for x in range(cx - self.radius, cx + self.radius + 1)
+                    for y in range(cy - self.radius, cy + self.radius + 1)]:
+            columns = self.frozen.pop(key, None)
+            if columns is not None:
+                self.thaw(columns)
+
+        chunks = self.chunksOf(world.centres())
+        leaving = ~self.isActive(chunks, centre, 1)
+        leaving[simulation.pinnedRows()] = False
+        if not leaving.any():
+            return
+
+        rows = np.flatnonzero(leaving)
+        self.freeze(chunks[rows], {"position": world.position[rows], "size": world.size[rows],
+                                   "mass": world.mass[rows], "metallic": world.metallic[rows],
+                                   "anchored": world.anchored[rows], "velocity": world.velocity[rows]})
+        for index in rows.tolist():
+            entity = world.entities[index]
+            if entity is not None:
+                entity.kill()
+        simulation.removeBodies(rows)
+
+    def frozenCount(self) -> int:
+        return sum(len(columns["mass"]) for columns in self.frozen.values())
@@ -1,71 +1,190 @@
 import math
+from collections import OrderedDict
 import numpy as np
 import numpy.typing as npt
 import pygame
-from IronSteelAllomancy import IronSteelAllomancy
+from PhysicsWorld import PhysicsWorld, defaultWorld
+from Feruchemy import FeruchemyEngine, FERUCHEMICAL_METALS
 import functions
 
 # Define some debugging globals that will become settings later
 EASY_FERUCHEMY = True
-GRAVITYCONSTANT = 1
+
+# The aiming cone is cached per this many degrees of aim, keeping the most recent CONE_CACHE_SIZE of them
+CONE_ANGLE_STEP = 0.5
+CONE_CACHE_SIZE = 8
+
+# Object colours, metal objects are lighter
+METAL_COLOUR = (200, 200, 200)
+NON_METAL_COLOUR = (100, 100, 100)
+
+
+# Object surfaces, shared by every object of the same size and colour. Drawing on an object's image changes all of them.
+objectImages = {}
+
+
+def objectImage(width, height, is_metallic) -> pygame.Surface:
+    """Returns the shared surface an object of this size and kind is drawn with
+    """
+    key = (int(width), int(height), bool(is_metallic))
+    image = objectImages.get(key)
+    if image is None:
+        image = objectImages[key] = pygame.Surface(key[:2])
+        image.fill(METAL_COLOUR if is_metallic else NON_METAL_COLOUR)
+    return image
 
 
 class Entity(pygame.sprite.Sprite):
-    def __init__(self, x, y, height, width, screenWidth, screenHeight, perfectlyAnchored):
+    # Sprite has no slots of its own, so instances still get a __dict__, but it only holds the sprite's groups
+    __slots__ = ("image", "rect", "world", "index", "height", "width")
+
+    deceleration = 1
+
+    def __init__(self, x, y, height, width, screenWidth, screenHeight, perfectlyAnchored, world: PhysicsWorld = None,
+                 index=None, image: pygame.Surface = None):
         super().__init__()
-        self.image = pygame.Surface([width, height])
-        self.image.fill((167, 255, 100))
-        self.image.set_colorkey((255, 100, 98))
+        if image is None:
+            image = pygame.Surface([width, height])
+            image.fill((167, 255, 100))
+            image.set_colorkey((255, 100, 98))
+        self.image = image
 
         self.rect = self.image.get_rect()
         self.rect.center = (x, y)
 
-        # Window constants
-        self.screenWidth = screenWidth
-        self.screenHeight = screenHeight
-
-        # Physical constants
-        self.mass = int
-        self.velocity = np.array([0.0, 0.0])
-
         self.height = height
         self.width = width
-        self.isPerfectlyAnchored = perfectlyAnchored
-        self.isAirborne = False
-        self.deceleration = 1
-        self.frictionCoeff = 0.1  # Friction coefficient
-        self.dragCoeff = 0.1
 
-        self.netForceThisFrame = np.array([0.0, 0.0])
+        # Physical state lives in a row of the physics world, this sprite is a view onto it
+        self.world = world if world is not None else defaultWorld
+        if index is None:
+            self.index = self.world.addBody(self, self.rect.x, self.rect.y, width, height,
+                                            screenWidth, screenHeight, 1.0, perfectlyAnchored)
+        else:
+            # Adopt a row added in bulk, its position is already set
+            self.index = index
+            self.world.entities[index] = self
+            self.syncRect()
+
+    # Views onto this entity's row of the physics world. Rows are looked up on every access because the world may
+    # reallocate or reorder its arrays.
+
+    @property
+    def screenWidth(self) -> float:
+        return self.world.bounds[self.index, 0]
+
+    @property
+    def screenHeight(self) -> float:
+        return self.world.bounds[self.index, 1]
+
+    @property
+    def position(self) -> npt.NDArray:
+        return self.world.position[self.index]
+
+    @position.setter
+    def position(self, value):
+        self.world.position[self.index] = value
+        self.world.wake(self.index)
+
+    @property
+    def velocity(self) -> npt.NDArray:
+        return self.world.velocity[self.index]
+
+    @velocity.setter
+    def velocity(self, value):
+        self.world.velocity[self.index] = value
+        self.world.wake(self.index)
+
+    @property
+    def netForceThisFrame(self) -> npt.NDArray:
+        return self.world.netForce[self.index]
+
+    @netForceThisFrame.setter
+    def netForceThisFrame(self, value):
+        self.world.netForce[self.index] = value
+        self.world.wake(self.index)
+
+    @property
+    def mass(self) -> float:
+        return self.world.mass[self.index]
+
+    @mass.setter
+    def mass(self, value):
+        self.world.mass[self.index] = value
+
+    @property
+    def isPerfectlyAnchored(self) -> bool:
+        return self.world.anchored[self.index]
+
+    @isPerfectlyAnchored.setter
+    def isPerfectlyAnchored(self, value):
+        self.world.anchored[self.index] = value
+
+    @property
+    def isAirborne(self) -> bool:
+        return self.world.airborne[self.index]
+
+    @isAirborne.setter
+    def isAirborne(self, value):
+        self.world.airborne[self.index] = value
+
+    @property
+    def charge(self) -> float:
+        return self.world.charge[self.index]
+
+    @charge.setter
+    def charge(self, value):
+        self.world.charge[self.index] = value
+
+    @property
+    def frictionCoeff(self) -> float:
+        return self.world.frictionCoeff[self.index]
+
+    @frictionCoeff.setter
+    def frictionCoeff(self, value):
+        self.world.frictionCoeff[self.index] = value
+
+    @property
+    def dragCoeff(self) -> float:
+        return self.world.dragCoeff[self.index]
+
+    @dragCoeff.setter
+    def dragCoeff(self, value):
+        self.world.dragCoeff[self.index] = value
 
     def addForce(self, force: npt.NDArray):
         if not self.isPerfectlyAnchored:
             self.netForceThisFrame += force
 
-    def applyForce(self):
-        # Apply force based on mass
-        if not self.isPerfectlyAnchored:
-            self.velocity += self.netForceThisFrame / self.mass
-
-    def applyGravity(self):
-        if not self.isPerfectlyAnchored:
-            self.velocity[1] += GRAVITYCONSTANT
+    def getCentreOfMassArray(self):
+        return self.position + (self.width / 2, self.height / 2)
 
-    def updatePosition(self):
-        """Updates the sprites position based on its velocity
+    def syncRect(self):
+        """Moves the sprite's rect to the position of its body in the physics world
         """
-        self.rect.x += self.velocity[0]
-        self.rect.y += self.velocity[1]
+        x, y = self.position
+        self.rect.x = round(x)
+        self.rect.y = round(y)
 
-    def getCentreOfMassArray(self):
-        return np.array([self.rect.centerx, self.rect.centery])
+    @property
+    def is_metallic(self) -> bool:
+        return self.world.metallic[self.index]
+
+    @is_metallic.setter
+    def is_metallic(self, value):
+        self.world.metallic[self.index] = value
 
-    def stopFallingAtGround(self):
-        # Check for collision with ground
-        if self.rect.y >= self.screenHeight - self.height:
-            self.rect.y = self.screenHeight - self.height
-            self.velocity[1] = 0
-            self.isAirborne = False
+    @property
+    def lastWasPushed(self) -> bool:
+        return self.world.lastWasPushed[self.index]
+
+    @lastWasPushed.setter
+    def lastWasPushed(self, value):
+        self.world.lastWasPushed[self.index] = value
+
+    def update(self):
+        # Physics is integrated for every body at once by PhysicsWorld.step, the sprite only needs to follow it
+        self.syncRect()
 
     def stop(self):
         if not self.isAirborne:
@@ -79,65 +198,32 @@ class Entity(pygame.sprite.Sprite):
                 if self.velocity[0] > 0:  # Stop overshooting zero
                     self.velocity[0] = 0
 
-    def addFriction(self):
-        # Apply friction to the object's motion
-        if not self.isAirborne:
-            friction_force_x = - \
-                self.velocity[0] * self.frictionCoeff * self.mass
 
-            frictionForce = np.array([friction_force_x, 0])
-            
-            # Apply friction to the velocity
-            self.addForce(frictionForce)
-        else:
-            # Apply air resistance to horizontal and vertical velocities
-            if not np.allclose(self.velocity, 0.0):
-                dragForce = -1*self.dragCoeff * \
-                    np.linalg.norm(self.velocity)**2 * \
-                    (self.velocity/np.linalg.norm(self.velocity))
-
-                self.addForce(dragForce)
+class Object(Entity):
+    __slots__ = ("magneticMass",)
 
+    maxVelocity = 10
 
-class Object(Entity):
-    def __init__(self, x, y, width, height, screenWidth, screenHeight, is_metallic=False, mass=1.0, perfectlyAnchored=False):
+    def __init__(self, x, y, width, height, screenWidth, screenHeight, is_metallic=False, mass=1.0, perfectlyAnchored=False, world: PhysicsWorld = None, index=None):
         Entity.__init__(self, x, y, height, width, screenWidth,
-                        screenHeight, perfectlyAnchored)
-        self.image = pygame.Surface([width, height])
-        self.image.fill((200, 200, 200) if is_metallic else (100, 100, 100))
+                        screenHeight, perfectlyAnchored, world, index, objectImage(width, height, is_metallic))
         self.is_metallic = is_metallic
 
-        # Window constants
-        self.screenWidth = screenWidth
-        self.screenHeight = screenHeight
+        # Objects are kept inside the window
+        self.world.clampToBounds[self.index] = True
 
         self.mass = mass
         self.magneticMass = mass
-        self.maxVelocity = 10
         self.charge = math.pow(
-            self.magneticMass, IronSteelAllomancy.chargePower)
+            self.magneticMass, self.world.allomancy.chargePower)
         self.lastWasPushed = False
 
-    def update(self):
-
-        self.addFriction()
-        self.applyForce()  # Applies all added forces to the velocity
-        self.applyGravity()  # Applies acceleration due to gravity to the velocity
-        self.updatePosition()  # Updates the positon according to the velocity
-        self.stopFallingAtGround()
-
-        # Clear force this frame
-        self.netForceThisFrame *= 0
-
-        screen_rect = pygame.Rect(
-            0, 0, self.screenWidth, self.screenHeight)
-        self.rect.clamp_ip(screen_rect)
-
 
 class PlayerSprite(Entity):
-    def __init__(self, x, y, color, height, width, screenWidth, screenHeight, maxPushRange=500):
+    def __init__(self, x, y, color, height, width, screenWidth, screenHeight, maxPushRange=500, world: PhysicsWorld = None,
+                 feruchemy: FeruchemyEngine = None):
         Entity.__init__(self, x, y, height, width,
-                        screenWidth, screenHeight, False)
+                        screenWidth, screenHeight, False, world)
 
         pygame.draw.rect(self.image, color, pygame.Rect(0, 0, width, height))
 
@@ -148,33 +234,20 @@ class PlayerSprite(Entity):
         self.shortJumpCutoff = 0.3 * self.jumpForce
 
         self.jumpKeyHeld = False
-        self.push_force = 1000
-        self.pull_force = 1000
-        self.maxForce = 4
         self.maxPushRange = maxPushRange
         self.coneAngle = 45
+        self.coneCache = OrderedDict()
 
         # Spikes
         self.spikes = ["AllomancySteel", None]
 
         # Feruchemy
 
-        self.feruchemicalMetals = ["steel", "iron",
-                                   "pewter", "gold",
-                                   "brass", "chromium"]
-
-        # Feruchemy flags - +1 indicates filling at 1st stage rate (value tbd), -3 means tapping at 3rd stage rate etc.
-        self.feruchemyFlags = {"iron": 0, "steel": 0,
-                               "pewter": 0, "gold": 0,
-                               "brass": 0, "chromium": 0}
-
+        self.feruchemicalMetals = FERUCHEMICAL_METALS
         self.feruchemyChangeRate = 3
-        self.metalMindCapacity = 5000
 
-        # Metalminds
-        self.metalMinds = {"iron": 0, "steel": 0,
-                           "pewter": 0, "gold": 0,
-                           "brass": 0, "chromium": 0}
+        # Stages and metalminds live in a row of a FeruchemyEngine, which may be shared with other feruchemists
+        self.feruchemy = feruchemy if feruchemy is not None else FeruchemyEngine()
 
         # All feruchemy related attributes
 
@@ -193,6 +266,9 @@ class PlayerSprite(Entity):
         # Chromium
         self.fortune = self.baseFortune = 100
 
+        self.feruchemyRow = self.feruchemy.add(self, mass=self.baseMass, moveSpeedLimit=self.baseMoveSpeedLimit,
+                                               acceleration=self.baseAcceleration, deceleration=self.baseDeceleration)
+
         self.allomanticMetals = ["steel", "iron", "aluminium", "bendalloy",
                                  "cadmium", "brass", "zinc", "chromium", "duralumin", "zinc"]
 
@@ -213,7 +289,27 @@ class PlayerSprite(Entity):
 
         self.allomanticStrength = 1
         self.charge = math.pow(
-            self.mass, IronSteelAllomancy.chargePower)
+            self.mass, self.world.allomancy.chargePower)
+
+        # The player works out whether it is airborne every step and has its speed limited. It never sleeps, as its
+        # controls change its velocity in place.
+        self.world.detectAirborne[self.index] = True
+        self.world.canSleep[self.index] = False
+        self.clampVelocity()
+
+    @property
+    def feruchemyFlags(self) -> dict:
+        """Stage of each metal, negative when filling a metalmind and positive when tapping it
+        """
+        return self.feruchemy.stagesOf(self.feruchemyRow)
+
+    @property
+    def metalMinds(self) -> dict:
+        return self.feruchemy.metalMindsOf(self.feruchemyRow)
+
+    @property
+    def metalMindCapacity(self):
+        return self.feruchemy.capacity
 
     def moveRight(self):
         accelerationValue = self.acceleration if not self.isAirborne else self.acceleration/2
@@ -245,350 +341,142 @@ class PlayerSprite(Entity):
         self.jumpKeyHeld = False
 
     def clampVelocity(self):
-        # Ensure player is not moving faster than move speed limit
-        if self.velocity[0] < 0:
-            self.velocity[0] = max(self.velocity[0], -self.moveSpeedLimit)
-        elif self.velocity[0] > 0:
-            self.velocity[0] = min(self.velocity[0], self.moveSpeedLimit)
-        if self.velocity[1] < 0:
-            self.velocity[1] = max(
-                self.velocity[1], -self.aerialMoveSpeedLimit)
-        elif self.velocity[1] > 0:
-            self.velocity[1] = min(self.velocity[1], self.aerialMoveSpeedLimit)
-
-    def createAimingCone(self, screenWidth, screenHeight):
-        # Create surface for the cone
-        coneSurface = pygame.Surface(
-            (screenWidth, screenHeight), pygame.SRCALPHA)
+        """Ensure player is not moving faster than move speed limit. The clamp itself is applied by the physics world
+        during its step, this keeps the world's limits in line with the current feruchemical attributes.
+        """
+        self.world.velocityLimit[self.index] = (
+            self.moveSpeedLimit, self.aerialMoveSpeedLimit)
+
+    def createAimingCone(self, aimPos=None, centre=None):
+        """Returns a surface with the aiming cone drawn on it and the screen position to blit it at. The surface only
+        covers the cone's bounding box and is cached by quantised aim angle, so it is only redrawn when the aim moves
+        by more than CONE_ANGLE_STEP degrees.
 
+        Args:
+            aimPos (tuple, optional): point the player is aiming at. Defaults to the mouse position.
+            centre (tuple, optional): point the player is drawn at. Defaults to the centre of its rect.
+        """
         # Get and normalise the direction vector to the mouse
-        playerPos = self.rect.center
-        mousePos = pygame.mouse.get_pos()
+        playerPos = centre if centre is not None else self.rect.center
+        mousePos = aimPos if aimPos is not None else pygame.mouse.get_pos()
         mouseDir = (mousePos[0] - playerPos[0], mousePos[1]-playerPos[1])
-        mag = (mouseDir[0]**2 + mouseDir[1]**2)**0.5
-        if mag > 0:
-            mouseDir = (mouseDir[0]/mag, mouseDir[1]/mag)
 
+        # Quantise the aim direction, the cone's shape relative to the player depends on nothing else
+        angleStep = round(math.degrees(math.atan2(mouseDir[1], mouseDir[0])) / CONE_ANGLE_STEP)
+        key = (angleStep, self.coneAngle, self.maxPushRange)
+
+        cached = self.coneCache.get(key)
+        if cached is None:
+            cached = self.drawAimingCone(math.radians(angleStep * CONE_ANGLE_STEP))
+            self.coneCache[key] = cached
+            if len(self.coneCache) > CONE_CACHE_SIZE:
+                self.coneCache.popitem(last=False)
+        else:
+            self.coneCache.move_to_end(key)
+
+        coneSurface, offset = cached
+        return coneSurface, (playerPos[0] + offset[0], playerPos[1] + offset[1])
+
+    def drawAimingCone(self, baseAngle):
+        """Draws the aiming cone pointing at baseAngle onto a surface the size of its bounding box
+
+        Returns:
+            tuple: the surface and the offset of its top-left corner from the player
+        """
         # Calculate the boundary angles
-        baseAngle = math.atan2(mouseDir[1], mouseDir[0])
         coneAngleRad = math.radians(self.coneAngle / 2)
 
         # Define start and end angles
         startAngle = baseAngle - coneAngleRad
         endAngle = baseAngle + coneAngleRad
 
-        # Fill the cone slice
-        points = [playerPos]
+        # Fill the cone slice, with the player at the origin
+        points = [(0, 0)]
         steps = 20
         for i in range(steps+1):
             angle = startAngle + i * (endAngle-startAngle)/steps
-            x = int(playerPos[0] + self.maxPushRange*math.cos(angle))
-            y = int(playerPos[1] + self.maxPushRange*math.sin(angle))
+            x = int(self.maxPushRange*math.cos(angle))
+            y = int(self.maxPushRange*math.sin(angle))
             points.append((x, y))
 
-        pygame.draw.polygon(coneSurface, (100, 100, 255, 50), points)
-        return coneSurface
+        left = min(x for x, _ in points)
+        top = min(y for _, y in points)
+        width = max(x for x, _ in points) - left + 1
+        height = max(y for _, y in points) - top + 1
 
-    def objectInRange(self, obj: Object):
-        # Calculate vector to the object
-        dx = obj.rect.centerx - self.rect.centerx
-        dy = obj.rect.centery - self.rect.centery
-        distance = (dx**2 + dy**2) ** 0.5
+        coneSurface = pygame.Surface((width, height), pygame.SRCALPHA)
+        pygame.draw.polygon(coneSurface, (100, 100, 255, 50), [(x - left, y - top) for x, y in points])
+        return coneSurface, (left, top)
 
-        # Normalise the vector
-        if distance > 0:
-            dx /= distance
-            dy /= distance
-
-        if 0 < distance <= self.maxPushRange:
-            return True, (dx, dy), distance
-        else:
-            return False, (dx, dy), distance
-
-    def objectInTargettingCone(self, objVector):
-        """Returns true if vector to an object lies within the targetting cone of the player, which is projected from the player to the mouse cursor
+    def targetOffsets(self, indices: npt.NDArray):
+        """Returns the (N,2) unit vectors from the centre of the player to the centre of each of a set of bodies, zero
+        for any at the centre, and the distance to each of them
 
         Args:
-            objVector (tuple): contains the x and y elements of the vector pointing from the player to the object (normalised)
+            indices (NDArray): row indices in the physics world of the bodies
         """
-        # Get vector from player to mouse and normalise it
-        mousePos = pygame.mouse.get_pos()
-        mouseDir = (mousePos[0] - self.rect.center[0],
-                    mousePos[1] - self.rect.center[1])
-        mag = (mouseDir[0]**2 + mouseDir[1]**2)**0.5
-        if mag > 0:
-            mouseDir = (mouseDir[0]/mag, mouseDir[1]/mag)
-
-        # Calculate the angle between the normalised vectors and convert to degrees
-        dotProduct = objVector[0] * mouseDir[0] + objVector[1] * mouseDir[1]
-        # Clamp the value of the dot product so that it cannot go out of domain for arccos function (caused by floating point math errors)
-        dotProduct = min(max(dotProduct, 0), 1)
-        try:
-            angle = math.acos(dotProduct) * (180 / math.pi)
-        except ValueError:
-            raise Exception("dotProduct out of range of arccos function, value was: " +
-                            str(dotProduct))
-
-        # Return true if angle falls within the size of the cone
-        return angle <= self.coneAngle/2
-
-    def isValidTarget(self, obj: Object) -> bool:
-        inRange, vector, distance = self.objectInRange(obj)
-        aimedAt = self.objectInTargettingCone(vector)
-
-        return inRange and aimedAt and obj.is_metallic
-
-    def calculateAllomanticForce(self, obj: Object) -> npt.NDArray:
-        """Calculates the allomantic force between the allomancer (self) and the object being targetted
-            F = A * S * C * d 
-
-            F: Allomantic Force
-     *      A: Allomantic Constant (~1000, subject to change)
-     *      S: Allomantic Strength (1), a constant, different for each Allomancer
-     *      C: Allomantic Charge (8th root of (Allomancer mass * target mass)), different for each Allomancer-target pair.
-     *          Is the effect of mass on the force.
-     *      d: Distance factor (between 0% and 100%)
-     *          Is the effect of the distance between the target and Allomancer on the force.
+        world = self.world
+        offsets = world.position[indices] + world.size[indices] / 2 - self.getCentreOfMassArray()
+        return functions.normaliseRows(offsets)
 
+    def applyForces(self, indices: npt.NDArray, direction: npt.NDArray, distances: npt.NDArray, pushing: bool):
+        """Applies the allomantic forces between the allomancer and targets that are already known to be valid, such
+        as the targets of a TargetingSnapshot
 
         Args:
-            obj (_type_): _description_
-        """
-
-        # Calculate vector to the object
-        positionDifference = obj.getCentreOfMassArray() - self.getCentreOfMassArray()
+            indices (NDArray): row indices in the physics world of the targets
+            direction (NDArray): (N,2) unit vectors from the allomancer to each target
+            distances (NDArray): distance to each target
+            pushing (bool): whether this is the steelpush (True) or ironpull (False) pass
 
-        if np.allclose(positionDifference, 0.0):
-            positionDifference = np.array([0.0, -0.0001, 0.0])
-
-        magnitude = np.linalg.norm(positionDifference)
-        positionDifferenceNorm = positionDifference / \
-            magnitude if magnitude > 0 else positionDifference
-
-        distanceFactor = positionDifferenceNorm * \
-            np.exp(-magnitude/IronSteelAllomancy.distanceConstant)
-
-        force = IronSteelAllomancy.allomanticConstant * \
-            self.allomanticStrength * self.charge * obj.charge * distanceFactor
-
-        return force
-
-    def calculateForce(self, obj: Object, pushing: bool):
-        """Calculates the net force between allomancer and the object using the formula N = F + B
-        where N is the net force exerted on the allomancer and the object, F is the calculated 
-        allomantic force, and B is a bonus push boost coming from an anchored object
-
-        Args:
-            obj (_type_): _description_
+        Returns:
+            NDArray: the net force on the allomancer from every target
         """
+        world = self.world
+        if len(indices) == 0:
+            return np.zeros(2)
 
-        # Steps:
-        # 1. Calculate allomantic force exerted on target, producing F
-        # 2. Scale the force with a factor exponential with the relative velocity of the two entities producing restitution force
-        # 3. Sum the allomantic force and the restitution force from the object and apply to allomancer
-        # 4. Sum the allomantic force and the restitution force from the allomancer and apply to the object
-
-        obj.lastWasPushed = pushing
+        world.lastWasPushed[indices] = pushing
+        world.wake(indices)
 
-        allomanticForce = self.calculateAllomanticForce(obj)
-        # print(np.linalg.norm(allomanticForce))
-        direction = allomanticForce / np.linalg.norm(allomanticForce)
+        # F = A * S * C * d, with the charge product per target and exponential distance falloff
+        coefficient = world.allomancy.allomanticConstant * self.allomanticStrength * self.charge
 
         # Flip direction of force for pulling
         if self.aSteel and not self.aIron:
-            allomanticForce *= -1
+            coefficient *= -1
         elif self.aSteel and self.aIron:  # If pushing and pulling on the same object, net zero force is exerted on the object
-            allomanticForce *= 0
-
-        # Ensure force does not exceed maximum (don't know what we're doing with this yet so womp womp set it to a mill)
-        allomanticForce = functions.clampMagnitude(allomanticForce, 1_000_000)
-
-        relativeVelocity = functions.vectorProject(
-            obj.velocity-self.velocity, direction)
-        velocityFactor = 1 - \
-            np.exp(-np.linalg.norm(relativeVelocity) /
-                   IronSteelAllomancy.velocityConstant)
-
-        # Adds the "symmetrical" model from Invested by austin j taylor, should mean that pushes are weaker when object is moving away from allomancer, and vice versa
-        if np.dot(relativeVelocity, direction) > 0:
-            velocityFactor *= -1
-
-        # Calculate the anchored push boost
-        restitutionForceFromAllomancer = allomanticForce * velocityFactor
-        restitutionForceFromObj = allomanticForce * - velocityFactor
-
-        # Calculate the total force on the allomancer and the object
-        netForceOnAllomancer = allomanticForce + restitutionForceFromObj
-        netForceonObject = -allomanticForce + restitutionForceFromAllomancer
-
-        # Add the force to this frames force
-        self.netForceThisFrame += netForceOnAllomancer
-        obj.netForceThisFrame += netForceonObject
-
-    def steelpush(self, objects):
-        for obj in objects:
-            if obj.is_metallic:
+            coefficient *= 0
 
-                inRange, vector, distance = self.objectInRange(obj)
-                aimedAt = self.objectInTargettingCone(vector)
+        # Walls between the allomancer and a target weaken the force as if the target's charge were lower
+        charges = world.charge[indices]
+        if world.tileMap is not None:
+            charges = charges * world.tileMap.occlusion(world, np.full(len(indices), self.index), indices)
 
-                if inRange and aimedAt:
-                    forceMag = self.push_force / distance
-                    forceMag = min(forceMag, self.maxForce)
+        # N = F + B on both sides, equal and opposite, with the force clamped to a maximum
+        allomancy = world.allomancy
+        netForceOnAllomancer = functions.allomanticForces(
+            direction, distances, world.velocity[indices] - self.velocity, charges, coefficient,
+            allomancy.distanceConstant, allomancy.velocityConstant, 1_000_000)
 
-                    forceX = forceMag * vector[0]
-                    forceY = forceMag * vector[1]
-
-                    force = np.array([forceX, forceY])
-
-                    self.addForce(-force)
-                    obj.addForce(force)
-
-    def ironpull(self, objects):
-        for obj in objects:
-            if obj.is_metallic:
-
-                inRange, vector, distance = self.objectInRange(obj)
-                aimedAt = self.objectInTargettingCone(vector)
-                if inRange and aimedAt:
-                    forceMag = self.pull_force / distance
-                    forceMag = min(forceMag, self.maxForce)
-
-                    forceX = forceMag * vector[0]
-                    forceY = forceMag * vector[1]
-
-                    force = np.array([forceX, forceY])
-                    print(force)
-                    self.addForce(force)
-                    obj.addForce(-force)
-
-                    # Smooth out the velocity when the object is close to the player
-                    if distance < 10:  # Close enough to reduce speed
-                        obj.xVelocity *= 0.8  # Reduce speed gradually when very close
-                        obj.yVelocity *= 0.8
-
-                    # Prevent objects from flying into the player or overshooting
-                    if self.rect.colliderect(obj.rect):
-                        obj.xVelocity = 0  # Stop horizontal movement when in contact
-                        obj.yVelocity = 0  # Stop vertical movement when in contact
+        world.netForce[indices] -= netForceOnAllomancer
+        totalForce = netForceOnAllomancer.sum(axis=0)
+        self.netForceThisFrame += totalForce
+        return totalForce
 
     def changeMetalmindRate(self, metal, change):
-
-        if not metal in self.feruchemicalMetals:
-            raise Exception(
-                "Passed metal not in available feruchemical metals")
-        else:
-            self.feruchemyFlags[metal] += change
-
-    def limitFeruchemy(self):
-        """constrains values relevant to feruchemy to value ranges
-        """
-
-        # Constrains the value of each metals fill/tap rate to lie within range -3 to +3
-        for metal in self.feruchemicalMetals:
-            self.feruchemyFlags[metal] = min(
-                max(self.feruchemyFlags[metal], -3), 3)
-
-        # Constrains the amount of attribute stored in each metalmind
-        for metal in self.feruchemicalMetals:
-            self.metalMinds[metal] = min(
-                max(self.metalMinds[metal], 0), self.metalMindCapacity)
-
-    def changeAttributes(self):
-        """Alters feruchemical attributes when the player is tapping/filling a metalmind
-        """
-        # Iron
-
-        match self.feruchemyFlags["iron"]:
-            case -3:
-                self.mass = 0.25 * self.baseMass
-            case -2:
-                self.mass = 0.5 * self.baseMass
-            case -1:
-                self.mass = 0.75 * self.baseMass
-            case 0:
-                self.mass = self.baseMass
-            case 1:
-                self.mass = 2 * self.baseMass
-            case 2:
-                self.mass = 3 * self.baseMass
-            case 3:
-                self.mass = 10 * self.baseMass
-
-        match self.feruchemyFlags["steel"]:
-            case -3:
-                self.moveSpeedLimit = 0.25 * self.baseMoveSpeedLimit
-                self.acceleration = 0.25 * self.baseAcceleration
-                self.deceleration = 0.25 * self.baseDeceleration
-            case -2:
-                self.moveSpeedLimit = 0.5 * self.baseMoveSpeedLimit
-                self.acceleration = 0.5 * self.baseAcceleration
-                self.deceleration = 0.5 * self.baseDeceleration
-            case -1:
-                self.moveSpeedLimit = 0.75 * self.baseMoveSpeedLimit
-                self.acceleration = 0.75 * self.baseAcceleration
-                self.deceleration = 0.75 * self.baseDeceleration
-            case 0:
-                self.moveSpeedLimit = self.baseMoveSpeedLimit
-                self.acceleration = self.baseAcceleration
-                self.deceleration = self.baseDeceleration
-            case 1:
-                self.moveSpeedLimit = 2 * self.baseMoveSpeedLimit
-                self.acceleration = 2 * self.baseAcceleration
-                self.deceleration = 2 * self.baseDeceleration
-            case 2:
-                self.moveSpeedLimit = 3 * self.baseMoveSpeedLimit
-                self.acceleration = 3 * self.baseAcceleration
-                self.deceleration = 3 * self.baseDeceleration
-            case 3:
-                self.moveSpeedLimit = 10 * self.baseMoveSpeedLimit
-                self.acceleration = 10 * self.baseAcceleration
-                self.deceleration = 10 * self.baseDeceleration
+        self.feruchemy.changeStage(self.feruchemyRow, metal, change)
 
     def updateFeruchemy(self):
-
-        # If metalminds are full or empty and player tried to fill/tap respectively, set the stage to 0
-        for metal in self.feruchemicalMetals:
-            # If metalmind is over capacity and trying to fill, stop filling
-            if self.metalMinds[metal] >= self.metalMindCapacity and self.feruchemyFlags[metal] < 0:
-                self.feruchemyFlags[metal] = 0
-            # Else if metalmind is empty and trying to drain, stop draining
-            elif self.metalMinds[metal] <= 0 and self.feruchemyFlags[metal] > 0:
-                self.feruchemyFlags[metal] = 0
-
-        self.changeAttributes()
-        self.metalMinds["iron"] += int(self.baseMass - self.mass)
-        self.metalMinds["steel"] += int(self.baseMoveSpeedLimit -
-                                        self.moveSpeedLimit)
-
-        # Sanity check all metalmind values
-        self.limitFeruchemy()
+        """Advances feruchemy by a tick, for every feruchemist sharing this player's FeruchemyEngine
+        """
+        self.feruchemy.step()
 
     def update(self):
-        # Check if player is airborne and ensure flag is set correctly
-        self.isAirborne = False if self.rect.y >= self.screenHeight - self.height else True
-
-        # Apply various forces
-
-        self.addFriction()
-        self.applyForce()
-        self.applyGravity()
+        # Forces, gravity and the ground are handled for every body by PhysicsWorld.step, and feruchemy for every
+        # feruchemist by FeruchemyEngine.step
+        self.syncRect()
         self.clampVelocity()
-        self.updatePosition()
-
-        self.stopFallingAtGround()
-
-        screen_rect = pygame.Rect(0, 0, self.screenWidth, self.screenHeight)
-        # self.rect.clamp_ip(screen_rect)
-
-        # Do feruchemy updates
-        self.updateFeruchemy()
-
-        # if self.netForceThisFrame.all() != np.array([0.0, 0.0]).all():
-        # print(self.netForceThisFrame)
-
-        # Clear force this frame
-        self.netForceThisFrame *= 0
 
     def isPushPulling(self):
         return self.aSteel or self.aIron
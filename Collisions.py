@@ -0,0 +1,227 @@
+import numpy as np
+import numpy.typing as npt
+
+# Bodies too large for the broadphase grid are paired with each other directly once there are no more than this many
+LARGE_PAIR_CAP = 32
+
+
+def rangePairs(owners: npt.NDArray, starts: npt.NDArray, ends: npt.NDArray):
+    """Returns each owner paired with every index in its range, from starts up to but not including ends
+    """
+    counts = np.maximum(ends - starts, 0)
+    total = counts.sum()
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(owners, counts), np.repeat(starts, counts) + offsets
+
+
+class CollisionSystem:
+    """Resolves collisions between every pair of bodies in a physics world. A uniform grid broadphase finds the pairs
+    of bodies close enough to touch, an AABB test keeps the ones that actually overlap, and impulses along the axis of
+    least penetration push them apart. Anchored bodies have infinite mass.
+
+    Contacts are resolved all at once rather than one after another, so each body's share of the impulses and
+    corrections is averaged over its contacts to keep piles stable.
+    """
+
+    def __init__(self, restitution=0.2, iterations=4, correctionPercent=0.8, slop=0.5, restingSpeed=1.5,
+                 wakeSpeed=3.0):
+        self.restitution = restitution
+        self.restingSpeed = restingSpeed  # Slower impacts do not bounce, so resting bodies settle instead of hopping
+        # Slower contacts leave sleeping bodies where they are. Well above a tick of gravity, so bodies settling onto
+        # sleeping ones come to rest on them
+        self.wakeSpeed = wakeSpeed
+        self.iterations = iterations
+        self.correctionPercent = correctionPercent  # Fraction of any remaining overlap removed per iteration
+        self.slop = slop  # Overlap allowed without positional correction, stops resting contacts jittering
+
+    def broadphase(self, position: npt.NDArray, size: npt.NDArray):
+        """Returns two index arrays of the pairs of bodies close enough that they might overlap
+
+        Bodies are bucketed into a grid with cells as large as the 95th percentile body, so typical bodies can only
+        overlap bodies in neighbouring cells. The few bodies larger than a cell, such as the player among coins, are
+        looked up in every cell their box covers, and paired with each other by a coarser grid built the same way over
+        just them. Once there are no more than LARGE_PAIR_CAP of them left they are paired with each other directly.
+
+        Args:
+            position (NDArray): (N,2) top-left corners
+            size (NDArray): (N,2) widths and heights
+        """
+        n = len(position)
+        empty = np.zeros(0, dtype=np.intp)
+        if n < 2:
+            return empty, empty
+        extents = size.max(axis=1)
+        cellSize = max(np.percentile(extents, 95), 1.0)
+        large = np.flatnonzero(extents > cellSize)
+
+        cells = np.floor(position / cellSize).astype(np.int64)
+        keys = (cells[:, 0] << 32) + cells[:, 1]
+        keys[large] = np.iinfo(np.int64).max  # Kept out of every cell, they are handled below
+        order = np.argsort(keys, kind="stable")
+        gridded = n - len(large)
+        sortedKeys = keys[order[:gridded]]
+
+        firsts, seconds = [], []
+        # Half of the neighbourhood is enough as every pair is found from one side
+        for dx, dy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+            neighbourKeys = sortedKeys + (dx << 32) + dy
+            if dx == 0 and dy == 0:
+                # Bodies in the same cell pair with the ones after them
+                starts = np.arange(1, gridded + 1)
+            else:
+                starts = np.searchsorted(sortedKeys, neighbourKeys, side="left")
+            ends = np.searchsorted(sortedKeys, neighbourKeys, side="right")
+            first, second = rangePairs(np.arange(gridded), starts, ends)
+            firsts.append(order[first])
+            seconds.append(order[second])
+
+        if len(large):
+            # A gridded body's box reaches at most one cell past the cell of its top-left corner, so it can only overlap
+            # a large body if that corner is in a cell from one before the large body's first cell up to its last
+            lastCells = np.floor((position[large] + size[large]) / cellSize).astype(np.int64)
+            firstCells = cells[large] - 1
+            columns = lastCells[:, 0] - firstCells[:, 0] + 1
+            owners = np.repeat(np.arange(len(large)), columns)
+            column = np.repeat(firstCells[:, 0], columns) + np.arange(columns.sum()) - np.repeat(
+                np.cumsum(columns) - columns, columns)
+
+            # The cells of one column are next to each other in key order, so each column is a single range
+            starts = np.searchsorted(sortedKeys, (column << 32) + firstCells[owners, 1], side="left")
+            ends = np.searchsorted(sortedKeys, (column << 32) + lastCells[owners, 1], side="right")
+            first, second = rangePairs(owners, starts, ends)
+            firsts.append(large[first])
+            seconds.append(order[second])
+
+            if len(large) <= LARGE_PAIR_CAP:
+                first, second = np.triu_indices(len(large), 1)
+            else:
+                first, second = self.broadphase(position[large], size[large])
+            firsts.append(large[first])
+            seconds.append(large[second])
+
+        return np.concatenate(firsts), np.concatenate(seconds)
+
+    def nearAwake(self, world, awake: npt.NDArray) -> npt.NDArray:
+        """Returns the awake bodies and the sleeping bodies that could be touching one of them, in world order
+
+        Bodies are bucketed by their top-left corner into cells as large as the largest awake body, so a sleeping body
+        no larger than that can only touch an awake one in the same or a neighbouring cell. Larger sleeping bodies are
+        always included.
+        """
+        n = world.count
+        position = world.position[:n]
+        extents = world.size[:n].max(axis=1)
+        cellSize = max(extents[awake].max(), 1.0) if len(awake) else 1.0
+        sleeping = np.flatnonzero(world.asleep[:n])
+
+        cells = np.floor(position[awake] / cellSize).astype(np.int64)
+        offsets = np.array([(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)])
+        neighbourhood = (cells[None, :, :] + offsets[:, None, :]).reshape(-1, 2)
+        awakeKeys = np.unique((neighbourhood[:, 0] << 32) + neighbourhood[:, 1])
+
+        cells = np.floor(position[sleeping] / cellSize).astype(np.int64)
+        near = np.isin((cells[:, 0] << 32) + cells[:, 1], awakeKeys) | (extents[sleeping] > cellSize)
+        return np.union1d(awake, sleeping[near])
+
+    def resolve(self, world, awake: npt.NDArray = None):
+        """Finds and resolves collisions in the world, changing positions and velocities in place. Bodies resting on top
+        of another are marked as supported so they count as being on the ground.
+
+        Args:
+            world (PhysicsWorld): world to resolve
+            awake (NDArray, optional): rows of the awake bodies when some are asleep. Only collisions involving an awake
+                body are resolved. Defaults to None, meaning every body.
+
+        Returns:
+            the rows of the bodies that took part, a slice when every body did
+        """
+        n = world.count
+        if awake is None:
+            rows = slice(0, n)
+            position = world.position[:n]
+            velocity = world.velocity[:n]
+        else:
+            rows = self.nearAwake(world, awake)
+            position = world.position[rows]
+            velocity = world.velocity[rows]
+
+        supported = np.zeros(len(position), dtype=bool)
+        if len(position) >= 2:
+            size = world.size[rows]
+            floor = world.bounds[rows, 1] - size[:, 1]
+            inverseMass = np.where(world.anchored[rows], 0.0, 1.0 / world.mass[rows])
+            self.resolveBodies(position, velocity, size, floor, inverseMass, supported, world.asleep[rows])
+
+        if awake is not None:
+            world.position[rows] = position
+            world.velocity[rows] = velocity
+        world.supported[rows] = supported
+        return rows
+
+    def resolveBodies(self, position: npt.NDArray, velocity: npt.NDArray, size: npt.NDArray, floor: npt.NDArray,
+                      inverseMass: npt.NDArray, supported: npt.NDArray, asleep: npt.NDArray):
+        """Resolves every collision between a set of bodies, changing their positions and velocities and marking the
+        supported ones in place. Two sleeping bodies were at rest against each other when they fell asleep, so pairs of
+        them are left alone, and a sleeping body only moves for contacts fast enough to wake it.
+        """
+        n = len(position)
+        a, b = self.broadphase(position, size)
+        moving = ((inverseMass[a] + inverseMass[b]) > 0) & ~(asleep[a] & asleep[b])
+        a, b = a[moving], b[moving]
+        sizeA, sizeB = size[a], size[b]
+
+        for _ in range(self.iterations):
+            # Narrowphase, the overlap of each pair's boxes along each axis
+            positionA, positionB = position[a], position[b]
+            overlap = np.minimum(positionA + sizeA, positionB + sizeB) - np.maximum(positionA, positionB)
+            touching = (overlap > 0).all(axis=1)
+            if not touching.any():
+                return
+
+            # Later iterations only revisit pairs that were touching, corrections are too small to create new contacts
+            a, b, sizeA, sizeB = a[touching], b[touching], sizeA[touching], sizeB[touching]
+            pa, pb, overlap = a, b, overlap[touching]
+            rows = np.arange(len(pa))
+
+            # Separate along the axis of least penetration, pointing from a to b
+            axis = (overlap[:, 1] < overlap[:, 0]).astype(np.intp)
+            penetration = overlap[rows, axis]
+            centreDifference = (positionB[touching] + sizeB / 2) - (positionA[touching] + sizeA / 2)
+            sign = np.where(centreDifference[rows, axis] < 0, -1.0, 1.0)
+
+            # A sleeping body holds still against contacts too gentle to wake it, as if it were anchored, so that a
+            # body settling onto it comes to rest rather than sharing every impulse with it
+            normalSpeed = (velocity[pb, axis] - velocity[pa, axis]) * sign
+            gentle = normalSpeed >= -self.wakeSpeed
+            inverseMassA = np.where(asleep[pa] & gentle, 0.0, inverseMass[pa])
+            inverseMassB = np.where(asleep[pb] & gentle, 0.0, inverseMass[pb])
+
+            totalInverseMass = inverseMassA + inverseMassB
+            totalInverseMass[totalInverseMass == 0] = np.inf  # Between an anchored and a sleeping body, nothing moves
+            contacts = np.bincount(pa, minlength=n) + np.bincount(pb, minlength=n)
+            shareA = inverseMassA / contacts[pa]
+            shareB = inverseMassB / contacts[pb]
+
+            # Impulse along the normal for pairs moving towards each other
+            restitution = np.where(normalSpeed < -self.restingSpeed, self.restitution, 0.0)
+            impulse = np.where(normalSpeed < 0, -(1 + restitution) * normalSpeed / totalInverseMass, 0.0) * sign
+
+            # Push overlapping bodies apart in proportion to their inverse masses
+            correction = np.maximum(penetration - self.slop, 0) / totalInverseMass * self.correctionPercent * sign
+
+            # Scatter both back onto the bodies, one axis at a time
+            for component in (0, 1):
+                along = axis == component
+                ia, ib = pa[along], pb[along]
+                velocity[:, component] += (np.bincount(ib, impulse[along] * shareB[along], n) -
+                                           np.bincount(ia, impulse[along] * shareA[along], n))
+                position[:, component] += (np.bincount(ib, correction[along] * shareB[along], n) -
+                                           np.bincount(ia, correction[along] * shareA[along], n))
+
+            # Corrections must not push bodies through the floor, where they would be snapped back into the pile
+            np.minimum(position[:, 1], floor, out=position[:, 1])
+
+            # A body is supported when it rests on top of another, screen y points down so b is above a when sign < 0
+            vertical = axis == 1
+            supported[pb[vertical & (sign < 0)]] = True
+            supported[pa[vertical & (sign > 0)]] = True
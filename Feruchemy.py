@@ -0,0 +1,119 @@
+import numpy as np
+import numpy.typing as npt
+
+FERUCHEMICAL_METALS = ["steel", "iron", "pewter", "gold", "brass", "chromium"]
+METAL_INDICES = {metal: i for i, metal in enumerate(FERUCHEMICAL_METALS)}
+
+# Stages run from -MAX_STAGE to MAX_STAGE. Negative stages fill a metalmind by lowering an attribute, positive stages
+# tap it to raise the attribute, and stage 0 leaves the metalmind alone.
+MAX_STAGE = 3
+
+# Multiplier on an attribute's base value at each stage, indexed by stage + MAX_STAGE
+STAGE_MULTIPLIERS = np.array([0.25, 0.5, 0.75, 1, 2, 3, 10])
+
+# Attributes each metal scales. The first is the stored one, its difference from the base value is added to the
+# metalmind every tick. Metals missing from here have no effect yet.
+METAL_ATTRIBUTES = {
+    "iron": ("mass",),
+    "steel": ("moveSpeedLimit", "acceleration", "deceleration"),
+}
+
+ATTRIBUTES = [name for names in METAL_ATTRIBUTES.values() for name in names]
+
+
+class FeruchemyEngine:
+    """Feruchemy for any number of feruchemists, each a row of arrays of stages and metalmind fill levels. Attributes are
+    looked up from STAGE_MULTIPLIERS only for feruchemists whose stages changed, and every metalmind is filled or
+    drained in one array operation per tick.
+
+    Each feruchemist may have an owner, such as a PlayerSprite, whose attributes are set whenever they change.
+    """
+
+    def __init__(self, capacity=5000):
+        self.capacity = capacity  # Most a metalmind can hold
+        self.owners = []
+
+        metals = len(FERUCHEMICAL_METALS)
+        self.stages = np.zeros((0, metals), dtype=np.int64)
+        self.metalMinds = np.zeros((0, metals), dtype=np.int64)
+        self.storeRates = np.zeros((0, metals), dtype=np.int64)  # Added to each metalmind every tick
+        self.base = {name: np.zeros(0) for name in ATTRIBUTES}
+        self.attributes = {name: np.zeros(0) for name in ATTRIBUTES}
+        self.changed = np.zeros(0, dtype=bool)  # Stages changed since attributes were last looked up
+
+    @property
+    def count(self):
+        return len(self.owners)
+
+    def add(self, owner, **base) -> int:
+        """Adds a feruchemist at stage 0 with empty metalminds and returns its row
+
+        Args:
+            owner: object to set attributes on when they change, or None
+            **base: base value of every attribute in ATTRIBUTES
+        """
+        row = self.count
+        self.owners.append(owner)
+        empty = np.zeros((1, len(FERUCHEMICAL_METALS)), dtype=np.int64)
+        self.stages = np.concatenate((self.stages, empty))
+        self.metalMinds = np.concatenate((self.metalMinds, empty))
+        self.storeRates = np.concatenate((self.storeRates, empty))
+        for name in ATTRIBUTES:
+            self.base[name] = np.append(self.base[name], base[name])
+            self.attributes[name] = np.append(self.attributes[name], base[name])
+        self.changed = np.append(self.changed, True)
+        return row
+
+    def changeStage(self, row, metal, change):
+        """Moves a feruchemist's stage for one metal by change, keeping it within -MAX_STAGE to MAX_STAGE
+        """
+        if metal not in METAL_INDICES:
+            raise Exception(
+                "Passed metal not in available feruchemical metals")
+        column = METAL_INDICES[metal]
+        self.stages[row, column] = min(max(self.stages[row, column] + change, -MAX_STAGE), MAX_STAGE)
+        self.changed[row] = True
+
+    def step(self):
+        """Advances every feruchemist by one tick
+        """
+        stages = self.stages
+        metalMinds = self.metalMinds
+
+        # Stop filling full metalminds and tapping empty ones
+        stopped = ((metalMinds >= self.capacity) & (stages < 0)) | ((metalMinds <= 0) & (stages > 0))
+        if stopped.any():
+            stages[stopped] = 0
+            self.changed |= stopped.any(axis=1)
+
+        if self.changed.any():
+            self.applyStages(np.flatnonzero(self.changed))
+            self.changed[:] = False
+
+        metalMinds += self.storeRates
+        np.clip(metalMinds, 0, self.capacity, out=metalMinds)
+
+    def applyStages(self, rows: npt.NDArray):
+        """Looks up the attributes and metalmind store rates of some feruchemists from their stages, and passes the new
+        attributes on to their owners
+        """
+        multipliers = STAGE_MULTIPLIERS[self.stages[rows] + MAX_STAGE]
+        for metal, names in METAL_ATTRIBUTES.items():
+            column = METAL_INDICES[metal]
+            for name in names:
+                self.attributes[name][rows] = self.base[name][rows] * multipliers[:, column]
+            # Truncated towards zero, as the metalminds hold whole units
+            stored = names[0]
+            self.storeRates[rows, column] = (self.base[stored][rows] - self.attributes[stored][rows]).astype(np.int64)
+
+        for row in rows.tolist():
+            owner = self.owners[row]
+            if owner is not None:
+                for name in ATTRIBUTES:
+                    setattr(owner, name, self.attributes[name][row].item())
+
+    def stagesOf(self, row) -> dict:
+        return dict(zip(FERUCHEMICAL_METALS, self.stages[row].tolist()))
+
+    def metalMindsOf(self, row) -> dict:
+        return dict(zip(FERUCHEMICAL_METALS, self.metalMinds[row].tolist()))
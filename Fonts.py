@@ -0,0 +1,65 @@
+import json
+import os
+import pygame
+import pygame.font
+
+# Where the paths of system fonts are kept between runs. Delete it to have every font looked up again.
+FONT_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "hemalurgist", "fonts.json")
+
+# Font bundled with pygame, used in place of system fonts that are not installed
+DEFAULT_FONT_PATH = os.path.join(os.path.dirname(pygame.__file__), pygame.font.get_default_font())
+
+# Path of each system font looked up so far, or of the default font for fonts that are not installed. Loaded from
+# FONT_CACHE_FILE the first time a font is looked up.
+fontPaths = None
+
+# Fonts created so far, by name and size
+fonts = {}
+
+
+def loadFontPaths() -> dict:
+    try:
+        with open(FONT_CACHE_FILE) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def saveFontPaths(paths: dict):
+    try:
+        os.makedirs(os.path.dirname(FONT_CACHE_FILE), exist_ok=True)
+        with open(FONT_CACHE_FILE, "w") as file:
+            json.dump(paths, file, indent=1)
+    except OSError:
+        pass  # Only later runs are slower without the cache
+
+
+def fontPath(name):
+    """Returns the path of a system font, or of the default font bundled with pygame when it is not installed, as
+    pygame.font.SysFont falls back to. Finding a font the first time scans every system font directory, which can take
+    seconds, so the result is saved to FONT_CACHE_FILE and reused by later runs for as long as the file it points to
+    exists.
+    """
+    global fontPaths
+    if fontPaths is None:
+        fontPaths = loadFontPaths()
+    if name in fontPaths:
+        path = fontPaths[name]
+        if path is not None and os.path.exists(path):
+            return path
+
+    path = fontPaths[name] = pygame.font.match_font(name) or DEFAULT_FONT_PATH
+    saveFontPaths(fontPaths)
+    return path
+
+
+def font(name, size) -> pygame.font.Font:
+    """Returns a system font at a size, created the first time it is asked for
+    """
+    key = (name, size)
+    cached = fonts.get(key)
+    if cached is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        cached = fonts[key] = pygame.font.Font(fontPath(name), size)
+    return cached
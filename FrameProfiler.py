@@ -0,0 +1,132 @@
+import time
+import numpy as np
+import numpy.typing as npt
+import pygame
+import pygame.draw
+
+# Stages of the game loop, in the order they happen
+PHASES = ["events", "movement", "doAllomancy", "update", "draw", "aimingCone", "targetLines", "overlay", "flip"]
+
+PHASE_COLOURS = [(200, 200, 200), (255, 255, 0), (255, 120, 0), (255, 0, 0), (0, 200, 0), (0, 200, 255),
+                 (100, 100, 255), (200, 0, 255), (120, 120, 120)]
+
+
+class FrameProfiler:
+    """Records the wall time of each stage of the game loop into a fixed-size ring buffer of frames. Stages are timed
+    by calling mark(phase) as each one finishes, which costs a single perf_counter call.
+    """
+
+    def __init__(self, phases=PHASES, capacity=600):
+        self.phases = list(phases)
+        self.phaseIndices = {phase: i for i, phase in enumerate(self.phases)}
+        self.times = np.zeros((capacity, len(self.phases)))  # Seconds spent in each phase, one row per frame
+        self.frameCount = 0
+
+        self.current = np.zeros(len(self.phases))
+        self.lastMark = time.perf_counter()
+
+        # Overlay state, the graph is scrolled one column per frame rather than redrawn
+        self.showOverlay = False
+        self.graphSurface = None
+        self.graphMilliseconds = 33  # Frame time shown by the full height of the graph
+        self.statsSurfaces = []
+        self.statsAge = 0
+
+    @property
+    def capacity(self):
+        return len(self.times)
+
+    def beginFrame(self):
+        self.current[:] = 0
+        self.lastMark = time.perf_counter()
+
+    def mark(self, phase):
+        """Attributes the time since the last mark to phase
+        """
+        now = time.perf_counter()
+        self.current[self.phaseIndices[phase]] += now - self.lastMark
+        self.lastMark = now
+
+    def endFrame(self):
+        self.times[self.frameCount % self.capacity] = self.current
+        self.frameCount += 1
+        if self.graphSurface is not None:
+            self.addGraphColumn(self.current)
+
+    def recorded(self) -> npt.NDArray:
+        """Returns the recorded frames, oldest first, in milliseconds
+        """
+        if self.frameCount <= self.capacity:
+            return self.times[:self.frameCount] * 1000
+        start = self.frameCount % self.capacity
+        return np.concatenate((self.times[start:], self.times[:start])) * 1000
+
+    def percentiles(self, q=(50, 95, 99)) -> npt.NDArray:
+        """Returns an array of shape (len(q), phases) of percentiles of each phase's time in milliseconds
+        """
+        recorded = self.recorded()
+        if len(recorded) == 0:
+            return np.zeros((len(q), len(self.phases)))
+        return np.percentile(recorded, q, axis=0)
+
+    def dump(self, path=None) -> str:
+        """Writes the recorded frames to a CSV file, one row per frame and one column per phase, and returns its path
+        """
+        if path is None:
+            path = time.strftime("frame_profile_%Y%m%d_%H%M%S.csv")
+        np.savetxt(path, self.recorded(), fmt="%.4f", delimiter=",", header=",".join(self.phases), comments="")
+        return path
+
+    def handleEvent(self, event):
+        """F3 toggles the overlay, F4 dumps the buffer to disk
+        """
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_F3:
+                self.showOverlay = not self.showOverlay
+            elif event.key == pygame.K_F4:
+                print("frame profile written to " + self.dump())
+
+    def addGraphColumn(self, frameTimes):
+        """Scrolls the graph left by a pixel and draws the newest frame as a stacked column on the right
+        """
+        graph = self.graphSurface
+        width, height = graph.get_size()
+        graph.scroll(-1, 0)
+        pygame.draw.line(graph, (0, 0, 0, 160), (width - 1, 0), (width - 1, height))
+
+        scale = height / self.graphMilliseconds
+        bottom = height
+        for phaseTime, colour in zip(frameTimes * 1000, PHASE_COLOURS):
+            top = bottom - phaseTime * scale
+            if int(bottom) > int(top):
+                pygame.draw.line(graph, colour, (width - 1, int(top)), (width - 1, int(bottom) - 1))
+            bottom = top
+
+        # Mark the 60fps budget
+        budget = height - 1000 / 60 * scale
+        graph.set_at((width - 1, int(budget)), (255, 255, 255))
+
+    def drawOverlay(self, screen: pygame.Surface, font: pygame.font.Font, topleft=(5, 30), size=(300, 120)):
+        """Draws a stacked frame time graph of recent frames and a p50/p95/p99 table per phase
+        """
+        if not self.showOverlay:
+            return
+        if self.graphSurface is None or self.graphSurface.get_size() != size:
+            self.graphSurface = pygame.Surface(size, pygame.SRCALPHA)
+            self.graphSurface.fill((0, 0, 0, 160))
+        screen.blit(self.graphSurface, topleft)
+
+        # Percentiles are only recomputed and re-rendered twice a second
+        self.statsAge -= 1
+        if self.statsAge <= 0:
+            self.statsAge = 30
+            stats = self.percentiles()
+            lines = ["phase          p50    p95    p99"] + [
+                f"{phase:<12} {p50:6.2f} {p95:6.2f} {p99:6.2f}" for phase, p50, p95, p99 in zip(self.phases, *stats)]
+            self.statsSurfaces = [font.render(line, True, colour)
+                                  for line, colour in zip(lines, [(255, 255, 255)] + PHASE_COLOURS)]
+
+        x, y = topleft[0], topleft[1] + size[1] + 5
+        for surface in self.statsSurfaces:
+            screen.blit(surface, (x, y))
+            y += surface.get_height()
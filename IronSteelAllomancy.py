@@ -3,8 +3,11 @@ from dataclasses import dataclass
 
 @dataclass
 class IronSteelAllomancy:
+    """Constants of the iron and steel force law. Every physics world holds its own instance, so simulations with
+    different constants can run side by side.
+    """
     chargePower: float = 1/8
     wallOcclusionFactor: float = 3/4
-    distanceConstant = 100  # Lower values mean faster allomantic force falloff with distance
-    allomanticConstant = 100
-    velocityConstant = 100
+    distanceConstant: float = 100  # Lower values mean faster allomantic force falloff with distance
+    allomanticConstant: float = 100
+    velocityConstant: float = 100
@@ -0,0 +1,84 @@
+"""Level files store the objects of a level as typed columns in a NumPy .npz archive, one array per property with a row
+per object, so a level of any size is read with a handful of array loads and added to a simulation in bulk.
+"""
+import numpy as np
+import numpy.typing as npt
+from Simulation import Simulation
+
+LEVEL_VERSION = 1
+
+# Name, dtype and shape of each row of every column in a level file
+LEVEL_COLUMNS = {
+    "position": (np.float64, (2,)),  # Top-left corner
+    "size": (np.float64, (2,)),
+    "mass": (np.float64, ()),
+    "metallic": (np.bool_, ()),
+    "anchored": (np.bool_, ()),
+}
+
+
+def writeLevel(path, position: npt.NDArray, size: npt.NDArray, mass: npt.NDArray, metallic: npt.NDArray,
+               anchored: npt.NDArray):
+    """Writes the columns of a level to path
+
+    Args:
+        path (str): file to write, numpy adds .npz if it is missing
+        position (NDArray): (N,2) top-left corners
+        size (NDArray): (N,2) widths and heights
+        mass (NDArray): (N,) masses
+        metallic (NDArray): (N,) whether each object is metal
+        anchored (NDArray): (N,) whether each object is perfectly anchored
+    """
+    columns = {"position": position, "size": size, "mass": mass, "metallic": metallic, "anchored": anchored}
+    count = len(position)
+    arrays = {}
+    for name, (dtype, shape) in LEVEL_COLUMNS.items():
+        column = np.asarray(columns[name], dtype=dtype)
+        if column.shape != (count,) + shape:
+            raise ValueError(f"level column {name} has shape {column.shape}, expected {(count,) + shape}")
+        arrays[name] = column
+    np.savez(path, version=np.array(LEVEL_VERSION), **arrays)
+
+
+def readLevel(path) -> dict:
+    """Returns the columns of the level file at path as a dictionary of arrays
+    """
+    with np.load(path) as archive:
+        version = int(archive["version"])
+        if version != LEVEL_VERSION:
+            raise ValueError(f"{path} is a version {version} level, only version {LEVEL_VERSION} can be read")
+        return {name: archive[name] for name in LEVEL_COLUMNS}
+
+
+def levelColumns(simulation: Simulation) -> dict:
+    """Returns the level columns of every body in a simulation other than the player
+    """
+    world = simulation.world
+    rows = np.arange(world.count)
+    rows = rows[rows != simulation.playerSprite.index]
+    columns = {"position": world.position[rows], "size": world.size[rows], "mass": world.mass[rows],
+               "metallic": world.metallic[rows], "anchored": world.anchored[rows]}
+
+    # Bodies frozen in distant chunks are part of the level too
+    if simulation.chunks is not None:
+        frozen = list(simulation.chunks.frozen.values())
+        columns = {name: np.concatenate([column] + [chunk[name] for chunk in frozen])
+                   for name, column in columns.items()}
+    return columns
+
+
+def saveLevel(path, simulation: Simulation):
+    """Writes every body in a simulation other than the player to a level file
+    """
+    writeLevel(path, **levelColumns(simulation))
+
+
+def loadLevel(path, simulation: Simulation) -> npt.NDArray:
+    """Adds the objects in a level file to a simulation and returns their world indices. The objects are added in bulk
+    without sprites, see Simulation.addObjects. When the simulation streams chunks only the objects near the player are
+    added to the world straight away, the rest are frozen in their chunks.
+    """
+    level = readLevel(path)
+    target = simulation.chunks if simulation.chunks is not None else simulation
+    return target.addObjects(level["position"], level["size"], level["mass"], level["metallic"],
+                                 level["anchored"])
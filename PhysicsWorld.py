@@ -0,0 +1,323 @@
+import hashlib
+import numpy as np
+import numpy.typing as npt
+from IronSteelAllomancy import IronSteelAllomancy
+
+GRAVITYCONSTANT = 1
+
+
+class PhysicsWorld:
+    """Holds the physical state of every body in contiguous arrays so that all bodies can be integrated in a single
+    vectorised step. Each Entity owns one row of these arrays and reads/writes its state through it.
+
+    Positions are the float top-left corner of each body (the same point as rect.x/rect.y), so sub-pixel motion is no
+    longer lost by truncating into the sprite rects every frame.
+    """
+
+    def __init__(self, capacity=64, allomancy: IronSteelAllomancy = None):
+        self.count = 0
+        self.entities = []  # The entity viewing each row, None for bodies added in bulk that have not needed one yet
+
+        self.position = np.zeros((capacity, 2))
+        self.previousPosition = np.zeros((capacity, 2))  # Position before the last step, for render interpolation
+        self.velocity = np.zeros((capacity, 2))
+        self.netForce = np.zeros((capacity, 2))
+        self.size = np.zeros((capacity, 2))
+        self.mass = np.ones(capacity)
+        self.frictionCoeff = np.full(capacity, 0.1)
+        self.dragCoeff = np.full(capacity, 0.1)
+        self.anchored = np.zeros(capacity, dtype=bool)
+        self.airborne = np.zeros(capacity, dtype=bool)
+
+        # Per-body behaviour that used to live in the separate Object/PlayerSprite update methods
+        self.bounds = np.zeros((capacity, 2))  # Width/height of the area the body lives in, floor is at bounds[1]
+        self.clampToBounds = np.zeros(capacity, dtype=bool)  # Objects are kept on screen, the player is not
+        self.detectAirborne = np.zeros(capacity, dtype=bool)  # Recompute the airborne flag from the floor each step
+        self.velocityLimit = np.full((capacity, 2), np.inf)
+        self.supported = np.zeros(capacity, dtype=bool)  # Resting on top of another body, which counts as the ground
+
+        # Sleeping bodies are skipped by step until something wakes them
+        self.asleep = np.zeros(capacity, dtype=bool)
+        self.restingTicks = np.zeros(capacity, dtype=np.int64)  # Consecutive ticks spent slow with little force on it
+        self.canSleep = np.ones(capacity, dtype=bool)
+
+        # Allomantic properties
+        self.charge = np.zeros(capacity)
+        self.metallic = np.zeros(capacity, dtype=bool)
+        self.lastWasPushed = np.zeros(capacity, dtype=bool)
+
+        # Rows past count always hold the state of a new body, so adding a body only writes what differs from it
+        self._defaults = {name: value[0].copy() for name, value in vars(self).items() if isinstance(value, np.ndarray)}
+
+        # Bodies slower than sleepSpeed with less than sleepForce on them for sleepTicks ticks in a row fall asleep
+        self.sleepSpeed = 0.05
+        self.sleepForce = 0.05
+        self.sleepTicks = 30
+
+        # Constants of the allomantic force law between bodies in this world
+        self.allomancy = allomancy if allomancy is not None else IronSteelAllomancy()
+
+        # Optional spatial index (such as a SpatialGrid) kept up to date after every step
+        self.spatialIndex = None
+
+        # Optional collision system (such as a CollisionSystem) run after bodies move each step
+        self.collisions = None
+
+        # Optional static level geometry (such as a TileMap) whose walls occlude allomantic forces
+        self.tileMap = None
+
+    def _grow(self, minimumCapacity):
+        """Reallocates every array so that it can hold at least minimumCapacity rows. Any row views held outside of the
+        world are invalidated by this, which is why entities never cache their rows.
+        """
+        capacity = max(minimumCapacity, 2 * len(self.mass))
+        for name, value in vars(self).items():
+            if isinstance(value, np.ndarray):
+                grown = np.empty((capacity,) + value.shape[1:], dtype=value.dtype)
+                grown[:self.count] = value[:self.count]
+                grown[self.count:] = self._defaults[name]
+                setattr(self, name, grown)
+
+    def addBody(self, entity, x, y, width, height, boundsWidth, boundsHeight, mass=1.0, perfectlyAnchored=False):
+        """Appends a body to the world and returns the index of its row
+
+        Args:
+            entity (Entity): the sprite that views this row, or None
+            x (float): x coordinate of the top-left corner
+            y (float): y coordinate of the top-left corner
+            width (float): width of the body
+            height (float): height of the body
+            boundsWidth (float): width of the area the body is confined to
+            boundsHeight (float): height of the area the body is confined to, also the floor
+            mass (float, optional): Defaults to 1.0.
+            perfectlyAnchored (bool, optional): anchored bodies ignore all forces. Defaults to False.
+        """
+        if self.count == len(self.mass):
+            self._grow(self.count + 1)
+
+        index = self.count
+        self.count += 1
+        self.entities.append(entity)
+
+        self.position[index] = (x, y)
+        self.previousPosition[index] = (x, y)
+        self.size[index] = (width, height)
+        self.mass[index] = mass
+        self.anchored[index] = perfectlyAnchored
+        self.bounds[index] = (boundsWidth, boundsHeight)
+        return index
+
+    def addBodies(self, position: npt.NDArray, size: npt.NDArray, boundsWidth, boundsHeight, mass=1.0,
+                  perfectlyAnchored=False) -> npt.NDArray:
+        """Appends many bodies at once without entities, and returns the indices of their rows. Entities can be attached
+        to the rows later by setting world.entities[index].
+
+        Args:
+            position (NDArray): (N,2) top-left corners
+            size (NDArray): (N,2) widths and heights
+            boundsWidth (float): width of the area the bodies are confined to
+            boundsHeight (float): height of the area the bodies are confined to, also the floor
+            mass (float or NDArray, optional): Defaults to 1.0.
+            perfectlyAnchored (bool or NDArray, optional): anchored bodies ignore all forces. Defaults to False.
+        """
+        count = len(position)
+        if self.count + count > len(self.mass):
+            self._grow(self.count + count)
+
+        rows = slice(self.count, self.count + count)
+        self.count += count
+        self.entities.extend([None] * count)
+
+        self.position[rows] = position
+        self.previousPosition[rows] = position
+        self.size[rows] = size
+        self.mass[rows] = mass
+        self.anchored[rows] = perfectlyAnchored
+        self.bounds[rows] = (boundsWidth, boundsHeight)
+        return np.arange(rows.start, rows.stop)
+
+    def removeBodies(self, indices: npt.NDArray) -> npt.NDArray:
+        """Removes many bodies at once, keeping the rest contiguous and in the same order, and returns the new row of
+        every old row, or -1 for the removed ones. Anything holding rows outside of the world has to be remapped with it.
+        """
+        n = self.count
+        if self.collisions is not None:
+            self.wakeTouching(indices)
+        keep = np.ones(n, dtype=bool)
+        keep[indices] = False
+        remaining = int(keep.sum())
+        remap = np.full(n, -1, dtype=np.intp)
+        remap[keep] = np.arange(remaining)
+
+        for name, value in vars(self).items():
+            if isinstance(value, np.ndarray):
+                value[:remaining] = value[:n][keep]
+                value[remaining:n] = self._defaults[name]
+        self.entities = [entity for entity, kept in zip(self.entities, keep.tolist()) if kept]
+        for index, entity in enumerate(self.entities):
+            if entity is not None:
+                entity.index = index
+        self.count = remaining
+
+        if self.spatialIndex is not None:
+            self.spatialIndex.removeBodies()
+        if self.tileMap is not None:
+            self.tileMap.anchorCache.clear()
+        return remap
+
+    def centres(self) -> npt.NDArray:
+        """Returns an (N,2) array of the centre of mass of every body
+        """
+        return self.position[:self.count] + self.size[:self.count] / 2
+
+    def interpolatedPositions(self, alpha=1.0) -> npt.NDArray:
+        """Returns the position of every body a fraction alpha of the way from its previous position to its current one
+        """
+        previous = self.previousPosition[:self.count]
+        if alpha == 1.0:
+            return self.position[:self.count]
+        return previous + (self.position[:self.count] - previous) * alpha
+
+    def syncRects(self, alpha=1.0):
+        """Moves the rect of every entity to the rounded position of its body. Only needed before drawing, so headless
+        simulations can skip it.
+
+        Args:
+            alpha (float, optional): how far between the previous and current step to place the rects. Defaults to 1.0.
+        """
+        rounded = np.rint(self.interpolatedPositions(alpha)).astype(int).tolist()
+        for entity, topleft in zip(self.entities, rounded):
+            if entity is not None:
+                entity.rect.topleft = topleft
+
+    def stateHash(self) -> str:
+        """Returns a hex digest of every body's state, equal for two worlds only if they hold bit-identical arrays
+        """
+        digest = hashlib.sha256()
+        for name, value in sorted(vars(self).items()):
+            if isinstance(value, np.ndarray):
+                digest.update(name.encode())
+                digest.update(np.ascontiguousarray(value[:self.count]).tobytes())
+        return digest.hexdigest()
+
+    def wake(self, indices):
+        """Wakes sleeping bodies so that they are stepped again. Anything that changes a body's motion from outside of
+        the world, other than through an Entity, has to call this.
+        """
+        self.asleep[indices] = False
+        self.restingTicks[indices] = 0
+
+    def wakeTouching(self, indices: npt.NDArray):
+        """Wakes the sleeping bodies touching any of some bodies, such as ones resting on bodies about to be removed
+        """
+        sleeping = np.flatnonzero(self.asleep[:self.count])
+        if len(sleeping) == 0 or len(indices) == 0:
+            return
+        rows = np.union1d(indices, sleeping)
+        involved = np.isin(rows, indices)
+
+        # Boxes grown by a pixel on every side, so bodies resting exactly against each other count as touching
+        position, size = self.position[rows] - 1, self.size[rows] + 2
+        a, b = self.collisions.broadphase(position, size)
+        overlap = np.minimum(position[a] + size[a], position[b] + size[b]) - np.maximum(position[a], position[b])
+        touching = (overlap > 0).all(axis=1) & (involved[a] != involved[b])
+        self.wake(rows[np.concatenate((a[touching], b[touching]))])
+
+    def step(self):
+        """Advances every awake body by one tick. This is the vectorised equivalent of running addFriction, applyForce,
+        applyGravity, clampVelocity, updatePosition and stopFallingAtGround on each sprite in turn.
+
+        Bodies that have stayed slower than sleepSpeed, with less than sleepForce on them, for sleepTicks ticks fall
+        asleep and are skipped until they are woken. Collisions with awake bodies involve the sleeping bodies near
+        them, and any that are set moving wake up.
+        """
+        n = self.count
+        sleeping = self.asleep[:n]
+        rows = np.flatnonzero(~sleeping) if sleeping.any() else slice(0, n)
+        gathered = not isinstance(rows, slice)  # Fancy indexing copies, so the rows have to be written back
+
+        position = self.position[rows]
+        velocity = self.velocity[rows]
+        force = self.netForce[rows]
+        mass = self.mass[rows]
+        free = ~self.anchored[rows]
+        floor = self.bounds[rows, 1] - self.size[rows, 1]
+        self.previousPosition[rows] = position
+
+        airborne = self.airborne[rows]
+        detect = self.detectAirborne[rows]
+        airborne[detect] = (position[detect, 1] < floor[detect]) & ~self.supported[rows][detect]
+
+        # Friction on the ground, only acts horizontally
+        grounded = free & ~airborne
+        force[grounded, 0] -= velocity[grounded, 0] * self.frictionCoeff[rows][grounded] * mass[grounded]
+
+        # Air resistance, proportional to the speed squared and opposite to the direction of motion
+        speed = np.sqrt(np.einsum("ij,ij->i", velocity, velocity))
+        dragged = free & airborne & (np.abs(velocity) > 1e-8).any(axis=1)
+        force[dragged] -= (self.dragCoeff[rows][dragged] * speed[dragged])[:, None] * velocity[dragged]
+
+        # Apply all added forces and gravity to the velocity
+        velocity[free] += force[free] / mass[free, None]
+        velocity[free, 1] += GRAVITYCONSTANT
+        np.clip(velocity, -self.velocityLimit[rows], self.velocityLimit[rows], out=velocity)
+
+        position += velocity
+
+        if gathered:
+            self.position[rows] = position
+            self.velocity[rows] = velocity
+            self.netForce[rows] = force
+            self.airborne[rows] = airborne
+
+        # Collisions may move sleeping bodies too, the rest of the step covers every body they touched
+        if self.collisions is not None:
+            rows = self.collisions.resolve(self, rows if gathered else None)
+            gathered = not isinstance(rows, slice)
+            position = self.position[rows]
+            velocity = self.velocity[rows]
+            floor = self.bounds[rows, 1] - self.size[rows, 1]
+            airborne = self.airborne[rows]
+
+        # Stop falling at the ground
+        landed = position[:, 1] >= floor
+        position[landed, 1] = floor[landed]
+        velocity[landed, 1] = 0
+        airborne[landed] = False
+
+        # Keep clamped bodies inside their bounds
+        clamped = self.clampToBounds[rows]
+        if clamped.any():
+            upper = np.maximum(self.bounds[rows] - self.size[rows], 0)
+            position[clamped] = np.clip(position[clamped], 0, upper[clamped])
+
+        # Count how long each body has been at rest, putting the ones at rest for long enough to sleep and waking
+        # sleeping ones that were set moving
+        calm = ((np.einsum("ij,ij->i", velocity, velocity) < self.sleepSpeed ** 2) &
+                (np.einsum("ij,ij->i", self.netForce[rows], self.netForce[rows]) < self.sleepForce ** 2) &
+                self.canSleep[rows])
+        restingTicks = np.where(calm, self.restingTicks[rows] + 1, 0)
+        asleep = restingTicks >= self.sleepTicks
+        fallingAsleep = asleep & ~self.asleep[rows]
+        velocity[fallingAsleep] = 0.0
+
+        if gathered:
+            self.position[rows] = position
+            self.velocity[rows] = velocity
+            self.airborne[rows] = airborne
+        self.restingTicks[rows] = restingTicks
+        self.asleep[rows] = asleep
+        if fallingAsleep.any():
+            # Sleeping bodies are drawn where they stopped, not interpolated from where they were a tick before
+            sleepers = np.arange(n)[rows][fallingAsleep]
+            self.previousPosition[sleepers] = self.position[sleepers]
+
+        # Clear force this frame
+        self.netForce[rows] = 0.0
+
+        if self.spatialIndex is not None:
+            self.spatialIndex.update(rows if gathered else None)
+
+
+# World used by entities that are not given one explicitly
+defaultWorld = PhysicsWorld()
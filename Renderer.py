@@ -0,0 +1,403 @@
+import numpy as np
+import pygame
+import pygame.draw
+from Classes import objectImage
+from Simulation import Simulation, RenderSnapshot
+from TextCache import HudText
+
+# When more rects than this are damaged in a frame, redrawing the whole screen is cheaper than tracking them
+MAX_DIRTY_RECTS = 200
+
+BACKGROUND_COLOUR = (0, 0, 0)
+WALL_COLOUR = (60, 50, 40)
+
+# Lines to metal in range, and to the metal in the targetting cone
+TARGET_LINE_COLOUR = (100, 100, 255)
+AIMED_LINE_COLOUR = (100, 200, 255)
+
+
+class Camera:
+    """The part of the level that is on screen, a viewport the size of the screen whose top-left corner is at offset
+    in level coordinates. Everything the simulation does is in level coordinates, so screen positions such as the
+    mouse have to go through toLevel before being given to it.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.offset = (0, 0)
+
+    def follow(self, point, levelWidth, levelHeight):
+        """Centres the viewport on a point, without showing anything outside of the level
+        """
+        x = min(max(point[0] - self.width / 2, 0), max(levelWidth - self.width, 0))
+        y = min(max(point[1] - self.height / 2, 0), max(levelHeight - self.height, 0))
+        self.offset = (round(x), round(y))
+
+    def toLevel(self, screenPos) -> tuple:
+        return screenPos[0] + self.offset[0], screenPos[1] + self.offset[1]
+
+    def toScreen(self, levelPos) -> tuple:
+        return levelPos[0] - self.offset[0], levelPos[1] - self.offset[1]
+
+
+class Renderer:
+    """Draws a simulation to a surface. Each stage of drawing is a separate method so they can be timed on their own.
+
+    Walls and anchored bodies never move, so they are drawn once into a static layer that every frame starts from, and
+    only the bodies that can move are blitted each frame.
+
+    With dirtyRects enabled only the regions touched by moving sprites, the aiming cone, the target lines and the HUD
+    are repainted, and draw returns the list of rects to pass to pygame.display.update.
+
+    The camera follows the player through levels larger than the screen, and only the bodies in view are drawn.
+
+    Everything is drawn from a RenderSnapshot of the simulation. By default it is taken from the simulation as it is,
+    but draw can be given one published by a SimulationThread to draw while the next tick is being simulated.
+    """
+
+    def __init__(self, screen: pygame.Surface, simulation: Simulation, font: pygame.font.Font = None,
+                 dirtyRects=False, camera: Camera = None):
+        self.screen = screen
+        self.simulation = simulation
+        self.font = font  # Font of the HUD, or a function returning it that is called the first time text is drawn
+        self.hudText = None
+        self.camera = camera if camera is not None else Camera(*screen.get_size())
+
+        # Optional FrameProfiler that each stage of drawing is reported to
+        self.profiler = None
+
+        # Damage tracking state for dirty rectangle mode
+        self.dirtyRects = dirtyRects
+        self.fullRedraw = True
+        self.alpha = 1.0  # How far between the last two ticks sprites are drawn
+        self.snapshot = None  # Snapshot being drawn, None to draw the simulation as it is
+        self.drawnPositions = None  # Rounded top-left corner of every body on screen when it was last drawn
+        self.drawnOffset = None  # Camera offset of the last frame
+        self.overlayRects = []  # Rects covered by the cone, lines and HUD last frame
+
+        # Walls and anchored bodies in view drawn under everything else, with the tile map, version and camera, and the
+        # rows and positions of the anchored bodies, it was drawn for
+        self.backgroundSurface = None
+        self.backgroundKey = None
+        self.backgroundAnchored = None
+        self.backgroundPositions = None
+
+    def frame(self) -> RenderSnapshot:
+        """Returns the snapshot being drawn
+        """
+        if self.snapshot is None:
+            return self.simulation.renderSnapshot(copy=False)
+        return self.snapshot
+
+    def invalidate(self):
+        """Forces the next frame to repaint the whole screen, for when something else has drawn over it
+        """
+        self.fullRedraw = True
+
+    def background(self) -> pygame.Surface:
+        """Returns the static layer, a screen sized surface with the walls of the world's tile map and the anchored
+        bodies in view drawn on it, or None when there are neither. It is only redrawn when the walls change, the camera
+        moves, or an anchored body is added, removed or moved.
+        """
+        frame = self.frame()
+        tileMap = self.simulation.world.tileMap
+        anchored = np.flatnonzero(frame.anchored)
+        positions = frame.position[anchored]
+        key = (id(tileMap), tileMap.version if tileMap is not None else None, self.camera.offset)
+        if (key == self.backgroundKey and np.array_equal(anchored, self.backgroundAnchored) and
+                np.array_equal(positions, self.backgroundPositions)):
+            return self.backgroundSurface
+
+        self.backgroundKey, self.backgroundAnchored, self.backgroundPositions = key, anchored, positions
+        self.fullRedraw = True
+        if tileMap is None and len(anchored) == 0:
+            self.backgroundSurface = None
+            return None
+
+        self.backgroundSurface = pygame.Surface(self.screen.get_size())
+        self.backgroundSurface.fill(BACKGROUND_COLOUR)
+        if tileMap is not None:
+            (left, top), (width, height) = self.camera.offset, self.screen.get_size()
+            for x, y, tileWidth, tileHeight in tileMap.wallRects((left, top, width, height)):
+                self.backgroundSurface.fill(WALL_COLOUR, (x - left, y - top, tileWidth, tileHeight))
+
+        screenPositions = self.screenPositions()
+        visible = self.visibleBodies(screenPositions)
+        self.backgroundSurface.blits(self.bodyBlits(visible[frame.anchored[visible]], screenPositions), doreturn=False)
+        return self.backgroundSurface
+
+    def drawBackground(self, rect=None):
+        """Clears the screen, or just a rect of it, back to the static layer. Clearing rects reuses the layer checked by
+        the last full clear or draw, rather than checking every anchored body again for each rect.
+        """
+        background = self.background() if rect is None else self.backgroundSurface
+        if background is None:
+            self.screen.fill(BACKGROUND_COLOUR, rect)
+        elif rect is None:
+            self.screen.blit(background, (0, 0))
+        else:
+            self.screen.blit(background, rect, rect)
+
+    def hudFields(self, fps=None):
+        """Returns the arguments for each HudText.draw call the HUD is made of
+        """
+        storage, stage, mass = self.frame().hud
+        fields = []
+
+        # Display FPS in top left
+        if fps is not None:
+            fields.append((("", int(fps), (0, 255, 0), "fps", True), {"topleft": (5, 5)}))
+
+        fields.append((("metalmind storage: ", storage, (0, 255, 0), "", True), {"topleft": (80, 5)}))
+        fields.append((("stage: ", stage, (0, 255, 0)), {"topright": (1060, 5)}))
+        fields.append((("mass:", mass, (0, 255, 0)), {"topleft": (800, 5)}))
+        return fields
+
+    def hud(self) -> HudText:
+        if self.hudText is None:
+            if callable(self.font):
+                self.font = self.font()
+            self.hudText = HudText(self.font)
+        return self.hudText
+
+    def drawHud(self, fps=None):
+        hudText = self.hud()
+        for args, anchor in self.hudFields(fps):
+            hudText.draw(self.screen, *args, **anchor)
+
+    def screenPositions(self):
+        """Returns the rounded top-left corner of every body on screen
+        """
+        positions = np.rint(self.frame().interpolatedPositions(self.alpha)).astype(int)
+        return positions - self.camera.offset
+
+    def playerCentre(self) -> tuple:
+        """Returns the centre of the player's rect in the level, where it is drawn this frame
+        """
+        frame = self.frame()
+        index = frame.playerIndex
+        topleft = np.rint(frame.interpolatedPositions(self.alpha)[index]).astype(int)
+        return tuple((topleft + frame.size[index].astype(int) // 2).tolist())
+
+    def visibleBodies(self, positions) -> np.ndarray:
+        """Returns the indices of the bodies at least partly on screen, given the screen position of every body
+        """
+        width, height = self.screen.get_size()
+        size = self.frame().size
+        return np.flatnonzero((positions[:, 0] < width) & (positions[:, 0] + size[:, 0] > 0) &
+                              (positions[:, 1] < height) & (positions[:, 1] + size[:, 1] > 0))
+
+    def drawSprites(self):
+        """Draws every body that can move, the anchored ones are part of the static layer
+        """
+        simulation = self.simulation
+        frame = self.frame()
+        if (not frame.copied and not frame.anchored.any() and len(simulation.all_sprites) == frame.count and
+                self.camera.offset == (0, 0)):
+            simulation.syncSprites(self.alpha)
+            simulation.all_sprites.draw(self.screen)
+            return
+
+        # Some bodies were added in bulk without sprites, some are anchored, the view has scrolled, or the sprites belong
+        # to a simulation stepping on another thread, so the moving bodies in view are drawn in world order instead
+        positions = self.screenPositions()
+        visible = self.visibleBodies(positions)
+        self.screen.blits(self.bodyBlits(visible[~frame.anchored[visible]], positions), doreturn=False)
+
+    def bodyBlits(self, indices, positions) -> list:
+        """Returns (image, position) pairs to blit for some bodies. Bodies with a sprite use its image, the rest use the
+        shared image for their size and colour.
+
+        Args:
+            indices (NDArray): indices of the bodies to draw, in drawing order
+            positions (NDArray): (N,2) rounded top-left corner of every body on screen
+        """
+        frame = self.frame()
+        entities = frame.entities
+        sizes = frame.size[indices].astype(int).tolist()
+        metallic = frame.metallic[indices].tolist()
+        blits = []
+        for index, (width, height), isMetallic, topleft in zip(indices.tolist(), sizes, metallic,
+                                                              positions[indices].tolist()):
+            entity = entities[index]
+            if entity is not None:
+                blits.append((entity.image, topleft))
+            else:
+                blits.append((objectImage(width, height, isMetallic), topleft))
+        return blits
+
+    def drawAimingCone(self, aimPos):
+        # Draw player's aiming cone
+        coneSurface, conePos = self.simulation.playerSprite.createAimingCone(aimPos, self.playerCentre())
+        return self.screen.blit(coneSurface, self.camera.toScreen(conePos))
+
+    def targetLines(self) -> list:
+        """Returns the lines to every metal object that was in range during the last tick, highlighting the ones in the
+        targetting cone. Both come from the simulation's TargetingSnapshot, so the lines match the forces that were
+        applied. Lines are batched by colour as (colour, start, ends), with the highlighted batch last so it is drawn on
+        top.
+        """
+        frame = self.frame()
+        targeting = frame.targeting
+        indices = targeting.indices
+
+        # Centres of the targets' rects on screen, worked out from the world as not every body has a sprite
+        topLefts = self.screenPositions()[indices]
+        centres = topLefts + frame.size[indices].astype(int) // 2
+        playerCentre = self.camera.toScreen(self.playerCentre())
+        drawn = targeting.distances > 0
+        aimedAt = targeting.targeted if targeting.pushPulling else np.zeros_like(targeting.targeted)
+        return [(TARGET_LINE_COLOUR, playerCentre, centres[drawn & ~aimedAt].tolist()),
+                (AIMED_LINE_COLOUR, playerCentre, centres[drawn & aimedAt].tolist())]
+
+    def drawTargetLines(self):
+        # Draw lines to every metal object in range, highlighting the ones in the targetting cone
+        return self.drawLines(self.targetLines())
+
+    def drawLines(self, batches) -> pygame.Rect:
+        """Draws the batches of lines returned by targetLines and returns a rect bounding every pixel they changed. The
+        rects come from pygame rather than the end points, as lines clipped against the screen edge can change pixels
+        off the line.
+
+        pygame has no call for many separate segments, and a polyline out to each end and back draws every line twice,
+        so a batch is drawn by a loop doing nothing but pygame.draw.line calls.
+        """
+        screen = self.screen
+        rects = []
+        for colour, start, ends in batches:
+            rects += [pygame.draw.line(screen, colour, start, end, 2) for end in ends]
+        if not rects:
+            return pygame.Rect(0, 0, 0, 0)
+        return rects[0].unionall(rects[1:])
+
+    def draw(self, aimPos, fps=None, alpha=1.0, snapshot: RenderSnapshot = None):
+        """Draws a whole frame, without flipping the display
+
+        Args:
+            aimPos (tuple): point in the level the player is aiming at
+            fps (float, optional): frame rate to display. Defaults to None, which hides it.
+            alpha (float, optional): how far between the last two ticks to draw sprites. Defaults to 1.0.
+            snapshot (RenderSnapshot, optional): copied snapshot to draw. Defaults to None, meaning the simulation as
+                it is.
+
+        Returns:
+            list: the rects that changed when in dirty rectangle mode, otherwise None meaning the whole screen
+        """
+        self.alpha = alpha
+        self.snapshot = snapshot
+        simulation = self.simulation
+        frame = self.frame()
+        index = frame.playerIndex
+        centre = frame.interpolatedPositions(alpha)[index] + frame.size[index] / 2
+        self.camera.follow(centre, simulation.width, simulation.height)
+        if self.camera.offset != self.drawnOffset:
+            self.fullRedraw = True
+            self.drawnOffset = self.camera.offset
+
+        self.background()  # Walls that changed since the last frame force a full redraw
+        if self.dirtyRects and not self.fullRedraw:
+            return self.drawDirty(aimPos, fps)
+
+        self.drawBackground()
+        self.drawHud(fps)
+        self.drawSprites()
+        self.mark("draw")
+        coneRect = self.drawAimingCone(aimPos)
+        self.mark("aimingCone")
+        linesRect = self.drawLines(self.targetLines())
+        self.mark("targetLines")
+
+        if self.dirtyRects:
+            self.fullRedraw = False
+            self.drawnPositions = self.screenPositions()
+            self.overlayRects = [self.hud().measure(*args, **anchor) for args, anchor in self.hudFields(fps)]
+            self.overlayRects += [coneRect, linesRect]
+        return None
+
+    def drawDirty(self, aimPos, fps=None):
+        """Repaints only the damaged regions of the screen and returns them
+        """
+        screen = self.screen
+        simulation = self.simulation
+        frame = self.frame()
+        if not frame.copied:
+            simulation.syncSprites(self.alpha)
+
+        # Find the bodies that have moved since they were last drawn
+        positions = self.screenPositions()
+        if len(positions) != len(self.drawnPositions):
+            self.fullRedraw = True
+            return self.draw(aimPos, fps, self.alpha, self.snapshot)
+        moved = np.flatnonzero((positions != self.drawnPositions).any(axis=1))
+        if len(moved) > MAX_DIRTY_RECTS:
+            self.fullRedraw = True
+            return self.draw(aimPos, fps, self.alpha, self.snapshot)
+
+        # Work out everything that will be drawn over this frame before drawing, so that it can be cleared first and
+        # the alpha-blended cone is never blended twice onto the same pixels. Target lines are opaque, so they only
+        # need to be known afterwards.
+        coneSurface, conePos = simulation.playerSprite.createAimingCone(aimPos, self.playerCentre())
+        conePos = self.camera.toScreen(conePos)
+        fields = self.hudFields(fps)
+        hudText = self.hud()
+        overlayRects = [hudText.measure(*args, **anchor) for args, anchor in fields]
+        overlayRects.append(coneSurface.get_rect(topleft=conePos))
+
+        size = frame.size[moved].astype(int)
+        damaged = self.overlayRects + overlayRects
+        damaged += [pygame.Rect(x, y, w, h) for (x, y), (w, h) in zip(self.drawnPositions[moved].tolist(), size.tolist())]
+        damaged += [pygame.Rect(x, y, w, h) for (x, y), (w, h) in zip(positions[moved].tolist(), size.tolist())]
+        screenRect = screen.get_rect()
+        damaged = [rect.clip(screenRect) for rect in damaged]
+        damaged = [rect for rect in damaged if rect.width > 0 and rect.height > 0]
+
+        for rect in damaged:
+            self.drawBackground(rect)
+        for args, anchor in fields:
+            hudText.draw(screen, *args, **anchor)
+
+        # Redraw every sprite that overlaps a damaged rect, in world order. The spatial grid narrows each rect down
+        # to the bodies near it, widened by the largest body so that none overlapping the rect are missed. The grid of
+        # a simulation stepping on another thread can change at any time, so then the bodies on screen are checked.
+        if damaged:
+            sizes = frame.size
+            if frame.copied:
+                nearby = self.visibleBodies(positions)
+            else:
+                margin = np.hypot(*sizes.max(axis=0)) / 2
+                nearby = [simulation.spatialGrid.candidates(self.camera.toLevel(rect.center),
+                                                            np.hypot(rect.width, rect.height) / 2 + margin)
+                          for rect in damaged]
+                nearby = np.unique(np.concatenate(nearby))
+            nearby = nearby[~frame.anchored[nearby]]
+            rects = np.array([tuple(rect) for rect in damaged])
+            corners = positions[nearby]
+            overlaps = ((corners[:, None, 0] < rects[None, :, 0] + rects[None, :, 2]) &
+                        (corners[:, None, 0] + sizes[nearby, None, 0] > rects[None, :, 0]) &
+                        (corners[:, None, 1] < rects[None, :, 1] + rects[None, :, 3]) &
+                        (corners[:, None, 1] + sizes[nearby, None, 1] > rects[None, :, 1]))
+
+            # Sprites are clipped to each rect, otherwise a redrawn sprite could cover part of an undamaged one that
+            # should be drawn above it
+            for rect, overlapping in zip(damaged, overlaps.T):
+                screen.set_clip(rect)
+                screen.blits(self.bodyBlits(nearby[overlapping], positions), doreturn=False)
+            screen.set_clip(None)
+        self.mark("draw")
+
+        screen.blit(coneSurface, conePos)
+        self.mark("aimingCone")
+        linesRect = self.drawLines(self.targetLines()).clip(screenRect)
+        if linesRect.width > 0 and linesRect.height > 0:
+            damaged.append(linesRect)
+        overlayRects.append(linesRect)
+        self.mark("targetLines")
+
+        self.drawnPositions = positions
+        self.overlayRects = overlayRects
+        return damaged
+
+    def mark(self, phase):
+        if self.profiler is not None:
+            self.profiler.mark(phase)
@@ -0,0 +1,238 @@
+import argparse
+import os
+import time
+from dataclasses import dataclass, asdict, fields
+import numpy as np
+import numpy.typing as npt
+import pygame
+from Simulation import Simulation, InputState
+from Renderer import Renderer
+from Chunks import ChunkStreamer
+from TileMap import TileMap
+from IronSteelAllomancy import IronSteelAllomancy
+from Level import levelColumns, LEVEL_COLUMNS
+from FrameProfiler import FrameProfiler
+from Fonts import font
+
+RECORDING_VERSION = 3
+
+# Bit of the buttons column each held or one-shot input is stored in
+BUTTONS = ["steel", "iron", "moveLeft", "moveRight", "jump", "releaseJump"]
+
+# Columns stored for each allomancer other than the player, row being the level row of its body
+ALLOMANCER_COLUMNS = ["row", "strength", "maxRange", "steel", "iron"]
+
+
+class InputRecorder:
+    """Records the input given to a simulation every frame, along with the scene it started from, so that the same run
+    can be replayed exactly by a Recording.
+    """
+
+    def __init__(self, simulation: Simulation):
+        player = simulation.playerSprite
+        self.width = simulation.width
+        self.height = simulation.height
+        self.tickRate = simulation.tickRate
+        self.collisions = simulation.world.collisions is not None
+        self.playerPos = tuple(player.getCentreOfMassArray())
+        self.maxPushRange = player.maxPushRange
+        self.level = {name: column.copy() for name, column in levelColumns(simulation).items()}
+        world = simulation.world
+
+        # A streamed level is replayed with the same chunks, so the same bodies are frozen on the same ticks. The level
+        # rows of the bodies in the world come first, the rest were frozen.
+        chunks = simulation.chunks
+        self.chunkSize = chunks.chunkSize if chunks is not None else 0
+        self.chunkRadius = chunks.radius if chunks is not None else 0
+        self.liveCount = world.count - 1
+
+        # Everything else the world's motion depends on: its force law constants, walls and other allomancers
+        self.allomancy = asdict(world.allomancy)
+        tileMap = world.tileMap
+        self.tileSize = tileMap.tileSize if tileMap is not None else 0
+        self.walls = tileMap.walls.copy() if tileMap is not None else np.zeros((0, 0), dtype=bool)
+        allomancers = simulation.allomancers
+        levelRows = allomancers.rows - (allomancers.rows > player.index)  # The player has no level row
+        self.allomancers = {"row": levelRows, "strength": allomancers.strength.copy(),
+                            "maxRange": allomancers.maxRange.copy(), "steel": allomancers.steel.copy(),
+                            "iron": allomancers.iron.copy()}
+
+        self.frameTimes = []
+        self.aimPositions = []
+        self.buttons = []
+        self.metalmindChanges = []
+
+    def record(self, frameTime, inputs: InputState):
+        """Adds a frame, call with the same arguments as Simulation.advance
+        """
+        self.frameTimes.append(frameTime)
+        self.aimPositions.append(tuple(inputs.aimPos))
+        self.buttons.append(sum(1 << bit for bit, name in enumerate(BUTTONS) if getattr(inputs, name)))
+        self.metalmindChanges.append(inputs.ironMetalmindChange)
+
+    def save(self, path):
+        """Writes the recording to an .npz file at path
+        """
+        np.savez_compressed(
+            path, version=np.array(RECORDING_VERSION), size=np.array((self.width, self.height)),
+            tickRate=np.array(self.tickRate), collisions=np.array(self.collisions),
+            playerPos=np.array(self.playerPos), maxPushRange=np.array(self.maxPushRange),
+            chunkSize=np.array(self.chunkSize), chunkRadius=np.array(self.chunkRadius),
+            liveCount=np.array(self.liveCount), tileSize=np.array(self.tileSize), walls=self.walls,
+            frameTime=np.array(self.frameTimes, dtype=np.float64),
+            aimPos=np.array(self.aimPositions, dtype=np.float64).reshape(-1, 2),
+            buttons=np.array(self.buttons, dtype=np.uint8),
+            ironMetalmindChange=np.array(self.metalmindChanges, dtype=np.int8),
+            **{"level_" + name: column for name, column in self.level.items()},
+            **{"allomancy_" + name: np.array(value) for name, value in self.allomancy.items()},
+            **{"allomancer_" + name: column for name, column in self.allomancers.items()})
+
+
+@dataclass
+class Recording:
+    """A recorded run, the scene it started from and the input of every frame
+    """
+    width: float
+    height: float
+    tickRate: int
+    collisions: bool
+    playerPos: tuple
+    maxPushRange: float
+    level: dict
+    chunkSize: float  # Size of the chunks the level was streamed in, 0 when it was not
+    chunkRadius: int
+    liveCount: int  # Level rows in the world when recording started, the rest were frozen in chunks
+    allomancy: dict  # Fields of the world's IronSteelAllomancy
+    tileSize: float  # Size of the tiles of the world's TileMap, 0 when it had none
+    walls: npt.NDArray
+    allomancers: dict  # ALLOMANCER_COLUMNS of the allomancers other than the player
+    frameTime: npt.NDArray
+    aimPos: npt.NDArray
+    buttons: npt.NDArray
+    ironMetalmindChange: npt.NDArray
+
+    @classmethod
+    def load(cls, path) -> "Recording":
+        with np.load(path) as archive:
+            version = int(archive["version"])
+            if version != RECORDING_VERSION:
+                raise ValueError(f"{path} is a version {version} recording, "
+                                 f"only version {RECORDING_VERSION} can be read")
+            width, height = archive["size"].tolist()
+            return cls(width, height, int(archive["tickRate"]), bool(archive["collisions"]),
+                       tuple(archive["playerPos"].tolist()), archive["maxPushRange"].item(),
+                       {name: archive["level_" + name] for name in LEVEL_COLUMNS},
+                       archive["chunkSize"].item(), int(archive["chunkRadius"]), int(archive["liveCount"]),
+                       {field.name: archive["allomancy_" + field.name].item() for field in fields(IronSteelAllomancy)},
+                       archive["tileSize"].item(), archive["walls"],
+                       {name: archive["allomancer_" + name] for name in ALLOMANCER_COLUMNS},
+                       archive["frameTime"], archive["aimPos"], archive["buttons"], archive["ironMetalmindChange"])
+
+    def __len__(self):
+        return len(self.frameTime)
+
+    def simulation(self) -> Simulation:
+        """Returns a new simulation of the scene the recording started from
+        """
+        simulation = Simulation(self.width, self.height, self.playerPos, self.maxPushRange, self.tickRate,
+                                self.collisions, IronSteelAllomancy(**self.allomancy))
+        if self.tileSize:
+            rows, columns = self.walls.shape
+            tileMap = simulation.world.tileMap = TileMap(columns, rows, self.tileSize)
+            tileMap.walls[:] = self.walls
+
+        # Bodies that were in the world go straight back into the same rows, frozen ones back into their chunks
+        columns = [self.level[name] for name in LEVEL_COLUMNS]
+        indices = simulation.addObjects(*(column[:self.liveCount] for column in columns))
+        if self.chunkSize:
+            simulation.chunks = ChunkStreamer(simulation, self.chunkSize, self.chunkRadius)
+            simulation.chunks.addObjects(*(column[self.liveCount:] for column in columns))
+
+        allomancers = self.allomancers
+        for row, strength, maxRange, steel, iron in zip(*(allomancers[name].tolist() for name in ALLOMANCER_COLUMNS)):
+            simulation.allomancers.add(indices[row], steel, iron, strength, maxRange)
+        return simulation
+
+    def inputs(self, frame) -> InputState:
+        """Returns the input of a frame
+        """
+        buttons = int(self.buttons[frame])
+        held = {name: bool(buttons >> bit & 1) for bit, name in enumerate(BUTTONS)}
+        return InputState(aimPos=tuple(self.aimPos[frame].tolist()),
+                          ironMetalmindChange=int(self.ironMetalmindChange[frame]), **held)
+
+
+def replay(recording: Recording, renderer=None, flip=False, profiler: FrameProfiler = None):
+    """Feeds a recording through a new simulation as fast as possible and returns the simulation. Frame times come
+    from the recording, so the same ticks run with the same input however long each frame really takes.
+
+    Args:
+        recording (Recording): run to replay
+        renderer (callable, optional): called with the new simulation to make the Renderer to draw it with, drawing is
+            skipped when None. Defaults to None.
+        flip (bool, optional): flip the display after drawing each frame. Defaults to False.
+        profiler (FrameProfiler, optional): profiler to time each frame with. Defaults to None.
+    """
+    simulation = recording.simulation()
+    if renderer is not None:
+        renderer = renderer(simulation)
+    if profiler is not None:
+        simulation.profiler = profiler
+        if renderer is not None:
+            renderer.profiler = profiler
+
+    for frame in range(len(recording)):
+        if profiler is not None:
+            profiler.beginFrame()
+        inputs = recording.inputs(frame)
+        alpha = simulation.advance(float(recording.frameTime[frame]), inputs)
+        if renderer is not None:
+            renderer.draw(inputs.aimPos, None, alpha)
+            if flip:
+                pygame.display.flip()
+                if profiler is not None:
+                    profiler.mark("flip")
+        if profiler is not None:
+            profiler.endFrame()
+    return simulation
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replays a recorded run at full speed and reports frame timings and a hash of the final world")
+    parser.add_argument("recording")
+    parser.add_argument("--draw", action="store_true", help="draw every frame to an off-screen surface")
+    parser.add_argument("--window", action="store_true", help="draw every frame to a window")
+    parser.add_argument("--dump", help="CSV file to write the timing of every frame to")
+    args = parser.parse_args()
+
+    if not args.window:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+    recording = Recording.load(args.recording)
+    makeRenderer = None
+    if args.draw or args.window:
+        pygame.display.init()
+        size = (int(recording.width), int(recording.height))
+        screen = pygame.display.set_mode(size) if args.window else pygame.Surface(size)
+
+        def makeRenderer(simulation):
+            return Renderer(screen, simulation, font("consolas", 20))
+
+    profiler = FrameProfiler(capacity=max(len(recording), 1))
+    start = time.perf_counter()
+    simulation = replay(recording, makeRenderer, args.window, profiler)
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(recording)} frames, {simulation.tick} ticks in {elapsed:.2f} s")
+    p50, p95, p99 = profiler.percentiles()
+    for phase, phase50, phase95, phase99 in zip(profiler.phases, p50, p95, p99):
+        if phase99 > 0:
+            print(f"{phase:<12} p50 {phase50:7.3f} ms  p95 {phase95:7.3f} ms  p99 {phase99:7.3f} ms")
+    print("world hash " + simulation.world.stateHash())
+    if args.dump:
+        print("frame timings written to " + profiler.dump(args.dump))
+
+
+if __name__ == "__main__":
+    main()
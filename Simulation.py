@@ -0,0 +1,359 @@
+import argparse
+import math
+import time
+from dataclasses import dataclass, replace
+import numpy as np
+import numpy.typing as npt
+import pygame.sprite
+from Classes import PlayerSprite, Object
+from IronSteelAllomancy import IronSteelAllomancy
+from PhysicsWorld import PhysicsWorld
+from SpatialGrid import SpatialGrid
+from Collisions import CollisionSystem
+from Feruchemy import FeruchemyEngine
+from Allomancers import AllomancerSolver
+
+
+@dataclass
+class InputState:
+    """Everything the player can do in a single tick. Held inputs (steel, iron, moveLeft, moveRight) describe the state
+    of the controls, the rest are things that happened during the tick.
+    """
+    aimPos: tuple = (0, 0)
+    steel: bool = False
+    iron: bool = False
+    moveLeft: bool = False
+    moveRight: bool = False
+    jump: bool = False
+    releaseJump: bool = False
+    ironMetalmindChange: int = 0
+
+    def followedBy(self, later: "InputState") -> "InputState":
+        """Returns the input of a tick that covers this input and a later one, with the held inputs of the later one and
+        the one-shot inputs of both
+        """
+        return replace(later, jump=later.jump or self.jump, releaseJump=later.releaseJump or self.releaseJump,
+                       ironMetalmindChange=self.ironMetalmindChange + later.ironMetalmindChange)
+
+
+@dataclass(frozen=True)
+class TargetingSnapshot:
+    """Which metal the player could push or pull during one tick, worked out once and shared by the force pass and the
+    renderer so that the lines drawn always match the forces applied.
+    """
+    aimPos: tuple
+    indices: npt.NDArray  # Metal bodies within push range
+    directions: npt.NDArray  # (N,2) unit vectors from the player to each of them
+    distances: npt.NDArray
+    targeted: npt.NDArray  # Mask of the ones inside the targetting cone, which are pushed and pulled
+    pushPulling: bool = False  # Whether the player was burning steel or iron, so the targeted metal was acted on
+
+
+@dataclass(frozen=True)
+class RenderSnapshot:
+    """Everything the renderer draws of one tick. Copied snapshots share nothing that the simulation changes, so they
+    can be drawn on one thread while the simulation steps on another. Uncopied ones are views onto the world, for
+    drawing between ticks on the thread that runs them.
+    """
+    tick: int
+    previousPosition: npt.NDArray
+    position: npt.NDArray
+    size: npt.NDArray
+    metallic: npt.NDArray
+    anchored: npt.NDArray  # Bodies that never move, which are drawn once into the renderer's static layer
+    entities: list  # Entity of each body, whose image it is drawn with, or None
+    playerIndex: int
+    targeting: TargetingSnapshot
+    hud: tuple  # Iron metalmind storage, iron feruchemy stage and mass of the player
+    copied: bool
+
+    @property
+    def count(self) -> int:
+        return len(self.position)
+
+    def interpolatedPositions(self, alpha=1.0) -> npt.NDArray:
+        """Returns the position of every body a fraction alpha of the way from its previous position to its current one
+        """
+        if alpha == 1.0:
+            return self.position
+        return self.previousPosition + (self.position - self.previousPosition) * alpha
+
+
+# Simulation ticks per second of game time, and the most ticks a single rendered frame may catch up by
+TICK_RATE = 60
+MAX_SUBSTEPS = 5
+
+
+class Simulation:
+    """All of the game logic, advanced one fixed tick at a time. Needs no window, mouse, fonts or clock, so it can be
+    run headless and as fast as the machine allows.
+
+    Collisions between objects are on by default and cost a couple of milliseconds a tick however small the scene, so a
+    hundred objects run at hundreds of ticks a second with them and thousands without. Pass collisions=False, or
+    --no-collisions on the command line, when only the allomancy and integration matter.
+    """
+
+    def __init__(self, width, height, playerPos=(300, 500), maxPushRange=500, tickRate=TICK_RATE, collisions=True,
+                 allomancy: IronSteelAllomancy = None):
+        self.width = width
+        self.height = height
+        self.tick = 0
+
+        # Fixed timestep state, real time not yet simulated and one-shot inputs not yet used by a tick
+        self.tickRate = tickRate
+        self.accumulator = 0.0
+        self.pendingInputs = None
+
+        self.world = PhysicsWorld(allomancy=allomancy)
+        self.all_sprites = pygame.sprite.Group()
+        self.objectsGroup = pygame.sprite.Group()
+
+        # Feruchemy of every feruchemist, stepped once a tick for all of them
+        self.feruchemy = FeruchemyEngine()
+
+        self.playerSprite = PlayerSprite(playerPos[0], playerPos[1], (255, 0, 0), 30, 20, width, height,
+                                         maxPushRange, world=self.world, feruchemy=self.feruchemy)
+        self.all_sprites.add(self.playerSprite)
+
+        # Index of where every body is, so only objects near the player are considered for allomancy
+        self.spatialGrid = SpatialGrid(self.world, maxPushRange)
+
+        # Allomancers other than the player, such as NPC Coinshots and Lurchers
+        self.allomancers = AllomancerSolver(self.world)
+
+        # Objects and the player collide with each other as well as the floor
+        if collisions:
+            self.world.collisions = CollisionSystem()
+
+        # Optional ChunkStreamer that keeps only the bodies near the player in the world
+        self.chunks = None
+
+        # Targeting state of the last tick
+        self.targeting = self.target(InputState().aimPos)
+
+        # Optional FrameProfiler that each stage of step is reported to
+        self.profiler = None
+
+        # Net allomantic force on the player during the last tick
+        self.allomanticForce = np.zeros(2)
+
+    def addObject(self, x, y, width, height, is_metallic=False, mass=1.0, perfectlyAnchored=False) -> Object:
+        obj = Object(x, y, width, height, self.width, self.height,
+                     is_metallic, mass, perfectlyAnchored, world=self.world)
+        self.objectsGroup.add(obj)
+        self.all_sprites.add(obj)
+        return obj
+
+    def addObjects(self, position: npt.NDArray, size: npt.NDArray, mass=1.0, is_metallic=False,
+                   perfectlyAnchored=False) -> npt.NDArray:
+        """Adds many objects straight into the physics world and returns their indices. No sprites are created, the
+        renderer draws these bodies directly.
+
+        Args:
+            position (NDArray): (N,2) top-left corners
+            size (NDArray): (N,2) widths and heights
+            mass (float or NDArray, optional): Defaults to 1.0.
+            is_metallic (bool or NDArray, optional): Defaults to False.
+            perfectlyAnchored (bool or NDArray, optional): Defaults to False.
+        """
+        world = self.world
+        indices = world.addBodies(position, size, self.width, self.height, mass, perfectlyAnchored)
+        # The same state Object.__init__ gives each object
+        world.clampToBounds[indices] = True
+        world.metallic[indices] = is_metallic
+        # math.pow as in Object, np.power can differ in the last bit which would make replays diverge
+        chargePower = world.allomancy.chargePower
+        world.charge[indices] = [math.pow(mass, chargePower) for mass in world.mass[indices].tolist()]
+        return indices
+
+    def addAllomancer(self, x, y, width=20, height=30, steel=False, iron=False, mass=20.0, strength=1.0,
+                      maxRange=np.inf) -> int:
+        """Adds a non-player allomancer, a body that pushes or pulls on the metal around it every tick, and returns
+        its slot in self.allomancers, through which it can start and stop burning steel and iron
+        """
+        obj = self.addObject(x, y, width, height, False, mass)
+        return self.allomancers.add(obj.index, steel, iron, strength, maxRange)
+
+    def pinnedRows(self) -> npt.NDArray:
+        """Returns the world rows of the player and every other allomancer, which are never removed by streaming
+        """
+        return np.concatenate(([self.playerSprite.index], self.allomancers.rows)).astype(np.intp)
+
+    def removeBodies(self, indices: npt.NDArray):
+        """Removes bodies from the world, keeping the rows held by the rest of the simulation in line. Their sprites
+        must already have been killed.
+        """
+        remap = self.world.removeBodies(indices)
+        self.allomancers.remap(remap)
+
+    def metalInRange(self):
+        """Returns the world indices of the metal objects within the player's push range
+        """
+        player = self.playerSprite
+        return self.spatialGrid.queryRadius(player.getCentreOfMassArray(), player.maxPushRange, True)
+
+    def target(self, aimPos) -> TargetingSnapshot:
+        """Returns the player's targeting state when aiming at aimPos
+        """
+        player = self.playerSprite
+        centre = player.getCentreOfMassArray()
+        indices = self.metalInRange()
+        directions, distances = player.targetOffsets(indices)
+
+        # The metal in the cone is part of the metal in range, as both come from the same grid and centres
+        inCone = self.spatialGrid.queryCone(centre, player.maxPushRange, np.asarray(aimPos, dtype=float) - centre,
+                                            player.coneAngle, True)
+        targeted = np.isin(indices, inCone)
+        return TargetingSnapshot(tuple(aimPos), indices, directions, distances, targeted, bool(player.isPushPulling()))
+
+    def doAllomancy(self, aimPos):
+        """Works out this tick's TargetingSnapshot and applies the forces of whichever metals the player is burning,
+        then those of every other allomancer
+        """
+        player = self.playerSprite
+        self.targeting = targeting = self.target(aimPos)
+        self.allomanticForce = np.zeros(2)
+        if targeting.pushPulling:
+            targeted = targeting.targeted
+            args = (targeting.indices[targeted], targeting.directions[targeted], targeting.distances[targeted])
+        if player.aSteel:
+            self.allomanticForce += player.applyForces(*args, True)
+        if player.aIron:
+            self.allomanticForce += player.applyForces(*args, False)
+        self.allomancers.solve()
+
+    def step(self, inputs: InputState):
+        """Advances the simulation by one tick
+
+        Args:
+            inputs (InputState): the player's input for this tick
+        """
+        player = self.playerSprite
+        if self.chunks is not None:
+            self.chunks.update()
+
+        player.aSteel = inputs.steel
+        player.aIron = inputs.iron
+        if inputs.ironMetalmindChange:
+            player.changeMetalmindRate("iron", inputs.ironMetalmindChange)
+        if inputs.jump:
+            player.jump()
+        if inputs.releaseJump:
+            player.releaseJump()
+
+        # Handle movement input
+        if inputs.moveLeft:
+            player.moveLeft()
+        elif inputs.moveRight:
+            player.moveRight()
+        if self.profiler is not None:
+            self.profiler.mark("movement")
+
+        self.doAllomancy(inputs.aimPos)
+        if self.profiler is not None:
+            self.profiler.mark("doAllomancy")
+
+        # Every body is integrated by the world, only the player has per-tick logic of its own. Object rects are
+        # synced by syncSprites when something needs to draw them.
+        self.world.step()
+        self.feruchemy.step()
+        player.update()
+        self.tick += 1
+        if self.profiler is not None:
+            self.profiler.mark("update")
+
+    def advance(self, frameTime, inputs: InputState, maxSubsteps=MAX_SUBSTEPS) -> float:
+        """Runs as many fixed ticks as fit in the real time that has passed, carrying the remainder over to the next
+        frame. If more than maxSubsteps ticks are owed the extra time is dropped, so a heavy frame slows the game down
+        briefly rather than making every following frame heavier.
+
+        Args:
+            frameTime (float): seconds since the last call
+            inputs (InputState): the player's input for this frame
+            maxSubsteps (int, optional): most ticks to run in one call. Defaults to MAX_SUBSTEPS.
+
+        Returns:
+            float: how far between the last two ticks the current time is, for interpolating sprite positions
+        """
+        # One-shot inputs from frames that ran no ticks are kept until a tick uses them
+        if self.pendingInputs is not None:
+            inputs = self.pendingInputs.followedBy(inputs)
+            self.pendingInputs = None
+
+        tickTime = 1 / self.tickRate
+        self.accumulator += frameTime
+        substeps = 0
+        while self.accumulator >= tickTime and substeps < maxSubsteps:
+            self.step(inputs)
+            self.accumulator -= tickTime
+            substeps += 1
+            if substeps == 1:
+                inputs = replace(inputs, jump=False, releaseJump=False, ironMetalmindChange=0)
+
+        # Copied, as the caller may reuse its InputState and clear the one-shot inputs before the next frame
+        if substeps == 0:
+            self.pendingInputs = replace(inputs)
+        self.accumulator = min(self.accumulator, tickTime)
+        return self.accumulator / tickTime
+
+    def syncSprites(self, alpha=1.0):
+        """Moves every sprite's rect to the position of its body, ready for drawing
+
+        Args:
+            alpha (float, optional): how far between the last two ticks to draw the sprites. Defaults to 1.0.
+        """
+        self.world.syncRects(alpha)
+
+    def renderSnapshot(self, copy=True) -> RenderSnapshot:
+        """Returns what the renderer needs to draw the last tick
+
+        Args:
+            copy (bool, optional): copy the world's arrays, so the snapshot stays as it is while the simulation carries
+                on. Defaults to True.
+        """
+        world = self.world
+        n = world.count
+        player = self.playerSprite
+        arrays = (world.previousPosition[:n], world.position[:n], world.size[:n], world.metallic[:n],
+                  world.anchored[:n])
+        entities = world.entities
+        if copy:
+            arrays = tuple(array.copy() for array in arrays)
+            entities = entities[:n]
+        hud = (player.metalMinds["iron"], player.feruchemyFlags["iron"], player.mass)
+        return RenderSnapshot(self.tick, *arrays, entities, player.index, self.targeting, hud, copy)
+
+    def run(self, ticks, inputs: InputState = None) -> float:
+        """Runs a number of ticks with the same input and returns the number of ticks simulated per second
+        """
+        inputs = inputs if inputs is not None else InputState()
+        start = time.perf_counter()
+        for _ in range(ticks):
+            self.step(inputs)
+        return ticks / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Runs the simulation headless with the player steelpushing and reports the tick rate")
+    parser.add_argument("--ticks", type=int, default=5000)
+    parser.add_argument("--objects", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    # Resolving collisions costs about 2 ms a tick even in small scenes, so without them thousands of ticks run a
+    # second rather than hundreds, for sweeps and tests that only need the allomancy and integration
+    parser.add_argument("--no-collisions", action="store_true",
+                        help="let objects pass through each other, much faster in small scenes")
+    args = parser.parse_args()
+
+    simulation = Simulation(960, 540, collisions=not args.no_collisions)
+    rng = np.random.default_rng(args.seed)
+    for x, y in rng.uniform((0, 0), (960, 540), (args.objects, 2)):
+        simulation.addObject(x, y, 20, 20, True, 20)
+
+    inputs = InputState(aimPos=(600, 300), steel=True)
+    ticksPerSecond = simulation.run(args.ticks, inputs)
+    print(f"{args.ticks} ticks with {args.objects} objects at {ticksPerSecond:.0f} ticks/s")
+
+
+if __name__ == "__main__":
+    main()
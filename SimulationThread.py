@@ -0,0 +1,101 @@
+import queue
+import threading
+import time
+from dataclasses import replace
+from Simulation import Simulation, InputState, RenderSnapshot
+
+
+class SimulationThread:
+    """Runs a Simulation on a worker thread at its fixed tick rate, so that a heavy tick does not hold up drawing. Most
+    of a tick is NumPy work that releases the GIL, which lets it overlap with blitting on another core.
+
+    The main thread sends the input of every frame through a queue and draws the latest RenderSnapshot. Snapshots are
+    double buffered, the worker copies the next one out of the world while the renderer draws the one published last,
+    then swaps it in. A published snapshot is never changed, so it can be drawn without a lock.
+
+    Nothing outside of the worker may touch the simulation while the thread is running.
+    """
+
+    def __init__(self, simulation: Simulation, recorder=None):
+        self.simulation = simulation
+        self.recorder = recorder  # Optional InputRecorder given the input of every advance, so runs replay exactly
+        self.inputs = queue.Queue()
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="simulation", daemon=True)
+        self.error = None  # Exception that stopped the worker, raised again by stop
+
+        # The published snapshot and the time its tick was due, swapped together
+        self.lock = threading.Lock()
+        self.snapshot = simulation.renderSnapshot()
+        self.tickedAt = time.perf_counter()
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        """Stops the worker after its current tick and waits for it to finish, raising anything it raised
+        """
+        self.stopping.set()
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+    @property
+    def running(self) -> bool:
+        return self.thread.is_alive()
+
+    def send(self, inputs: InputState):
+        """Gives the worker the input of a frame. One-shot inputs sent between two ticks all reach the next tick.
+        """
+        self.inputs.put(replace(inputs))
+
+    def latest(self) -> tuple:
+        """Returns the last published snapshot and how far the current time is between its tick and the next one, for
+        interpolating sprite positions
+        """
+        with self.lock:
+            snapshot, tickedAt = self.snapshot, self.tickedAt
+        tickTime = 1 / self.simulation.tickRate
+        return snapshot, min((time.perf_counter() - tickedAt) / tickTime, 1.0)
+
+    def publish(self, snapshot: RenderSnapshot, lateBy):
+        """Swaps in a new snapshot, whose tick was due lateBy seconds ago
+        """
+        with self.lock:
+            self.snapshot = snapshot
+            self.tickedAt = time.perf_counter() - lateBy
+
+    def collectInputs(self, inputs: InputState) -> InputState:
+        """Returns the input of the next advance, everything sent since the last one on top of the held inputs
+        """
+        while True:
+            try:
+                inputs = inputs.followedBy(self.inputs.get_nowait())
+            except queue.Empty:
+                return inputs
+
+    def run(self):
+        simulation = self.simulation
+        tickTime = 1 / simulation.tickRate
+        held = InputState()
+        last = time.perf_counter()
+        try:
+            while not self.stopping.is_set():
+                inputs = self.collectInputs(held)
+                now = time.perf_counter()
+                frameTime, last = now - last, now
+
+                if self.recorder is not None:
+                    self.recorder.record(frameTime, inputs)
+                tick = simulation.tick
+                simulation.advance(frameTime, inputs)
+                if simulation.tick != tick:
+                    self.publish(simulation.renderSnapshot(), simulation.accumulator)
+
+                # One-shot inputs have been used or are kept by the simulation until the next tick
+                held = replace(inputs, jump=False, releaseJump=False, ironMetalmindChange=0)
+
+                # Sleep until the next tick is due
+                time.sleep(max(tickTime - simulation.accumulator, 0))
+        except Exception as error:
+            self.error = error
@@ -0,0 +1,142 @@
+import math
+import numpy as np
+import numpy.typing as npt
+
+
+class SpatialGrid:
+    """Uniform grid over the bodies of a physics world, used to find bodies near a point without looking at every body
+    in the world. Each cell holds the row indices of the bodies whose centre lies inside it.
+
+    The grid is kept up to date incrementally: after every physics step only the bodies that crossed into a new cell
+    are moved between cells.
+    """
+
+    def __init__(self, world, cellSize=250):
+        self.world = world
+        self.cellSize = cellSize
+        self.cells = {}
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.count = 0
+
+        world.spatialIndex = self
+        self.update()
+
+    def cellKey(self, x, y) -> int:
+        """Returns the key of the cell containing the point (x, y)
+        """
+        cx = math.floor(x / self.cellSize)
+        cy = math.floor(y / self.cellSize)
+        return (cx << 32) | (cy & 0xFFFFFFFF)
+
+    def cellKeys(self, points: npt.NDArray) -> npt.NDArray:
+        """Vectorised cellKey for an (N,2) array of points
+        """
+        cells = np.floor(points / self.cellSize).astype(np.int64)
+        return (cells[:, 0] << 32) | (cells[:, 1] & 0xFFFFFFFF)
+
+    def update(self, rows: npt.NDArray = None):
+        """Moves bodies that have changed cell since the last update and inserts any bodies added to the world since
+
+        Args:
+            rows (NDArray, optional): the only bodies that may have moved, such as the awake ones. Defaults to None,
+                meaning any of them.
+        """
+        world = self.world
+        if rows is not None and self.count == world.count:
+            self.moveBodies(rows, self.cellKeys(world.position[rows] + world.size[rows] / 2))
+            return
+
+        keys = self.cellKeys(world.centres())
+        if len(self.keys) < world.count:
+            grown = np.zeros(len(world.mass), dtype=np.int64)
+            grown[:self.count] = self.keys[:self.count]
+            self.keys = grown
+
+        # Bodies that have crossed a cell boundary
+        tracked = self.count
+        self.moveBodies(np.arange(tracked), keys[:tracked])
+
+        # Bodies new to the world
+        for index, new in enumerate(keys[tracked:].tolist(), start=tracked):
+            self.cells.setdefault(new, set()).add(index)
+
+        self.keys[:world.count] = keys
+        self.count = world.count
+
+    def moveBodies(self, rows: npt.NDArray, keys: npt.NDArray):
+        """Moves bodies that are already in the grid into the cells with the given keys, where they have changed
+        """
+        moved = np.flatnonzero(keys != self.keys[rows])
+        for index, old, new in zip(rows[moved].tolist(), self.keys[rows[moved]].tolist(), keys[moved].tolist()):
+            cell = self.cells[old]
+            cell.discard(index)
+            if not cell:
+                del self.cells[old]
+            self.cells.setdefault(new, set()).add(index)
+        self.keys[rows[moved]] = keys[moved]
+
+    def removeBodies(self):
+        """Mirrors PhysicsWorld.removeBodies, after which most rows have moved, by rebuilding the grid
+        """
+        self.cells = {}
+        self.count = 0
+        self.update()
+
+    def candidates(self, point, radius) -> npt.NDArray:
+        """Returns the indices of every body in the cells overlapping the square around a circle, unsorted
+        """
+        if self.count != self.world.count:
+            self.update()
+
+        minX = math.floor((point[0] - radius) / self.cellSize)
+        maxX = math.floor((point[0] + radius) / self.cellSize)
+        minY = math.floor((point[1] - radius) / self.cellSize)
+        maxY = math.floor((point[1] + radius) / self.cellSize)
+
+        found = []
+        for cx in range(minX, maxX + 1):
+            for cy in range(minY, maxY + 1):
+                cell = self.cells.get((cx << 32) | (cy & 0xFFFFFFFF))
+                if cell:
+                    found.extend(cell)
+        return np.array(found, dtype=np.intp)
+
+    def queryRadius(self, point, radius, metallicOnly=False) -> npt.NDArray:
+        """Returns the indices of the bodies whose centres lie within radius of point
+
+        Args:
+            point (tuple): centre of the search circle
+            radius (float): radius of the search circle
+            metallicOnly (bool, optional): only return metallic bodies. Defaults to False.
+        """
+        world = self.world
+        indices = self.candidates(point, radius)
+        if metallicOnly:
+            indices = indices[world.metallic[indices]]
+
+        offsets = world.position[indices] + world.size[indices] / 2 - point
+        inside = np.einsum("ij,ij->i", offsets, offsets) <= radius * radius
+        return indices[inside]
+
+    def queryCone(self, point, radius, direction, coneAngle, metallicOnly=False) -> npt.NDArray:
+        """Returns the indices of the bodies within radius of point and inside a cone around direction
+
+        Args:
+            point (tuple): apex of the cone
+            radius (float): length of the cone
+            direction (tuple): direction the cone points in, does not need to be normalised
+            coneAngle (float): full angle of the cone in degrees
+            metallicOnly (bool, optional): only return metallic bodies. Defaults to False.
+        """
+        world = self.world
+        indices = self.queryRadius(point, radius, metallicOnly)
+
+        direction = np.asarray(direction, dtype=float)
+        magnitude = np.hypot(direction[0], direction[1])
+        if magnitude == 0:
+            return indices[:0]
+
+        offsets = world.position[indices] + world.size[indices] / 2 - point
+        distances = np.sqrt(np.einsum("ij,ij->i", offsets, offsets))
+        cosines = (offsets @ direction) / (magnitude * np.maximum(distances, 1e-12))
+        return indices[(distances > 0) & (cosines >= math.cos(math.radians(coneAngle / 2)))]
@@ -0,0 +1,115 @@
+import argparse
+import csv
+import itertools
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from IronSteelAllomancy import IronSteelAllomancy  # noqa: E402
+from Simulation import Simulation, InputState  # noqa: E402
+
+WIDTH = 960
+HEIGHT = 540
+
+# The player counts as at rest once slower than this, in pixels per tick
+REST_SPEED = 0.01
+
+
+def anchoredCoin(x, y, allomancy: IronSteelAllomancy) -> Simulation:
+    """Returns a simulation of the player standing in the middle of the floor and a single anchored coin at (x, y)
+    """
+    simulation = Simulation(WIDTH, HEIGHT, (WIDTH / 2, HEIGHT - 15), allomancy=allomancy)
+    simulation.addObject(x, y, 10, 10, True, 1.0, True)
+    return simulation
+
+
+def pushOffCoin(allomancy: IronSteelAllomancy):
+    """Steelpush off a coin anchored in the floor beneath the player"""
+    simulation = anchoredCoin(WIDTH / 2, HEIGHT - 5, allomancy)
+    return simulation, InputState(aimPos=(WIDTH / 2, HEIGHT), steel=True)
+
+
+def pullToCoin(allomancy: IronSteelAllomancy):
+    """Ironpull on a coin anchored high up and off to the side"""
+    simulation = anchoredCoin(WIDTH * 3 / 4, HEIGHT / 4, allomancy)
+    return simulation, InputState(aimPos=(WIDTH * 3 / 4, HEIGHT / 4), iron=True)
+
+
+SCENARIOS = {"pushOffCoin": pushOffCoin, "pullToCoin": pullToCoin}
+
+
+def runScenario(scenario, parameters: dict, burnSeconds=5.0, settleSeconds=10.0) -> dict:
+    """Runs a scenario headless with the allomancy constants in parameters and returns its metrics. The player burns
+    for burnSeconds, then stops and is given up to settleSeconds to come to rest.
+
+    Returns:
+        dict: the parameters, followed by the peak height the player rose to, the largest allomantic force on the
+        player and the seconds it took to come to rest after burning stopped, which is nan if it never did
+    """
+    simulation, burning = SCENARIOS[scenario](IronSteelAllomancy(**parameters))
+    player = simulation.playerSprite
+    startY = player.position[1]
+    burnTicks = round(burnSeconds * simulation.tickRate)
+    settleTicks = round(settleSeconds * simulation.tickRate)
+
+    peakHeight = maxForce = 0.0
+    restTicks = None
+    idle = InputState(aimPos=burning.aimPos)
+    for tick in range(burnTicks + settleTicks):
+        simulation.step(burning if tick < burnTicks else idle)
+        peakHeight = max(peakHeight, startY - player.position[1])
+        maxForce = max(maxForce, math.hypot(*simulation.allomanticForce))
+        if tick >= burnTicks and not player.isAirborne and math.hypot(*player.velocity) < REST_SPEED:
+            restTicks = tick + 1 - burnTicks
+            break
+
+    return dict(parameters, scenario=scenario, peakHeight=peakHeight, maxForce=maxForce,
+                timeToRest=restTicks / simulation.tickRate if restTicks is not None else math.nan)
+
+
+def parseParameter(text):
+    """Parses a command line parameter range such as distanceConstant=50,100,200
+    """
+    name, _, values = text.partition("=")
+    names = [field.name for field in fields(IronSteelAllomancy)]
+    if name not in names:
+        raise argparse.ArgumentTypeError(f"{name} is not one of {', '.join(names)}")
+    return name, [float(value) for value in values.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Runs a scenario once for every combination of allomancy constants, in parallel, and tabulates "
+                    "the results")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="pushOffCoin")
+    parser.add_argument("--param", type=parseParameter, action="append", default=[],
+                        help="name=value1,value2,... of an IronSteelAllomancy constant to sweep, may be repeated")
+    parser.add_argument("--burn", type=float, default=5.0, help="seconds the player burns for")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", help="CSV file to write the results to, they are printed when not given")
+    args = parser.parse_args()
+
+    names = [name for name, _ in args.param]
+    grid = [dict(zip(names, values)) for values in itertools.product(*(values for _, values in args.param))]
+
+    with ProcessPoolExecutor(args.workers) as executor:
+        results = list(executor.map(runScenario, itertools.repeat(args.scenario), grid, itertools.repeat(args.burn)))
+
+    columns = names + ["peakHeight", "maxForce", "timeToRest"]
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        writer = csv.DictWriter(output, columns, extrasaction="ignore")
+        writer.writeheader()
+        for row in results:
+            writer.writerow({name: f"{value:.6g}" for name, value in row.items() if isinstance(value, float)})
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+from collections import OrderedDict
+import pygame
+
+
+class TextCache:
+    """Least recently used cache of rendered text surfaces, keyed by (font, text, colour, antialias). Text that has not
+    changed since it was last drawn costs a dictionary lookup instead of being rasterised again.
+    """
+
+    def __init__(self, maxSize=256):
+        self.maxSize = maxSize
+        self.surfaces = OrderedDict()
+
+    def render(self, font: pygame.font.Font, text, colour, antialias=True) -> pygame.Surface:
+        key = (font, text, colour, antialias)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = font.render(text, antialias, colour)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.maxSize:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+
+class GlyphAtlas:
+    """Individually rendered characters of one font and colour, for fields such as numbers that change every frame.
+    Drawing a string blits one cached glyph per character, so no text is ever rasterised after the first time each
+    character is seen.
+    """
+
+    def __init__(self, font: pygame.font.Font, colour, antialias=True):
+        self.font = font
+        self.colour = colour
+        self.antialias = antialias
+        self.glyphs = {}
+
+    def glyph(self, character) -> pygame.Surface:
+        surface = self.glyphs.get(character)
+        if surface is None:
+            surface = self.glyphs[character] = self.font.render(character, self.antialias, self.colour)
+        return surface
+
+    def size(self, text):
+        """Returns the width and height text will take up when drawn
+        """
+        glyphs = [self.glyph(character) for character in text]
+        return sum(glyph.get_width() for glyph in glyphs), self.font.get_height()
+
+    def draw(self, screen: pygame.Surface, text, topleft):
+        x, y = topleft
+        for character in text:
+            glyph = self.glyph(character)
+            screen.blit(glyph, (x, y))
+            x += glyph.get_width()
+
+
+class HudText:
+    """Draws labelled readouts, such as "mass: 20". Readouts that rarely change are rendered whole through a TextCache,
+    so an unchanged one costs a single blit. Volatile readouts, whose values change most frames, take their label from
+    the TextCache and their value from a GlyphAtlas so that nothing is rasterised again while they are on screen.
+    """
+
+    def __init__(self, font: pygame.font.Font, cache: TextCache = None):
+        self.font = font
+        self.cache = cache if cache is not None else TextCache()
+        self.atlases = {}
+
+    def atlas(self, colour, antialias=True) -> GlyphAtlas:
+        key = (colour, antialias)
+        atlas = self.atlases.get(key)
+        if atlas is None:
+            atlas = self.atlases[key] = GlyphAtlas(self.font, colour, antialias)
+        return atlas
+
+    def measure(self, label, value, colour, suffix="", volatile=False, antialias=True, **anchor) -> pygame.Rect:
+        """Returns the rect draw would cover with the same arguments, without drawing anything
+        """
+        if not volatile:
+            return self.cache.render(self.font, label + str(value) + suffix, colour, antialias).get_rect(**anchor)
+
+        labelSurface = self.cache.render(self.font, label, colour, antialias)
+        suffixSurface = self.cache.render(self.font, suffix, colour, antialias)
+        valueWidth, height = self.atlas(colour, antialias).size(str(value))
+
+        rect = pygame.Rect(0, 0, labelSurface.get_width() + valueWidth + suffixSurface.get_width(),
+                           max(height, labelSurface.get_height(), suffixSurface.get_height()))
+        for attribute, position in anchor.items():
+            setattr(rect, attribute, position)
+        return rect
+
+    def draw(self, screen: pygame.Surface, label, value, colour, suffix="", volatile=False, antialias=True,
+             **anchor) -> pygame.Rect:
+        """Draws a label followed by a value and an optional suffix, and returns the rect covered
+
+        Args:
+            screen (pygame.Surface): surface to draw on
+            label (str): text before the value
+            value: value to display, converted with str
+            colour (tuple): text colour
+            suffix (str, optional): text after the value, such as a unit. Defaults to "".
+            volatile (bool, optional): whether the value changes most frames. Defaults to False.
+            antialias (bool, optional): Defaults to True.
+            **anchor: a single pygame.Rect position attribute to place the text by, such as topleft=(5, 5)
+        """
+        if not volatile:
+            surface = self.cache.render(self.font, label + str(value) + suffix, colour, antialias)
+            rect = surface.get_rect(**anchor)
+            screen.blit(surface, rect)
+            return rect
+
+        rect = self.measure(label, value, colour, suffix, volatile, antialias, **anchor)
+        labelSurface = self.cache.render(self.font, label, colour, antialias)
+        suffixSurface = self.cache.render(self.font, suffix, colour, antialias)
+        atlas = self.atlas(colour, antialias)
+        valueText = str(value)
+
+        screen.blit(labelSurface, rect.topleft)
+        atlas.draw(screen, valueText, (rect.x + labelSurface.get_width(), rect.y))
+        screen.blit(suffixSurface, (rect.right - suffixSurface.get_width(), rect.y))
+        return rect
@@ -0,0 +1,109 @@
+import math
+from dataclasses import dataclass
+import numpy as np
+import numpy.typing as npt
+import functions
+
+
+@dataclass
+class AnchorOcclusion:
+    """Walls between one allomancer and the anchored bodies around it, as they were when last worked out
+    """
+    origin: npt.NDArray  # Allomancer's centre when the entry was made
+    count: int  # Bodies in the world when the entry was made, rows are only stable while this stays the same
+    positions: npt.NDArray  # (capacity,2) centre of each anchored body when its walls were counted
+    walls: npt.NDArray  # Walls crossed on the way to each anchored body
+    valid: npt.NDArray  # Rows whose walls have been counted
+
+
+class TileMap:
+    """Static level geometry, a grid of square tiles that are each either open or a wall. Walls occlude allomancy, the
+    force between an allomancer and a target is scaled by the world's wallOcclusionFactor for every wall the line
+    between their centres passes through.
+
+    Lines to anchored bodies are cached, as anchors do not move and the allomancer rarely moves far in a tick. Cached
+    wall counts are reused until the allomancer or the anchor moves more than a tile from where they were counted.
+    """
+
+    def __init__(self, columns, rows, tileSize=32):
+        self.tileSize = tileSize
+        self.walls = np.zeros((rows, columns), dtype=bool)  # Indexed [y, x]
+        self.version = 0  # Incremented whenever the walls change
+        self.anchorCache = {}  # AnchorOcclusion of each allomancer's world row
+
+    @classmethod
+    def covering(cls, width, height, tileSize=32) -> "TileMap":
+        """Returns an empty tile map covering a width by height area
+        """
+        return cls(math.ceil(width / tileSize), math.ceil(height / tileSize), tileSize)
+
+    def setWalls(self, x, y, width, height, wall=True):
+        """Makes every tile overlapping a rect a wall, or open when wall is False
+        """
+        tileSize = self.tileSize
+        left, top = max(math.floor(x / tileSize), 0), max(math.floor(y / tileSize), 0)
+        right, bottom = math.ceil((x + width) / tileSize), math.ceil((y + height) / tileSize)
+        self.walls[top:bottom, left:right] = wall
+        self.version += 1
+        self.anchorCache.clear()
+
+    def wallRects(self, area=None) -> list:
+        """Returns an (x, y, width, height) rect for every wall tile, or only those overlapping an area
+
+        Args:
+            area (tuple, optional): (x, y, width, height) rect to look in. Defaults to the whole map.
+        """
+        tileSize = self.tileSize
+        left = top = 0
+        walls = self.walls
+        if area is not None:
+            x, y, width, height = area
+            left, top = max(math.floor(x / tileSize), 0), max(math.floor(y / tileSize), 0)
+            walls = walls[top:math.ceil((y + height) / tileSize), left:math.ceil((x + width) / tileSize)]
+        return [((left + x) * tileSize, (top + y) * tileSize, tileSize, tileSize)
+                for y, x in np.argwhere(walls).tolist()]
+
+    def wallsCrossed(self, starts: npt.NDArray, ends: npt.NDArray) -> npt.NDArray:
+        """Returns the number of walls each line from starts to ends passes through, in pixel coordinates
+        """
+        return functions.wallsCrossed(self.walls, starts / self.tileSize, ends / self.tileSize)
+
+    def occlusion(self, world, sources: npt.NDArray, targets: npt.NDArray) -> npt.NDArray:
+        """Returns the factor each allomantic force between a pair of bodies is scaled by for the walls between them
+
+        Args:
+            world (PhysicsWorld): world the bodies are in, which holds the wallOcclusionFactor
+            sources (NDArray): row of the allomancer in each pair
+            targets (NDArray): row of the target in each pair
+        """
+        centres = world.position[:world.count] + world.size[:world.count] / 2
+        walls = np.empty(len(targets), dtype=np.int64)
+
+        moving = ~world.anchored[targets]
+        walls[moving] = self.wallsCrossed(centres[sources[moving]], centres[targets[moving]])
+
+        anchored = np.flatnonzero(~moving)
+        for source in np.unique(sources[anchored]).tolist():
+            pairs = anchored[sources[anchored] == source]
+            walls[pairs] = self.anchorWalls(world, centres, source, targets[pairs])
+
+        return world.allomancy.wallOcclusionFactor ** walls
+
+    def anchorWalls(self, world, centres: npt.NDArray, source, anchors: npt.NDArray) -> npt.NDArray:
+        """Returns the walls between an allomancer and some anchored bodies, counting only the ones that are not cached
+        """
+        entry = self.anchorCache.get(source)
+        if (entry is None or entry.count != world.count or
+                np.abs(centres[source] - entry.origin).max() > self.tileSize):
+            capacity = len(world.position)
+            entry = AnchorOcclusion(centres[source].copy(), world.count, np.zeros((capacity, 2)),
+                                    np.zeros(capacity, dtype=np.int64), np.zeros(capacity, dtype=bool))
+            self.anchorCache[source] = entry
+
+        stale = anchors[~entry.valid[anchors] |
+                        (np.abs(centres[anchors] - entry.positions[anchors]).max(axis=1) > self.tileSize)]
+        if len(stale):
+            entry.walls[stale] = self.wallsCrossed(np.broadcast_to(centres[source], (len(stale), 2)), centres[stale])
+            entry.positions[stale] = centres[stale]
+            entry.valid[stale] = True
+        return entry.walls[anchors]
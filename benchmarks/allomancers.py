@@ -0,0 +1,66 @@
+"""Measures how long the AllomancerSolver takes to apply the forces of many allomancers on many metal objects, with
+the negligible-force cutoff and with every allomancer acting on every object. Objects and allomancers are spread at a
+constant density, so the number of pairs within the cutoff grows with the number of allomancers only.
+
+Run from the repository root with: python -m benchmarks.allomancers
+"""
+import argparse
+import time
+import numpy as np
+from PhysicsWorld import PhysicsWorld
+from SpatialGrid import SpatialGrid
+from Allomancers import AllomancerSolver
+
+CELL_SIZE = 500
+OBJECTS_PER_SQUARE_PIXEL = 1 / 2500
+
+
+def buildWorld(objects, allomancers, rng):
+    side = (objects / OBJECTS_PER_SQUARE_PIXEL) ** 0.5
+    world = PhysicsWorld(capacity=objects + allomancers)
+    indices = world.addBodies(rng.uniform(0, side, (objects, 2)), np.full((objects, 2), 10.0), side, side)
+    world.metallic[indices] = True
+    world.charge[indices] = 1.0
+    rows = world.addBodies(rng.uniform(0, side, (allomancers, 2)), np.tile((20.0, 30.0), (allomancers, 1)), side,
+                           side, 20.0)
+    world.charge[rows] = 20.0 ** world.allomancy.chargePower
+    SpatialGrid(world, CELL_SIZE)
+    return world, rows
+
+
+def timeSolve(world, rows, negligibleForce, repeats):
+    solver = AllomancerSolver(world, negligibleForce)
+    for row in rows.tolist():
+        solver.add(row, steel=True)
+    solver.solve()
+    world.netForce[:] = 0
+    start = time.perf_counter()
+    for _ in range(repeats):
+        solver.solve()
+    elapsed = (time.perf_counter() - start) / repeats
+    forces = world.netForce[:world.count] / repeats
+    pairs = len(solver.neighbours(solver.cutoffs(solver.coefficients()))[1])
+    return elapsed, pairs, forces
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--objects", type=int, default=20_000)
+    parser.add_argument("--allomancers", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--negligible", type=float, default=1e-2, help="force below which pairs are skipped")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'allomancers':>12} {'pairs':>10} {'cutoff ms':>10} {'full pairs':>11} {'full ms':>10} {'max error':>10}")
+    for allomancers in args.allomancers:
+        world, rows = buildWorld(args.objects, allomancers, rng)
+        cutoff, pairs, forces = timeSolve(world, rows, args.negligible, args.repeats)
+        full, fullPairs, fullForces = timeSolve(world, rows, 0.0, args.repeats)
+        error = np.abs(forces - fullForces).max()
+        print(f"{allomancers:>12} {pairs:>10} {cutoff * 1e3:>10.2f} {fullPairs:>11} {full * 1e3:>10.2f} "
+              f"{error:>10.2g}")
+
+
+if __name__ == "__main__":
+    main()
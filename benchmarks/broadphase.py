@@ -0,0 +1,44 @@
+"""Measures the collision broadphase on a mixed population of coins with a share of slightly larger bodies among them,
+as the number of bodies grows. Reports the candidate pairs it finds and the milliseconds it takes, which should both
+grow about linearly with the number of bodies.
+
+Run from the repository root with: python -m benchmarks.broadphase
+"""
+import argparse
+import time
+import numpy as np
+from Collisions import CollisionSystem
+
+
+def mixedBodies(count, largeShare, density=0.25):
+    """Returns the positions and sizes of count 10 px coins spread over an area that keeps their density constant, with
+    largeShare of them 30 px across instead
+    """
+    rng = np.random.default_rng(0)
+    side = np.sqrt(count * 100 / density)
+    size = np.full((count, 2), 10.0)
+    size[rng.random(count) < largeShare] = 30.0
+    return rng.uniform(0, side, (count, 2)), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[5_000, 10_000, 20_000, 40_000])
+    parser.add_argument("--large-share", type=float, default=0.04)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    collisions = CollisionSystem()
+    print(f"{'bodies':>8} {'pairs':>10} {'ms':>8}")
+    for count in args.counts:
+        position, size = mixedBodies(count, args.large_share)
+        times = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            a, _ = collisions.broadphase(position, size)
+            times.append(time.perf_counter() - start)
+        print(f"{count:>8} {len(a):>10} {min(times) * 1e3:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Times loading levels of increasing size from a level file, against building the same level with one addObject call
+per object as main.py does. Level files are written to a temporary directory.
+
+Run from the repository root with: python -m benchmarks.levelLoading
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from Level import writeLevel, loadLevel  # noqa: E402
+from Simulation import Simulation  # noqa: E402
+
+WIDTH = 960
+HEIGHT = 540
+
+# Above this many objects building a level object by object is too slow to be worth timing
+MAX_PER_OBJECT = 10_000
+
+
+def randomLevel(count, rng) -> dict:
+    return {"position": rng.uniform((0, 0), (WIDTH - 10, HEIGHT - 10), (count, 2)),
+            "size": np.full((count, 2), 10.0),
+            "mass": rng.uniform(0.5, 20, count),
+            "metallic": rng.random(count) < 0.5,
+            "anchored": rng.random(count) < 0.1}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'objects':>10} {'file KiB':>10} {'load ms':>10} {'per object ms':>14}")
+    with tempfile.TemporaryDirectory() as directory:
+        for count in args.sizes:
+            level = randomLevel(count, rng)
+            path = os.path.join(directory, f"level{count}.npz")
+            writeLevel(path, **level)
+
+            simulation = Simulation(WIDTH, HEIGHT)
+            start = time.perf_counter()
+            loadLevel(path, simulation)
+            loadTime = time.perf_counter() - start
+
+            perObject = ""
+            if count <= MAX_PER_OBJECT:
+                simulation = Simulation(WIDTH, HEIGHT)
+                start = time.perf_counter()
+                for (x, y), (width, height), mass, metallic, anchored in zip(
+                        level["position"] + level["size"] / 2, level["size"], level["mass"], level["metallic"],
+                        level["anchored"]):
+                    simulation.addObject(x, y, width, height, metallic, mass, anchored)
+                perObject = f"{(time.perf_counter() - start) * 1000:.1f}"
+
+            print(f"{count:>10} {os.path.getsize(path) / 1024:>10.0f} {loadTime * 1000:>10.1f} {perObject:>14}")
+
+
+if __name__ == "__main__":
+    main()
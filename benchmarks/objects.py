@@ -0,0 +1,69 @@
+"""Measures the construction time and Python heap memory of each object, for objects built one at a time with
+addObject and for objects added in bulk with addObjects. Surface pixels are allocated by SDL and are not counted, but
+objects of the same size and colour share one surface.
+
+Run from the repository root with: python -m benchmarks.objects
+"""
+import argparse
+import os
+import time
+import tracemalloc
+import numpy as np
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from Simulation import Simulation  # noqa: E402
+
+WIDTH = 960
+HEIGHT = 540
+
+
+def newSimulation(count) -> Simulation:
+    simulation = Simulation(WIDTH, HEIGHT)
+    # Grow the world first so that reallocating its arrays is not counted
+    simulation.world._grow(count + simulation.world.count)
+    return simulation
+
+
+def measure(count, build):
+    """Returns the seconds and traced bytes per object that build takes to add count objects to a new simulation. Time
+    and memory are measured on separate runs, as tracing allocations slows them down.
+    """
+    simulation = newSimulation(count)
+    start = time.perf_counter()
+    build(simulation)
+    elapsed = time.perf_counter() - start
+
+    simulation = newSimulation(count)
+    tracemalloc.start()
+    build(simulation)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / count, memory / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    position = rng.uniform((0, 0), (WIDTH - 10, HEIGHT - 10), (args.count, 2))
+    size = np.full((args.count, 2), 10.0)
+    metallic = rng.random(args.count) < 0.5
+
+    def oneAtATime(simulation):
+        for (x, y), isMetallic in zip((position + 5).tolist(), metallic.tolist()):
+            simulation.addObject(x, y, 10, 10, isMetallic)
+
+    def bulk(simulation):
+        simulation.addObjects(position, size, 1.0, metallic)
+
+    print(f"{'':>12} {'us/object':>10} {'bytes/object':>13}")
+    for name, build in (("addObject", oneAtATime), ("addObjects", bulk)):
+        seconds, memory = measure(args.count, build)
+        print(f"{name:>12} {seconds * 1e6:>10.2f} {memory:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
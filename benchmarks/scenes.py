@@ -0,0 +1,175 @@
+"""Times each phase of a frame on synthetic scenes of increasing size and writes the results to a JSON file, so runs can
+be compared across commits and super-linear growth in any phase is caught early.
+
+Run from the repository root with: python -m benchmarks.scenes
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+import numpy as np
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame  # noqa: E402
+from Simulation import Simulation  # noqa: E402
+from Renderer import Renderer  # noqa: E402
+
+WIDTH = 960
+HEIGHT = 540
+AIM_POS = (WIDTH * 3 / 4, HEIGHT / 2)
+PHASES = ["doAllomancy", "update", "draw", "aimingCone", "targetLines"]
+
+# Growth in time per phase, relative to growth in object count, above which a phase is reported as super-linear
+SUPERLINEAR_EXPONENT = 1.3
+
+
+def buildScene(count, metallicFraction, anchoredFraction, seed=0) -> Simulation:
+    """Builds a simulation with count objects scattered over the screen, with the player steelpushing
+
+    Args:
+        count (int): number of objects
+        metallicFraction (float): fraction of objects that are metallic
+        anchoredFraction (float): fraction of objects that are perfectly anchored
+        seed (int, optional): seed for object placement. Defaults to 0.
+    """
+    rng = np.random.default_rng(seed)
+    simulation = Simulation(WIDTH, HEIGHT, (WIDTH / 2, HEIGHT / 2))
+    positions = rng.uniform((0, 0), (WIDTH, HEIGHT), (count, 2))
+    metallic = rng.random(count) < metallicFraction
+    anchored = rng.random(count) < anchoredFraction
+    for (x, y), isMetallic, isAnchored in zip(positions, metallic, anchored):
+        simulation.addObject(x, y, 10, 10, bool(isMetallic), 1.0, bool(isAnchored))
+    simulation.playerSprite.aSteel = True
+    return simulation
+
+
+def timeFrames(simulation: Simulation, frames):
+    """Runs a number of frames and returns the time in milliseconds each phase took on each frame
+    """
+    renderer = Renderer(pygame.Surface((WIDTH, HEIGHT)), simulation)
+    timings = {phase: [] for phase in PHASES}
+
+    def timed(phase, function, *args):
+        start = time.perf_counter()
+        function(*args)
+        timings[phase].append((time.perf_counter() - start) * 1000)
+
+    # What all_sprites.update() used to do: integrate every body, then the player's own per-tick logic
+    def update():
+        simulation.world.step()
+        simulation.feruchemy.step()
+        simulation.playerSprite.update()
+
+    for _ in range(frames):
+        renderer.drawBackground()
+        timed("doAllomancy", simulation.doAllomancy, AIM_POS)
+        timed("update", update)
+        timed("draw", renderer.drawSprites)
+        timed("aimingCone", renderer.drawAimingCone, AIM_POS)
+        timed("targetLines", renderer.drawTargetLines)
+    return timings
+
+
+def scalingExponents(results):
+    """Returns, for each phase, the slope of log(time) against log(object count) between each pair of consecutive
+    scene sizes. A slope of 1 is linear growth.
+    """
+    exponents = {phase: [] for phase in PHASES}
+    for smaller, larger in zip(results, results[1:]):
+        countRatio = math.log(larger["objects"] / smaller["objects"])
+        for phase in PHASES:
+            before = max(smaller["phases"][phase]["median"], 1e-6)
+            after = max(larger["phases"][phase]["median"], 1e-6)
+            exponents[phase].append(math.log(after / before) / countRatio)
+    return exponents
+
+
+def currentCommit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baselinePath, tolerance):
+    """Prints the change in median time per phase against a previous run and returns the phases that got slower than
+    tolerance allows
+    """
+    with open(baselinePath) as file:
+        baseline = {entry["objects"]: entry for entry in json.load(file)["results"]}
+
+    regressions = []
+    for entry in results:
+        previous = baseline.get(entry["objects"])
+        if previous is None:
+            continue
+        for phase in PHASES:
+            before = previous["phases"][phase]["median"]
+            after = entry["phases"][phase]["median"]
+            ratio = after / before if before > 0 else 1.0
+            print(f"{entry['objects']:>8} {phase:>12} {before:>10.3f} -> {after:>10.3f} ms ({ratio:.2f}x)")
+            if ratio > tolerance:
+                regressions.append((entry["objects"], phase, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1_000, 10_000, 100_000])
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--metallic", type=float, default=0.5, help="fraction of objects that are metallic")
+    parser.add_argument("--anchored", type=float, default=0.1, help="fraction of objects that are anchored")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_output.json")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="slowdown factor against --compare that counts as a regression")
+    args = parser.parse_args()
+
+    pygame.init()
+
+    results = []
+    for count in args.sizes:
+        simulation = buildScene(count, args.metallic, args.anchored, args.seed)
+        timings = timeFrames(simulation, args.frames)
+        phases = {phase: {"median": float(np.median(values)), "mean": float(np.mean(values)),
+                          "p95": float(np.percentile(values, 95))} for phase, values in timings.items()}
+        results.append({"objects": count, "phases": phases})
+        print(f"{count:>8} objects: " + ", ".join(f"{phase} {phases[phase]['median']:.3f} ms" for phase in PHASES))
+
+    exponents = scalingExponents(results)
+    superlinear = [phase for phase, values in exponents.items() if values and values[-1] > SUPERLINEAR_EXPONENT]
+    for phase in superlinear:
+        print(f"warning: {phase} grows super-linearly, exponent {exponents[phase][-1]:.2f} at the largest size")
+
+    report = {
+        "commit": currentCommit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pygame": pygame.version.ver,
+        "config": {"frames": args.frames, "metallic": args.metallic, "anchored": args.anchored, "seed": args.seed,
+                   "width": WIDTH, "height": HEIGHT},
+        "results": results,
+        "scalingExponents": exponents,
+        "superlinear": superlinear,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"results written to {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            for count, phase, ratio in regressions:
+                print(f"regression: {phase} with {count} objects is {ratio:.2f}x slower")
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Measures the cost of a tick once a scene full of objects has settled into piles, with bodies allowed to sleep and
+with every body kept awake, then the tick where a steelpush wakes the piles and how many bodies are asleep again
+afterwards.
+
+Run from the repository root with: python -m benchmarks.sleeping
+"""
+import argparse
+import os
+import time
+import numpy as np
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from Simulation import Simulation, InputState  # noqa: E402
+
+WIDTH, HEIGHT = 960, 540
+
+
+def timeScene(objects, settleTicks, ticks, sleeping):
+    """Returns the mean seconds per idle tick, the seconds of the tick that pushes, and the bodies asleep before the
+    push and settleTicks after it
+    """
+    rng = np.random.default_rng(0)
+    simulation = Simulation(WIDTH, HEIGHT, (100, HEIGHT - 40))
+    simulation.addObjects(rng.uniform((0, 0), (WIDTH - 10, HEIGHT - 10), (objects, 2)), np.full((objects, 2), 10.0),
+                          1.0, rng.random(objects) < 0.5)
+    world = simulation.world
+    world.canSleep[:world.count] = sleeping
+
+    idle = InputState()
+    for _ in range(settleTicks):
+        simulation.step(idle)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        simulation.step(idle)
+    idleSeconds = (time.perf_counter() - start) / ticks
+    asleep = int(world.asleep[:world.count].sum())
+
+    start = time.perf_counter()
+    simulation.step(InputState(aimPos=(WIDTH, HEIGHT), steel=True))
+    pushSeconds = time.perf_counter() - start
+    for _ in range(settleTicks):
+        simulation.step(idle)
+    return idleSeconds, pushSeconds, asleep, int(world.asleep[:world.count].sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--objects", type=int, nargs="+", default=[500, 2_000])
+    parser.add_argument("--settle", type=int, default=600, help="ticks for the scene to come to rest")
+    parser.add_argument("--ticks", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'objects':>8} {'awake ms':>9} {'sleeping ms':>12} {'asleep':>7} {'push ms':>8} {'asleep after':>13}")
+    for objects in args.objects:
+        awakeSeconds, _, _, _ = timeScene(objects, args.settle, args.ticks, False)
+        sleepingSeconds, pushSeconds, asleep, after = timeScene(objects, args.settle, args.ticks, True)
+        print(f"{objects:>8} {awakeSeconds * 1e3:>9.2f} {sleepingSeconds * 1e3:>12.2f} {asleep:>7} "
+              f"{pushSeconds * 1e3:>8.2f} {after:>13}")
+
+
+if __name__ == "__main__":
+    main()
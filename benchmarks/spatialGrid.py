@@ -0,0 +1,66 @@
+"""Shows how the cost of allomantic range queries scales with the number of objects in the world, comparing a brute
+force scan over every body with a SpatialGrid query. Objects are spread at a constant density, so the number of
+objects in range stays about the same as the world grows.
+
+Run from the repository root with: python -m benchmarks.spatialGrid
+"""
+import argparse
+import time
+import numpy as np
+from PhysicsWorld import PhysicsWorld
+from SpatialGrid import SpatialGrid
+
+QUERY_RADIUS = 500
+OBJECTS_PER_SQUARE_PIXEL = 1 / 2500
+
+
+def buildWorld(count, rng):
+    side = (count / OBJECTS_PER_SQUARE_PIXEL) ** 0.5
+    world = PhysicsWorld(capacity=count)
+    for x, y in rng.uniform(0, side, (count, 2)):
+        index = world.addBody(None, x, y, 20, 20, side, side)
+        world.metallic[index] = True
+    return world, side
+
+
+def timeIt(function, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'objects':>10} {'in range':>10} {'brute ms':>10} {'grid ms':>10} {'update ms':>10}")
+    for count in args.sizes:
+        world, side = buildWorld(count, rng)
+        grid = SpatialGrid(world, QUERY_RADIUS)
+        centre = np.array([side / 2, side / 2])
+
+        def bruteForce():
+            offsets = world.centres() - centre
+            return np.flatnonzero(np.einsum("ij,ij->i", offsets, offsets) <= QUERY_RADIUS ** 2)
+
+        def gridQuery():
+            return grid.queryRadius(centre, QUERY_RADIUS, True)
+
+        # Move a tenth of the objects a few pixels, as happens during play
+        moving = rng.choice(count, count // 10, replace=False)
+
+        def incrementalUpdate():
+            world.position[moving] += rng.uniform(-5, 5, (len(moving), 2))
+            grid.update()
+
+        assert np.array_equal(np.sort(gridQuery()), bruteForce())
+        print(f"{count:>10} {len(gridQuery()):>10} {timeIt(bruteForce, args.repeats) * 1000:>10.3f} "
+              f"{timeIt(gridQuery, args.repeats) * 1000:>10.3f} {timeIt(incrementalUpdate, args.repeats) * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Breaks the cost of launching the game down by phase, for the startup main.py does and for the one it used to do:
+pygame.init() for every subsystem, three pygame.font.SysFont calls scanning the system fonts and Numba imported with
+the kernels up front. Every launch runs in a fresh interpreter so that nothing is already imported or cached in
+memory. Font paths cached on disk by an earlier launch are used, as they would be by every launch after the first.
+
+Run from the repository root with: python -m benchmarks.startup
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+PHASES = ["import pygame", "import game", "init", "window", "fonts", "simulation", "first frame", "first push"]
+
+
+def launch(legacy):
+    """Goes through the startup of main.py once, printing the seconds each phase took as JSON
+    """
+    times = {}
+    last = time.perf_counter()
+
+    def mark(phase):
+        nonlocal last
+        now = time.perf_counter()
+        times[phase], last = now - last, now
+
+    import pygame
+    mark("import pygame")
+
+    import functions
+    from Simulation import Simulation, InputState
+    from Renderer import Renderer
+    from FrameProfiler import FrameProfiler  # noqa: F401
+    from Fonts import font
+    if legacy:
+        functions.loadKernels()
+    mark("import game")
+
+    if legacy:
+        pygame.init()
+    else:
+        pygame.display.init()
+    mark("init")
+
+    screen = pygame.display.set_mode((960, 540))
+    if not legacy and functions.HAVE_NUMBA:
+        threading.Thread(target=functions.loadKernels, daemon=True).start()
+    mark("window")
+
+    if legacy:
+        pygame.font.SysFont("freesanbold.ttf", 50)
+        pygame.font.SysFont("chalkduster.ttf", 50)
+        debugFont = pygame.font.SysFont("consolas", 20)
+    else:
+        debugFont = font("consolas", 20)
+    mark("fonts")
+
+    simulation = Simulation(960, 540)
+    simulation.addObject(500, 500, 20, 20, True, 20)
+    renderer = Renderer(screen, simulation, debugFont)
+    mark("simulation")
+
+    renderer.draw((0, 0), 60)
+    pygame.display.flip()
+    mark("first frame")
+
+    # The first tick that pushes on something runs the allomancy kernels, which waits for them to finish loading. In
+    # the game that happens while the player is still reacting to the first frame.
+    simulation.step(InputState(aimPos=(600, 500), steel=True))
+    mark("first push")
+    print(json.dumps(times))
+
+
+def timeLaunch(legacy) -> dict:
+    """Returns the seconds each phase of a launch in a new interpreter took, and the whole process as "process"
+    """
+    command = [sys.executable, "-m", "benchmarks.startup", "--launch"] + (["--legacy"] if legacy else [])
+    environment = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    start = time.perf_counter()
+    output = subprocess.run(command, capture_output=True, text=True, check=True, env=environment).stdout
+    times = json.loads(output.splitlines()[-1])
+    times["process"] = time.perf_counter() - start
+    return times
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--window", action="store_true", help="open a real window rather than a dummy display")
+    parser.add_argument("--launch", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--legacy", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if not args.window:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    if args.launch:
+        launch(args.legacy)
+        return
+
+    results = {legacy: [timeLaunch(legacy) for _ in range(args.runs)] for legacy in (True, False)}
+    print(f"median of {args.runs} launches, ms")
+    print(f"{'phase':<14} {'legacy':>8} {'current':>8}")
+    for times in results[True] + results[False]:
+        times["to first frame"] = sum(times[phase] for phase in PHASES[:PHASES.index("first frame") + 1])
+    for phase in PHASES + ["to first frame", "process"]:
+        legacy, current = (median([times[phase] for times in results[mode]]) * 1e3 for mode in (True, False))
+        print(f"{phase:<14} {legacy:>8.1f} {current:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Measures the cost of drawing a frame as the number of anchored objects grows with the number of moving objects held
+constant. Anchored objects are drawn once into the renderer's static layer, so after the first frame, which builds the
+layer, drawing the objects should cost about the same however many of them there are. Anchored metal in range still
+gets a target line each, which are timed separately.
+
+Run from the repository root with: python -m benchmarks.staticLayer
+"""
+import argparse
+import os
+import time
+import numpy as np
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame  # noqa: E402
+from Simulation import Simulation, InputState  # noqa: E402
+from Renderer import Renderer  # noqa: E402
+from Fonts import font  # noqa: E402
+from FrameProfiler import FrameProfiler  # noqa: E402
+
+WIDTH, HEIGHT = 960, 540
+AIM_POS = (WIDTH, HEIGHT / 2)
+
+
+def timeDraw(anchored, moving, frames):
+    """Returns the milliseconds the first frame took to draw, then the median milliseconds of the frames after it spent
+    on the objects and on the target lines, and the number of target lines
+    """
+    rng = np.random.default_rng(0)
+    simulation = Simulation(WIDTH, HEIGHT, (100, HEIGHT - 40))
+    simulation.addObjects(rng.uniform((0, 0), (WIDTH - 10, HEIGHT - 10), (anchored, 2)), np.full((anchored, 2), 10.0),
+                          1.0, rng.random(anchored) < 0.5, True)
+    simulation.addObjects(rng.uniform((0, 0), (WIDTH - 10, HEIGHT - 10), (moving, 2)), np.full((moving, 2), 10.0),
+                          1.0, rng.random(moving) < 0.5)
+    renderer = Renderer(pygame.Surface((WIDTH, HEIGHT)), simulation, font("consolas", 20))
+
+    inputs = InputState(aimPos=AIM_POS, steel=True)
+    simulation.step(inputs)
+    start = time.perf_counter()
+    renderer.draw(AIM_POS)
+    first = (time.perf_counter() - start) * 1e3
+
+    # The profiler's draw phase is the static layer, HUD and objects
+    profiler = renderer.profiler = FrameProfiler(capacity=frames)
+    for _ in range(frames):
+        simulation.step(inputs)
+        profiler.beginFrame()
+        renderer.draw(AIM_POS)
+        profiler.endFrame()
+    medians = profiler.percentiles((50,))[0]
+    lines = len(simulation.targeting.indices)
+    return first, medians[profiler.phaseIndices["draw"]], medians[profiler.phaseIndices["targetLines"]], lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--anchored", type=int, nargs="+", default=[0, 1_000, 10_000, 50_000])
+    parser.add_argument("--moving", type=int, default=200)
+    parser.add_argument("--frames", type=int, default=30)
+    args = parser.parse_args()
+
+    pygame.init()
+    print(f"{'anchored':>9} {'first frame ms':>15} {'objects ms':>11} {'lines':>6} {'lines ms':>9}")
+    for anchored in args.anchored:
+        first, objects, lines, count = timeDraw(anchored, args.moving, args.frames)
+        print(f"{anchored:>9} {first:>15.2f} {objects:>11.2f} {count:>6} {lines:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
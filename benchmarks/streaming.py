@@ -0,0 +1,58 @@
+"""Shows how the cost of a tick scales with the width of a level, with every object simulated and with only the chunks
+around the player kept in the world by a ChunkStreamer. Objects are spread at a constant density and the player runs
+right for the whole run, so chunks keep being thawed and frozen.
+
+Run from the repository root with: python -m benchmarks.streaming
+"""
+import argparse
+import os
+import time
+import numpy as np
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from Simulation import Simulation, InputState  # noqa: E402
+from Chunks import ChunkStreamer  # noqa: E402
+
+HEIGHT = 1080
+OBJECTS_PER_SQUARE_PIXEL = 1 / 5000
+
+
+def timeLevel(width, streaming, ticks, rng):
+    """Returns the mean seconds per tick and the number of bodies in the world at the end of the run
+    """
+    simulation = Simulation(width, HEIGHT, (300, HEIGHT - 30))
+    count = int(width * HEIGHT * OBJECTS_PER_SQUARE_PIXEL)
+    position = rng.uniform((0, 0), (width - 10, HEIGHT - 10), (count, 2))
+    size = np.full((count, 2), 10.0)
+    metallic = rng.random(count) < 0.5
+    if streaming:
+        simulation.chunks = ChunkStreamer(simulation)
+        simulation.chunks.addObjects(position, size, 1.0, metallic)
+    else:
+        simulation.addObjects(position, size, 1.0, metallic)
+
+    inputs = InputState(aimPos=(width, HEIGHT), moveRight=True, steel=True)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        simulation.step(inputs)
+    return (time.perf_counter() - start) / ticks, simulation.world.count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--widths", type=int, nargs="+", default=[5_000, 20_000, 80_000])
+    parser.add_argument("--ticks", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'width':>8} {'objects':>8} {'all ms':>8} {'streamed ms':>12} {'in world':>9}")
+    for width in args.widths:
+        allSeconds, _ = timeLevel(width, False, args.ticks, rng)
+        streamedSeconds, active = timeLevel(width, True, args.ticks, rng)
+        count = int(width * HEIGHT * OBJECTS_PER_SQUARE_PIXEL)
+        print(f"{width:>8} {count:>8} {allSeconds * 1e3:>8.2f} {streamedSeconds * 1e3:>12.2f} {active:>9}")
+
+
+if __name__ == "__main__":
+    main()
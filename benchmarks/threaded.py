@@ -0,0 +1,80 @@
+"""Compares drawing a busy scene with the simulation advanced on the drawing thread against advancing it on a
+SimulationThread, for a fixed stretch of real time. Reports the frames drawn, the ticks simulated and the longest frame
+of each. On one core the worker can only interleave with drawing, with more it runs alongside it.
+
+Run from the repository root with: python -m benchmarks.threaded
+"""
+import argparse
+import os
+import time
+import numpy as np
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame  # noqa: E402
+from Simulation import Simulation, InputState  # noqa: E402
+from Renderer import Renderer  # noqa: E402
+from SimulationThread import SimulationThread  # noqa: E402
+from Fonts import font  # noqa: E402
+
+WIDTH, HEIGHT = 960, 540
+AIM_POS = (WIDTH, HEIGHT / 2)
+
+
+def buildScene(objects) -> Simulation:
+    rng = np.random.default_rng(0)
+    simulation = Simulation(WIDTH, HEIGHT, (100, HEIGHT - 40))
+    simulation.addObjects(rng.uniform((0, 0), (WIDTH - 10, HEIGHT - 10), (objects, 2)), np.full((objects, 2), 10.0),
+                          1.0, rng.random(objects) < 0.5)
+    return simulation
+
+
+def timeFrames(objects, seconds, threaded):
+    """Returns the frames drawn, the ticks simulated and the longest frame in seconds. The player steelpushes on and
+    off every half second so that the scene never comes to rest.
+    """
+    simulation = buildScene(objects)
+    renderer = Renderer(pygame.Surface((WIDTH, HEIGHT)), simulation, font("consolas", 20))
+    worker = SimulationThread(simulation) if threaded else None
+    if worker is not None:
+        worker.start()
+
+    inputs = InputState(aimPos=AIM_POS)
+    frames, frameTime, longest = 0, 0.0, 0.0
+    start = last = time.perf_counter()
+    while last - start < seconds:
+        inputs.steel = int((last - start) * 2) % 2 == 0
+        if worker is None:
+            alpha = simulation.advance(frameTime, inputs)
+            snapshot = None
+        else:
+            worker.send(inputs)
+            snapshot, alpha = worker.latest()
+        renderer.draw(inputs.aimPos, None, alpha, snapshot)
+
+        now = time.perf_counter()
+        frameTime, last = now - last, now
+        frames, longest = frames + 1, max(longest, frameTime)
+
+    if worker is not None:
+        worker.stop()
+    return frames, simulation.tick, longest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--objects", type=int, nargs="+", default=[500, 2_000])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    pygame.init()
+    print(f"{'objects':>8} {'mode':>9} {'frames':>7} {'ticks':>6} {'longest frame ms':>17}")
+    for objects in args.objects:
+        for threaded in (False, True):
+            frames, ticks, longest = timeFrames(objects, args.seconds, threaded)
+            mode = "threaded" if threaded else "single"
+            print(f"{objects:>8} {mode:>9} {frames:>7} {ticks:>6} {longest * 1e3:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
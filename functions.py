@@ -1,6 +1,13 @@
+import importlib.util
+import math
+import threading
 import numpy as np
 import numpy.typing as npt
 
+# Numba is optional, when it is installed the fused kernels are compiled, otherwise they run as plain NumPy. Importing
+# it takes longer than the rest of startup put together, so it is only imported by loadKernels.
+HAVE_NUMBA = importlib.util.find_spec("numba") is not None
+
 
 def clampMagnitude(vector: npt.NDArray, maxMagnitude: float):
     magnitude = np.linalg.norm(vector)
@@ -16,3 +23,220 @@ def vectorProject(vector: npt.NDArray, direction: npt.NDArray):
         # Return a zero vector if direction is zero
         return np.zeros_like(vector)
     return (np.dot(vector, direction) / direction_norm_squared) * direction
+
+
+# Batched kernels, each works on every row of an (N,2) array at once
+
+
+def rowMagnitudes(vectors: npt.NDArray) -> npt.NDArray:
+    return np.sqrt(np.einsum("ij,ij->i", vectors, vectors))
+
+
+def rowDot(a: npt.NDArray, b: npt.NDArray) -> npt.NDArray:
+    return np.einsum("ij,ij->i", a, b)
+
+
+def normaliseRows(vectors: npt.NDArray):
+    """Returns each row scaled to unit length, leaving zero length rows as zero, and the length of each row
+    """
+    magnitudes = rowMagnitudes(vectors)
+    unit = np.divide(vectors, magnitudes[:, None], out=np.zeros_like(vectors), where=magnitudes[:, None] > 0)
+    return unit, magnitudes
+
+
+def clampMagnitudeRows(vectors: npt.NDArray, maxMagnitude: float) -> npt.NDArray:
+    """Row-wise clampMagnitude
+    """
+    magnitudes = rowMagnitudes(vectors)
+    scale = np.minimum(1.0, maxMagnitude / np.maximum(magnitudes, 1e-300))
+    return vectors * scale[:, None]
+
+
+def vectorProjectRows(vectors: npt.NDArray, directions: npt.NDArray) -> npt.NDArray:
+    """Row-wise vectorProject, projecting each row of vectors onto the same row of directions
+    """
+    normsSquared = rowDot(directions, directions)
+    scale = np.divide(rowDot(vectors, directions), normsSquared,
+                      out=np.zeros_like(normsSquared), where=normsSquared > 0)
+    return directions * scale[:, None]
+
+
+def exponentialFalloff(distances: npt.NDArray, distanceConstant: float) -> npt.NDArray:
+    """Returns the fraction of allomantic force left at each distance, between 0 and 1
+    """
+    return np.exp(-distances / distanceConstant)
+
+
+def _allomanticForcesNumPy(directions, distances, relativeVelocities, charges, coefficient, distanceConstant,
+                           velocityConstant, maxForce):
+    magnitudes = np.clip(coefficient * charges * exponentialFalloff(distances, distanceConstant), -maxForce, maxForce)
+
+    relativeSpeeds = rowDot(relativeVelocities, directions)
+    velocityFactors = 1 - exponentialFalloff(np.abs(relativeSpeeds), velocityConstant)
+    velocityFactors[relativeSpeeds > 0] *= -1
+
+    return (magnitudes * (1 - velocityFactors))[:, None] * directions
+
+
+def _allomanticForcesLoop(directions, distances, relativeVelocities, charges, coefficient, distanceConstant,
+                          velocityConstant, maxForce):
+    forces = np.empty_like(directions)
+    for i in range(len(distances)):
+        magnitude = coefficient * charges[i] * math.exp(-distances[i] / distanceConstant)
+        magnitude = min(max(magnitude, -maxForce), maxForce)
+
+        relativeSpeed = relativeVelocities[i, 0] * directions[i, 0] + relativeVelocities[i, 1] * directions[i, 1]
+        velocityFactor = 1 - math.exp(-abs(relativeSpeed) / velocityConstant)
+        if relativeSpeed > 0:
+            velocityFactor = -velocityFactor
+
+        magnitude *= 1 - velocityFactor
+        forces[i, 0] = magnitude * directions[i, 0]
+        forces[i, 1] = magnitude * directions[i, 1]
+    return forces
+
+
+def allomanticForces(directions: npt.NDArray, distances: npt.NDArray, relativeVelocities: npt.NDArray,
+                     charges: npt.NDArray, coefficient: float, distanceConstant: float, velocityConstant: float,
+                     maxForce: float) -> npt.NDArray:
+    """Fused kernel for the net force on an allomancer from each of its targets, N = F + B, where F is the allomantic
+    force with exponential distance falloff and B the restitution from the relative velocity along the line between
+    them. The force on each target is the negative of its row.
+
+    Args:
+        directions (NDArray): (N,2) unit vectors from the allomancer to each target
+        distances (NDArray): (N,) distance to each target
+        relativeVelocities (NDArray): (N,2) velocity of each target minus the allomancer's
+        charges (NDArray): (N,) allomantic charge of each target
+        coefficient (float): product of the allomantic constant, strength and the allomancer's charge, negative when
+            pushing
+        distanceConstant (float): lower values mean faster falloff with distance
+        velocityConstant (float): scale of the velocity restitution
+        maxForce (float): largest allowed allomantic force magnitude
+    """
+    if _allomanticForcesKernel is None:
+        loadKernels()
+    return _allomanticForcesKernel(directions, distances, relativeVelocities, charges, float(coefficient),
+                                   float(distanceConstant), float(velocityConstant), float(maxForce))
+
+
+def _wallsCrossedNumPy(walls, starts, ends):
+    cell = np.floor(starts).astype(np.int64)
+    endCell = np.floor(ends).astype(np.int64)
+    delta = ends - starts
+    step = np.sign(delta).astype(np.int64)
+
+    # Distance along each ray, as a fraction of its length, to the next cell boundary on each axis and between them
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tDelta = np.abs(1 / delta)
+        tMax = np.where(delta > 0, (cell + 1 - starts) / delta, (cell - starts) / delta)
+    tMax[delta == 0] = np.inf
+
+    rows, columns = walls.shape
+    steps = np.abs(endCell - cell).sum(axis=1)
+    counts = np.zeros(len(starts), dtype=np.int64)
+    inWall = np.zeros(len(starts), dtype=bool)
+    inside = (cell[:, 0] >= 0) & (cell[:, 0] < columns) & (cell[:, 1] >= 0) & (cell[:, 1] < rows)
+    inWall[inside] = walls[cell[inside, 1], cell[inside, 0]]
+
+    active = np.flatnonzero(steps > 0)
+    taken = 0
+    while len(active):
+        axis = (tMax[active, 1] < tMax[active, 0]).astype(np.intp)
+        cell[active, axis] += step[active, axis]
+        tMax[active, axis] += tDelta[active, axis]
+        taken += 1
+
+        # The cell a ray ends in is not crossed, it holds the target
+        x, y = cell[active, 0], cell[active, 1]
+        wall = (x >= 0) & (x < columns) & (y >= 0) & (y < rows) & (steps[active] > taken)
+        wall[wall] = walls[y[wall], x[wall]]
+        counts[active] += wall & ~inWall[active]
+        inWall[active] = wall
+        active = active[steps[active] > taken]
+    return counts
+
+
+def _wallsCrossedLoop(walls, starts, ends):
+    rows, columns = walls.shape
+    counts = np.zeros(len(starts), dtype=np.int64)
+    for i in range(len(starts)):
+        x = int(math.floor(starts[i, 0]))
+        y = int(math.floor(starts[i, 1]))
+        dx = ends[i, 0] - starts[i, 0]
+        dy = ends[i, 1] - starts[i, 1]
+        steps = abs(int(math.floor(ends[i, 0])) - x) + abs(int(math.floor(ends[i, 1])) - y)
+        stepX = 1 if dx > 0 else -1
+        stepY = 1 if dy > 0 else -1
+        tDeltaX = abs(1 / dx) if dx != 0 else math.inf
+        tDeltaY = abs(1 / dy) if dy != 0 else math.inf
+        if dx > 0:
+            tMaxX = (x + 1 - starts[i, 0]) / dx
+        elif dx < 0:
+            tMaxX = (x - starts[i, 0]) / dx
+        else:
+            tMaxX = math.inf
+        if dy > 0:
+            tMaxY = (y + 1 - starts[i, 1]) / dy
+        elif dy < 0:
+            tMaxY = (y - starts[i, 1]) / dy
+        else:
+            tMaxY = math.inf
+
+        inWall = 0 <= x < columns and 0 <= y < rows and walls[y, x]
+        for taken in range(1, steps + 1):
+            if tMaxY < tMaxX:
+                y += stepY
+                tMaxY += tDeltaY
+            else:
+                x += stepX
+                tMaxX += tDeltaX
+            wall = taken < steps and 0 <= x < columns and 0 <= y < rows and walls[y, x]
+            if wall and not inWall:
+                counts[i] += 1
+            inWall = wall
+    return counts
+
+
+def wallsCrossed(walls: npt.NDArray, starts: npt.NDArray, ends: npt.NDArray) -> npt.NDArray:
+    """Grid traversal (DDA) kernel counting the walls each of a batch of line segments passes through. A run of
+    adjacent wall cells along a segment counts as one wall, and the cells the segment starts and ends in are not
+    counted, so a target embedded in a wall is not occluded by it.
+
+    Args:
+        walls (NDArray): (rows, columns) boolean grid, indexed [y, x], everything outside it is open
+        starts (NDArray): (N,2) start of each segment in cell units
+        ends (NDArray): (N,2) end of each segment in cell units
+    """
+    if _wallsCrossedKernel is None:
+        loadKernels()
+    return _wallsCrossedKernel(np.ascontiguousarray(walls, dtype=np.bool_), np.asarray(starts, dtype=np.float64),
+                               np.asarray(ends, dtype=np.float64))
+
+
+# Set by loadKernels
+_allomanticForcesKernel = None
+_wallsCrossedKernel = None
+_kernelsLock = threading.Lock()
+
+
+def loadKernels():
+    """Compiles the fused kernels with Numba when it is installed, otherwise picks their NumPy versions. Runs the first
+    time a kernel is called, or earlier on a background thread to keep the cost out of the first tick that needs one.
+    """
+    global _allomanticForcesKernel, _wallsCrossedKernel
+    with _kernelsLock:
+        if _allomanticForcesKernel is not None:
+            return
+        if HAVE_NUMBA:
+            import numba
+            wallsCrossedKernel = numba.njit(cache=True)(_wallsCrossedLoop)
+            allomanticForcesKernel = numba.njit(cache=True)(_allomanticForcesLoop)
+
+            # Kernels are compiled, or loaded from Numba's cache, by their first call, so make it here on tiny inputs
+            wallsCrossedKernel(np.zeros((1, 1), dtype=np.bool_), np.zeros((1, 2)), np.zeros((1, 2)))
+            allomanticForcesKernel(np.zeros((1, 2)), np.ones(1), np.zeros((1, 2)), np.zeros(1), 0.0, 1.0, 1.0, 1.0)
+            _wallsCrossedKernel, _allomanticForcesKernel = wallsCrossedKernel, allomanticForcesKernel
+        else:
+            _wallsCrossedKernel = _wallsCrossedNumPy
+            _allomanticForcesKernel = _allomanticForcesNumPy
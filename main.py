@@ -1,29 +1,33 @@
+import threading
 import pygame as pg
-import pygame.display
-import pygame.event
-import pygame.sprite
-import pygame.locals
-from Classes import PlayerSprite, Object
+import pygame
+import functions
+from Simulation import Simulation, InputState
+from Renderer import Renderer, Camera
+from FrameProfiler import FrameProfiler
+from Fonts import font
 
 # Define some global settings variables
 FRAMERATE_CAP = 60
 DISPLAY_FPS = True  
+DIRTY_RECTS = False  # Only repaint the parts of the screen that changed
+LEVEL_FILE = None  # Level file to load extra objects from, see Level.py
+RECORD_FILE = None  # File to record every frame's input to, replay it with: python Replay.py <file>
+WALLS = []  # (x, y, width, height) rects of level geometry that block allomancy, such as (600, 200, 40, 300)
+LEVEL_SIZE = None  # (width, height) of a level larger than the window, the camera follows the player through it
+CHUNK_SIZE = 512  # Only objects in the chunks around the player's are simulated in a level larger than the window
+THREADED = False  # Step the simulation on a worker thread and draw the snapshots it publishes
 
 
 # WIDTH = 1500
 # HEIGHT = 500
 
-pygame.init()
+# Only the display is needed, which brings up events, the keyboard and the mouse. Fonts start on first use.
+pygame.display.init()
 
 WIDTH = pygame.display.Info().current_w/2
 HEIGHT = pygame.display.Info().current_h/2
 
-# Set up text
-pygame.font.init()
-font1 = pygame.font.SysFont("freesanbold.ttf", 50)
-font2 = pygame.font.SysFont("chalkduster.ttf", 50)
-DEBUG_FONT = pygame.font.SysFont("consolas", 20)
-
 # Create clock object
 clock = pygame.time.Clock()
 
@@ -32,46 +36,65 @@ screen = pygame.display.set_mode((WIDTH, HEIGHT))  # , pygame.FULLSCREEN)
 pygame.display.set_caption("Hemalurgist")
 pygame.event.set_grab(True)
 
-# Create list of all sprites
-all_sprites = pygame.sprite.Group()
-
-# Create player sprite
-playerSprite = PlayerSprite(300, 500, (255, 0, 0), 30, 20, WIDTH, HEIGHT)
-
-# Create object sprites
-objectsGroup = pg.sprite.Group()
-# objectsGroup.add(Object(400, 0, 20, 20,  WIDTH, HEIGHT, True, 0.5))
-# objectsGroup.add(Object(500, 300, 20, 20, WIDTH, HEIGHT, True))
-objectsGroup.add(Object(300, 500, 20, 20, WIDTH, HEIGHT, True, 20))
-# objectsGroup.add(Object(600, 400, 20, 20, WIDTH, HEIGHT, True, 2, True))
-# objectsGroup.add(Object(800, 400, 20, 20, WIDTH, HEIGHT, True, 2, True))
-
-
-all_sprites.add(playerSprite, *objectsGroup)
-
-
-def doAllomancy():
+# Compile the fused kernels while the first frames are drawn, rather than during the first steelpush
+if functions.HAVE_NUMBA:
+    threading.Thread(target=functions.loadKernels, daemon=True).start()
 
-    # Old Method
 
-    # Perform steelpush
-    # if playerSprite.aSteel:
-    #     playerSprite.steelpush(objectsGroup)
+# Set up text, the font is only created the first time text is drawn
+def debugFont() -> pygame.font.Font:
+    return font("consolas", 20)
 
-    # if playerSprite.aIron:
-    #     playerSprite.ironpull(objectsGroup)
 
-    # New Method
-
-    if playerSprite.aSteel:
-        for obj in objectsGroup:
-            if playerSprite.isValidTarget(obj):
-                playerSprite.calculateForce(obj, True)
-    if playerSprite.aIron:
-        for obj in objectsGroup:
-            if playerSprite.isValidTarget(obj):
-                playerSprite.calculateForce(obj, False)
+# All game logic lives in the simulation, this loop only gathers input and draws
+LEVEL_WIDTH, LEVEL_HEIGHT = LEVEL_SIZE if LEVEL_SIZE is not None else (WIDTH, HEIGHT)
+simulation = Simulation(LEVEL_WIDTH, LEVEL_HEIGHT)
+if LEVEL_SIZE is not None:
+    from Chunks import ChunkStreamer
+    simulation.chunks = ChunkStreamer(simulation, CHUNK_SIZE)
+world = simulation.world
+playerSprite = simulation.playerSprite
+all_sprites = simulation.all_sprites
+objectsGroup = simulation.objectsGroup
 
+# Create object sprites
+# simulation.addObject(400, 0, 20, 20, True, 0.5)
+# simulation.addObject(500, 300, 20, 20, True)
+simulation.addObject(300, 500, 20, 20, True, 20)
+# simulation.addObject(600, 400, 20, 20, True, 2, True)
+# simulation.addObject(800, 400, 20, 20, True, 2, True)
+# Modules of optional features are only imported when they are turned on
+if LEVEL_FILE is not None:
+    from Level import loadLevel
+    loadLevel(LEVEL_FILE, simulation)
+if WALLS:
+    from TileMap import TileMap
+    world.tileMap = TileMap.covering(LEVEL_WIDTH, LEVEL_HEIGHT)
+    for wall in WALLS:
+        world.tileMap.setWalls(*wall)
+
+camera = Camera(WIDTH, HEIGHT)
+renderer = Renderer(screen, simulation, debugFont, DIRTY_RECTS, camera)
+
+# Per-stage frame timings, F3 shows them and F4 writes them to disk. The worker's ticks are not timed, as they no
+# longer happen during a frame.
+profiler = renderer.profiler = FrameProfiler()
+if not THREADED:
+    simulation.profiler = profiler
+
+# Held inputs carry over between frames, the rest are reset every frame
+inputs = InputState()
+recorder = None
+if RECORD_FILE is not None:
+    from Replay import InputRecorder
+    recorder = InputRecorder(simulation)
+
+# From here on only the worker touches the simulation, this loop sends it input and draws what it publishes
+worker = None
+if THREADED:
+    from SimulationThread import SimulationThread
+    worker = SimulationThread(simulation, recorder)
+    worker.start()
 
 # Game loop
 running = True
@@ -79,107 +102,97 @@ running = True
 while running:
     # print("New Frame")
 
-    # Set max framerate to 60
-    clock.tick(FRAMERATE_CAP)
-
-    screen.fill((0, 0, 0))
-
-    # Display FPS in top left
-    if DISPLAY_FPS:
-        fps_text = DEBUG_FONT.render(
-            str(int(clock.get_fps()))+"fps", True, (0, 255, 0))
-        fps_rect = fps_text.get_rect()
-        fps_rect.topleft = (5, 5)
-        screen.blit(fps_text, fps_rect)
-
-    ironMM_text = DEBUG_FONT.render(
-        "metalmind storage: " + str(playerSprite.metalMinds["iron"]), True, (0, 255, 0))
-    ironMM_rect = ironMM_text.get_rect()
-    ironMM_rect.topleft = (80, 5)
-    screen.blit(ironMM_text, ironMM_rect)
-
-    stage_text = DEBUG_FONT.render(
-        "stage: " + str(playerSprite.feruchemyFlags["iron"]), True, (0, 255, 0))
-    stage_rect = stage_text.get_rect()
-    stage_rect.topright = (1060, 5)
-    screen.blit(stage_text, stage_rect)
-
-    weight_text = DEBUG_FONT.render(
-        "mass:" + str(playerSprite.mass), True, (0, 255, 0))
-    weight_rect = weight_text.get_rect()
-    weight_rect.topleft = (800, 5)
-    screen.blit(weight_text, weight_rect)
+    # Set max framerate to 60, the simulation runs at its own fixed tick rate regardless
+    frameTime = clock.tick(FRAMERATE_CAP) / 1000
+    profiler.beginFrame()
+
+    inputs.jump = inputs.releaseJump = False
+    inputs.ironMetalmindChange = 0
 
     # Detect inputs
     for event in pygame.event.get():
+        profiler.handleEvent(event)
         if event.type == pg.QUIT:
             running = False
         if event.type == pg.KEYDOWN:
             if event.key == pg.K_ESCAPE:
                 running = False
             if event.key == pg.K_SPACE:
-                playerSprite.jump()
+                inputs.jump = True
             # Temp event triggers for working on laptop
             if event.key == pg.K_LEFT:
-                playerSprite.aSteel = True
+                inputs.steel = True
             if event.key == pg.K_RIGHT:
-                playerSprite.aIron = True
+                inputs.iron = True
             if event.key == pg.K_UP:
-                playerSprite.changeMetalmindRate("iron", 1)
+                inputs.ironMetalmindChange += 1
             if event.key == pg.K_DOWN:
-                playerSprite.changeMetalmindRate("iron", -1)
+                inputs.ironMetalmindChange -= 1
             ###############################
         if event.type == pg.KEYUP:
             if event.key == pg.K_SPACE:
-                playerSprite.releaseJump()
+                inputs.releaseJump = True
 
             # Temp event triggers for working on laptop
             if event.key == pg.K_LEFT:
-                playerSprite.aSteel = False
+                inputs.steel = False
             if event.key == pg.K_RIGHT:
-                playerSprite.aIron = False
+                inputs.iron = False
             ################################
         if event.type == pg.MOUSEBUTTONDOWN:
             if event.button == 1:
-                playerSprite.aSteel = True
+                inputs.steel = True
             if event.button == 3:
-                playerSprite.aIron = True
+                inputs.iron = True
         if event.type == pg.MOUSEBUTTONUP:
             if event.button == 1:
-                playerSprite.aSteel = False
+                inputs.steel = False
             if event.button == 3:
-                playerSprite.aIron = False
+                inputs.iron = False
+
+    profiler.mark("events")
 
     # Handle movement input
     keys = pygame.key.get_pressed()
-    if keys[pygame.K_a]:
-        playerSprite.moveLeft()
-    elif keys[pygame.K_d]:
-        playerSprite.moveRight()
-    # else:
-    #     playerSprite.stop()  # Decelerate when no key is pressed
-
-    doAllomancy()
-
-    # Draw all sprites
-    all_sprites.update()
-    all_sprites.draw(screen)
-
-    # Draw player's aiming cone
-    coneSurface = playerSprite.createAimingCone(WIDTH, HEIGHT)
-    screen.blit(coneSurface, (0, 0))
-
-    for obj in objectsGroup:
-        if obj.is_metallic:
-            # Calculate the distance to determine if the line should be drawn
-            inRange, objVector, distance = playerSprite.objectInRange(obj)
-            if inRange:
-                pygame.draw.line(screen, (100, 200, 255) if (playerSprite.isPushPulling) and playerSprite.objectInTargettingCone(objVector) else (100, 100, 255),
-                                 playerSprite.rect.center, obj.rect.center, 2)
+    inputs.moveLeft = keys[pygame.K_a]
+    inputs.moveRight = keys[pygame.K_d]
+    inputs.aimPos = camera.toLevel(pygame.mouse.get_pos())
+
+    if worker is None:
+        if recorder is not None:
+            recorder.record(frameTime, inputs)
+
+        # Advance the game by however many ticks fit in the time since the last frame
+        alpha = simulation.advance(frameTime, inputs)
+        snapshot = None
+    else:
+        worker.send(inputs)
+        snapshot, alpha = worker.latest()
+        running = running and worker.running
+
+    # Draw the frame, getting back the changed rects in dirty rectangle mode
+    dirtyRects = renderer.draw(inputs.aimPos, clock.get_fps() if DISPLAY_FPS else None, alpha, snapshot)
 
     # for obj in objectsGroup:
 
         # print(obj.netForceThisFrame)
 
+    if profiler.showOverlay:
+        profiler.drawOverlay(screen, debugFont())
+        # The overlay is not tracked by the renderer, so the screen under it is repainted every frame
+        renderer.invalidate()
+        dirtyRects = None
+    profiler.mark("overlay")
+
     # Render blitted objects to screen
-    pygame.display.flip()
+    if dirtyRects is None:
+        pygame.display.flip()
+    else:
+        pygame.display.update(dirtyRects)
+    profiler.mark("flip")
+    profiler.endFrame()
+
+if worker is not None:
+    worker.stop()
+if recorder is not None:
+    recorder.save(RECORD_FILE)
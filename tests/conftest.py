@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The game's modules live at the repository root and draw to a dummy display
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
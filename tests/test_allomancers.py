@@ -0,0 +1,40 @@
+import numpy as np
+from Simulation import Simulation
+from Allomancers import AllomancerSolver
+
+
+def test_singlePairMatchesThePlayersForcePass():
+    simulation = Simulation(960, 540, (300, 500), collisions=False)
+    world, player = simulation.world, simulation.playerSprite
+    target = simulation.addObjects(np.array([[420.0, 420.0]]), np.array([[10.0, 10.0]]), 5.0, True)
+    world.velocity[target] = (2.0, -3.0)
+
+    for steel in (True, False):
+        player.aSteel, player.aIron = steel, not steel
+        directions, distances = player.targetOffsets(target)
+        player.applyForces(target, directions, distances, steel)
+        expected = world.netForce[[player.index, target[0]]].copy()
+        world.netForce[:] = 0
+
+        solver = AllomancerSolver(world)
+        solver.add(player.index, steel, not steel, player.allomanticStrength)
+        solver.solve()
+        assert np.abs(expected).max() > 0
+        assert np.allclose(world.netForce[[player.index, target[0]]], expected)
+        world.netForce[:] = 0
+
+
+def test_cutoffDropsFarPairs():
+    simulation = Simulation(4000, 540, (100, 500), collisions=False)
+    world, solver = simulation.world, simulation.allomancers
+    slot = simulation.addAllomancer(1000, 500, steel=True)
+    near, far = simulation.addObjects(np.array([[1100.0, 500.0], [3900.0, 500.0]]), np.full((2, 2), 10.0), 1.0, True)
+
+    cutoff = solver.cutoffs(solver.coefficients())[slot]
+    assert 100 < cutoff < 2900
+    owners, targets = solver.neighbours(np.array([cutoff]))
+    assert near in targets and far not in targets
+
+    solver.solve()
+    assert np.abs(world.netForce[near]).max() > 0
+    assert (world.netForce[far] == 0).all()
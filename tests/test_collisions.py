@@ -0,0 +1,25 @@
+import numpy as np
+from Collisions import CollisionSystem
+
+
+def overlappingPairs(position, size) -> set:
+    overlap = (np.minimum(position[:, None] + size[:, None], position[None] + size[None]) -
+               np.maximum(position[:, None], position[None]))
+    a, b = np.nonzero((overlap > 0).all(axis=2))
+    return {(i, j) for i, j in zip(a.tolist(), b.tolist()) if i < j}
+
+
+def test_broadphaseFindsEveryOverlapInMixedSizes():
+    # Mostly coins, a few percent of slightly larger bodies and a handful of much larger ones such as platforms
+    rng = np.random.default_rng(0)
+    count = 2000
+    size = np.full((count, 2), 10.0)
+    size[rng.random(count) < 0.04] = 30.0
+    size[rng.choice(count, 40, replace=False)] = rng.uniform(50, 400, (40, 2))
+    position = rng.uniform(-100, 600, (count, 2))
+
+    a, b = CollisionSystem().broadphase(position, size)
+    pairs = {(min(i, j), max(i, j)) for i, j in zip(a.tolist(), b.tolist())}
+    assert len(pairs) == len(a)
+    assert (a != b).all()
+    assert overlappingPairs(position, size) <= pairs
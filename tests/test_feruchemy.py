@@ -0,0 +1,48 @@
+import pytest
+from Feruchemy import FeruchemyEngine, METAL_INDICES
+
+# Base attributes of the player
+BASE = {"mass": 20, "moveSpeedLimit": 10, "acceleration": 2, "deceleration": 2}
+
+# Multiplier of each stage in the match blocks of PlayerSprite.changeAttributes that the stage tables replaced
+OLD_MULTIPLIERS = {-3: 0.25, -2: 0.5, -1: 0.75, 0: 1, 1: 2, 2: 3, 3: 10}
+
+
+def oldTick(stages: dict, metalMinds: dict, capacity=5000) -> dict:
+    """PlayerSprite.updateFeruchemy before FeruchemyEngine, returning the attributes and changing the stages and
+    metalminds in place
+    """
+    for metal in stages:
+        if metalMinds[metal] >= capacity and stages[metal] < 0:
+            stages[metal] = 0
+        elif metalMinds[metal] <= 0 and stages[metal] > 0:
+            stages[metal] = 0
+
+    attributes = {"mass": OLD_MULTIPLIERS[stages["iron"]] * BASE["mass"]}
+    for name in ("moveSpeedLimit", "acceleration", "deceleration"):
+        attributes[name] = OLD_MULTIPLIERS[stages["steel"]] * BASE[name]
+    metalMinds["iron"] += int(BASE["mass"] - attributes["mass"])
+    metalMinds["steel"] += int(BASE["moveSpeedLimit"] - attributes["moveSpeedLimit"])
+    for metal in metalMinds:
+        metalMinds[metal] = min(max(metalMinds[metal], 0), capacity)
+    return attributes
+
+
+@pytest.mark.parametrize("stage", range(-3, 4))
+@pytest.mark.parametrize("metal", ["iron", "steel"])
+def test_stagesMatchTheOldAttributesAndRates(metal, stage):
+    engine = FeruchemyEngine(capacity=500)
+    row = engine.add(None, **BASE)
+    engine.metalMinds[row] = 100
+    engine.changeStage(row, metal, stage)
+
+    stages = {"iron": 0, "steel": 0, metal: stage}
+    metalMinds = {"iron": 100, "steel": 100}
+    for _ in range(40):
+        engine.step()
+        attributes = oldTick(stages, metalMinds, 500)
+        for name, value in attributes.items():
+            assert engine.attributes[name][row] == value
+        for other in ("iron", "steel"):
+            assert engine.metalMinds[row, METAL_INDICES[other]] == metalMinds[other]
+            assert engine.stages[row, METAL_INDICES[other]] == stages[other]
@@ -0,0 +1,29 @@
+import math
+import numpy as np
+import functions
+
+
+def test_rowKernelsMatchTheirScalarVersions():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(0, 10, (50, 2))
+    directions = rng.normal(0, 1, (50, 2))
+    directions[0] = 0
+
+    clamped = functions.clampMagnitudeRows(vectors, 5.0)
+    projected = functions.vectorProjectRows(vectors, directions)
+    for i in range(len(vectors)):
+        assert np.allclose(clamped[i], functions.clampMagnitude(vectors[i], 5.0))
+        assert np.allclose(projected[i], functions.vectorProject(vectors[i], directions[i]))
+
+    distances = rng.uniform(0, 1000, 50)
+    falloff = functions.exponentialFalloff(distances, 200.0)
+    assert np.allclose(falloff, [math.exp(-distance / 200.0) for distance in distances])
+
+
+def test_allomanticForceBackendsAgree():
+    rng = np.random.default_rng(1)
+    directions, _ = functions.normaliseRows(rng.normal(0, 1, (100, 2)))
+    args = (directions, rng.uniform(1, 500, 100), rng.normal(0, 5, (100, 2)), rng.uniform(0.5, 2, 100),
+            -1000.0, 100.0, 3.0, 1_000_000.0)
+    assert np.allclose(functions._allomanticForcesNumPy(*args), functions._allomanticForcesLoop(*args))
+    assert np.allclose(functions.allomanticForces(*args), functions._allomanticForcesLoop(*args))
@@ -0,0 +1,81 @@
+import numpy as np
+from Simulation import Simulation, InputState
+from PhysicsWorld import PhysicsWorld, GRAVITYCONSTANT
+
+
+def test_settledStackEndsAsleepAndWakesWhenItsSupportGoes():
+    simulation = Simulation(960, 540, (100, 500))
+    world = simulation.world
+    bottom, top = simulation.addObjects(np.array([[500.0, 520.0], [500.0, 505.0]]), np.full((2, 2), 10.0))
+    for _ in range(120):
+        simulation.step(InputState())
+    assert world.asleep[[bottom, top]].all()
+    assert (world.velocity[[bottom, top]] == 0).all()
+    restingHeight = world.position[top, 1]
+
+    simulation.removeBodies(np.array([bottom]))
+    top = top - 1
+    assert not world.asleep[top]
+    for _ in range(30):
+        simulation.step(InputState())
+    assert world.position[top, 1] > restingHeight + 5
+
+
+WIDTH, HEIGHT = 960, 540
+
+
+def objectUpdate(position, velocity, force, mass, size, frictionCoeff=0.1):
+    """MetalObject.update before PhysicsWorld, on float positions. Objects never became airborne, so friction always
+    applied and drag never did.
+    """
+    force = force + (-velocity[0] * frictionCoeff * mass, 0.0)
+    velocity = velocity + force / mass
+    velocity[1] += GRAVITYCONSTANT
+    position = position + velocity
+    if position[1] >= HEIGHT - size[1]:
+        position[1] = HEIGHT - size[1]
+        velocity[1] = 0
+    return np.clip(position, 0, (WIDTH - size[0], HEIGHT - size[1])), velocity
+
+
+def playerUpdate(position, velocity, force, mass, size, limits, frictionCoeff=0.1, dragCoeff=0.1):
+    """PlayerSprite.update before PhysicsWorld, on float positions
+    """
+    if position[1] >= HEIGHT - size[1]:
+        force = force + (-velocity[0] * frictionCoeff * mass, 0.0)
+    elif not np.allclose(velocity, 0.0):
+        speed = np.linalg.norm(velocity)
+        force = force - dragCoeff * speed ** 2 * (velocity / speed)
+    velocity = velocity + force / mass
+    velocity[1] += GRAVITYCONSTANT
+    velocity = np.clip(velocity, -np.asarray(limits), limits)
+    position = position + velocity
+    if position[1] >= HEIGHT - size[1]:
+        position[1] = HEIGHT - size[1]
+        velocity[1] = 0
+    return position, velocity
+
+
+def test_stepMatchesTheOldPerSpriteUpdates():
+    world = PhysicsWorld()
+    size = np.array([[10.0, 10.0], [20.0, 30.0], [20.0, 30.0]])
+    rows = world.addBodies(np.array([[100.0, 200.0], [300.0, HEIGHT - 30.0], [600.0, 100.0]]), size, WIDTH, HEIGHT,
+                           np.array([1.0, 20.0, 20.0]))
+    obj, grounded, airborne = rows
+    world.clampToBounds[obj] = True
+    world.detectAirborne[[grounded, airborne]] = True
+    world.velocityLimit[[grounded, airborne]] = (10, 30)
+    world.velocity[rows] = [[4.0, -6.0], [8.0, 0.0], [-5.0, -12.0]]
+
+    position, velocity = world.position[rows].copy(), world.velocity[rows].copy()
+    rng = np.random.default_rng(0)
+    for _ in range(60):
+        forces = rng.normal(0, 20, (3, 2))
+        world.netForce[rows] = forces
+        world.step()
+        position[0], velocity[0] = objectUpdate(position[0], velocity[0], forces[0], 1.0, size[0])
+        for body in (1, 2):
+            position[body], velocity[body] = playerUpdate(position[body], velocity[body], forces[body], 20.0,
+                                                          size[body], (10, 30))
+        assert np.allclose(world.position[rows], position)
+        assert np.allclose(world.velocity[rows], velocity)
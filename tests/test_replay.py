@@ -0,0 +1,59 @@
+import numpy as np
+from Simulation import Simulation, InputState
+from Chunks import ChunkStreamer
+from TileMap import TileMap
+from IronSteelAllomancy import IronSteelAllomancy
+from Replay import InputRecorder, Recording, replay
+
+
+def streamedSimulation() -> Simulation:
+    rng = np.random.default_rng(0)
+    simulation = Simulation(4000, 540, (300, 500))
+    simulation.chunks = ChunkStreamer(simulation, 256, 1)
+    count = 2000
+    simulation.chunks.addObjects(rng.uniform((0, 0), (3990, 530), (count, 2)), np.full((count, 2), 10.0), 1.0,
+                                 rng.random(count) < 0.5, rng.random(count) < 0.1)
+    return simulation
+
+
+def test_streamedRunReplaysToTheSameWorld(tmp_path):
+    simulation = streamedSimulation()
+    recorder = InputRecorder(simulation)
+    frameTime = 1 / simulation.tickRate
+    for frame in range(240):
+        inputs = InputState(aimPos=(4000, 300), moveRight=True, steel=frame % 60 < 30, jump=frame % 40 == 0)
+        recorder.record(frameTime, inputs)
+        simulation.advance(frameTime, inputs)
+    assert simulation.chunks.frozenCount() > 0
+
+    recorder.save(tmp_path / "run.npz")
+    replayed = replay(Recording.load(tmp_path / "run.npz"))
+    assert replayed.chunks is not None
+    assert replayed.world.count == simulation.world.count
+    assert replayed.chunks.frozenCount() == simulation.chunks.frozenCount()
+    assert replayed.world.stateHash() == simulation.world.stateHash()
+
+
+def test_wallsAllomancersAndConstantsAreReplayed(tmp_path):
+    rng = np.random.default_rng(1)
+    simulation = Simulation(960, 540, (300, 500), allomancy=IronSteelAllomancy(distanceConstant=150))
+    simulation.world.tileMap = TileMap.covering(960, 540)
+    simulation.world.tileMap.setWalls(500, 300, 40, 240)
+    count = 300
+    simulation.addObjects(rng.uniform((0, 0), (950, 530), (count, 2)), np.full((count, 2), 10.0), 1.0,
+                          rng.random(count) < 0.5)
+    simulation.addAllomancer(700, 500, steel=True, strength=2.0)
+
+    recorder = InputRecorder(simulation)
+    frameTime = 1 / simulation.tickRate
+    for frame in range(120):
+        inputs = InputState(aimPos=(800, 450), steel=frame % 40 < 20, iron=frame % 40 >= 20)
+        recorder.record(frameTime, inputs)
+        simulation.advance(frameTime, inputs)
+
+    recorder.save(tmp_path / "run.npz")
+    replayed = replay(Recording.load(tmp_path / "run.npz"))
+    assert replayed.world.allomancy == simulation.world.allomancy
+    assert np.array_equal(replayed.world.tileMap.walls, simulation.world.tileMap.walls)
+    assert np.array_equal(replayed.allomancers.rows, simulation.allomancers.rows)
+    assert replayed.world.stateHash() == simulation.world.stateHash()
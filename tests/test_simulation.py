@@ -0,0 +1,43 @@
+import pygame
+from Simulation import Simulation, InputState
+from Renderer import Renderer, TARGET_LINE_COLOUR, AIMED_LINE_COLOUR
+
+
+def settledSimulation() -> Simulation:
+    simulation = Simulation(960, 540, (100, 500))
+    for _ in range(30):
+        simulation.step(InputState())
+    assert not simulation.playerSprite.isAirborne
+    return simulation
+
+
+def test_oneShotInputOfZeroTickFrameReachesNextTick():
+    simulation = settledSimulation()
+    player = simulation.playerSprite
+    tickTime = 1 / simulation.tickRate
+
+    # The caller reuses its InputState and clears the one-shot inputs at the start of every frame, as main.py does
+    inputs = InputState(jump=True, ironMetalmindChange=-1)
+    simulation.advance(tickTime / 4, inputs)
+    assert simulation.tick == 30
+    inputs.jump, inputs.ironMetalmindChange = False, 0
+
+    simulation.advance(tickTime, inputs)
+    assert simulation.tick == 31
+    assert player.velocity[1] < 0
+    assert simulation.feruchemy.stagesOf(player.feruchemyRow)["iron"] == -1
+
+
+def test_targetLinesHighlightOnlyWhilePushPulling():
+    simulation = Simulation(960, 540, (100, 500))
+    simulation.addObject(400, 500, 20, 20, True)
+    renderer = Renderer(pygame.Surface((960, 540)), simulation, None)
+    aimPos = (400, 510)
+
+    simulation.step(InputState(aimPos=aimPos))
+    lines = dict((colour, ends) for colour, _, ends in renderer.targetLines())
+    assert len(lines[TARGET_LINE_COLOUR]) == 1 and lines[AIMED_LINE_COLOUR] == []
+
+    simulation.step(InputState(aimPos=aimPos, steel=True))
+    lines = dict((colour, ends) for colour, _, ends in renderer.targetLines())
+    assert lines[TARGET_LINE_COLOUR] == [] and len(lines[AIMED_LINE_COLOUR]) == 1
@@ -0,0 +1,24 @@
+import math
+import numpy as np
+from PhysicsWorld import PhysicsWorld
+from SpatialGrid import SpatialGrid
+
+
+def test_queryConeMatchesBruteForce():
+    rng = np.random.default_rng(0)
+    world = PhysicsWorld()
+    count = 3000
+    world.addBodies(rng.uniform(0, 2000, (count, 2)), rng.uniform(5, 30, (count, 2)), 2000, 2000)
+    world.metallic[:count] = rng.random(count) < 0.5
+    grid = SpatialGrid(world, 300)
+
+    point, direction, coneAngle = np.array([1000.0, 900.0]), np.array([1.0, -2.0]), 45
+    found = grid.queryCone(point, 400, direction, coneAngle, True)
+
+    offsets = world.centres() - point
+    distances = np.hypot(offsets[:, 0], offsets[:, 1])
+    cosines = offsets @ direction / (np.hypot(*direction) * np.maximum(distances, 1e-12))
+    expected = np.flatnonzero((distances > 0) & (distances <= 400) & world.metallic[:count] &
+                              (cosines >= math.cos(math.radians(coneAngle / 2))))
+    assert len(expected) > 0
+    assert np.array_equal(np.sort(found), expected)
@@ -0,0 +1,38 @@
+import numpy as np
+import functions
+from Simulation import Simulation
+from TileMap import TileMap
+
+
+def test_wallsCrossedBackendsAgree():
+    rng = np.random.default_rng(0)
+    walls = rng.random((20, 30)) < 0.3
+    starts = rng.uniform(-2, 32, (500, 2))
+    ends = rng.uniform(-2, 32, (500, 2))
+    ends[:20] = starts[:20]  # Zero length
+    ends[20:40, 0] = starts[20:40, 0]  # Vertical
+    ends[40:60, 1] = starts[40:60, 1]  # Horizontal
+
+    expected = functions._wallsCrossedLoop(walls, starts, ends)
+    assert expected.max() > 1
+    assert np.array_equal(functions._wallsCrossedNumPy(walls, starts, ends), expected)
+    assert np.array_equal(functions.wallsCrossed(walls, starts, ends), expected)
+
+
+def test_changingATileInvalidatesAnchorOcclusion():
+    simulation = Simulation(640, 320, (48, 160), collisions=False)
+    world = simulation.world
+    tileMap = world.tileMap = TileMap.covering(640, 320)
+    anchor = simulation.addObjects(np.array([[555.0, 155.0]]), np.array([[10.0, 10.0]]), 1.0, True, True)
+    sources = np.array([simulation.playerSprite.index])
+
+    assert np.allclose(tileMap.occlusion(world, sources, anchor), 1.0)
+    assert tileMap.anchorCache
+
+    version = tileMap.version
+    tileMap.setWalls(320, 0, 32, 320)
+    assert tileMap.version > version and not tileMap.anchorCache
+    assert np.allclose(tileMap.occlusion(world, sources, anchor), world.allomancy.wallOcclusionFactor)
+
+    tileMap.setWalls(320, 0, 32, 320, wall=False)
+    assert np.allclose(tileMap.occlusion(world, sources, anchor), 1.0)